@@ -0,0 +1,128 @@
+package com.sealyze.data.source
+
+import android.content.Context
+import org.json.JSONArray
+import org.json.JSONObject
+import kotlin.math.abs
+import kotlin.math.sqrt
+
+/**
+ * Mirror of python_scripts/features.py (reference = "wrist"), driven by assets/feature_spec.json.
+ *
+ * Per hand and frame: 20 landmarks relative to the wrist divided by the palm size
+ * (wrist -> middle MCP), the wrist position, optional velocity and a presence flag.
+ * Writes into caller-owned buffers, so inference stays allocation-free.
+ */
+class FeatureTransform private constructor(
+    private val dropZ: Boolean,
+    private val velocity: Boolean,
+    private val palmEps: Float
+) {
+    private val coords = if (dropZ) 2 else 3
+    private val staticSize = (HAND_LANDMARKS - 1) * coords + 2
+    private val handBlock = staticSize * (if (velocity) 2 else 1) + 1
+    val outputSize = 2 * handBlock
+
+    /** input: [L][126] raw LH | RH landmarks (zeros = missing hand). output: [L][outputSize]. */
+    fun apply(input: Array<FloatArray>, output: Array<FloatArray>) {
+        for (t in input.indices) {
+            val row = input[t]
+            val out = output[t]
+            for (hand in 0 until 2) {
+                val base = hand * HAND_SIZE
+                val block = hand * handBlock
+                var present = false
+                for (i in base until base + HAND_SIZE) {
+                    if (row[i] != 0f) { present = true; break }
+                }
+                if (!present) {
+                    out.fill(0f, block, block + handBlock)
+                    continue
+                }
+                val wx = row[base]
+                val wy = row[base + 1]
+                val wz = row[base + 2]
+                val dx = row[base + MIDDLE_MCP * 3] - wx
+                val dy = row[base + MIDDLE_MCP * 3 + 1] - wy
+                var palm = sqrt(dx * dx + dy * dy)
+                if (palm <= palmEps) palm = 1f
+
+                var o = block
+                for (k in 1 until HAND_LANDMARKS) {
+                    val i = base + k * 3
+                    out[o++] = (row[i] - wx) / palm
+                    out[o++] = (row[i + 1] - wy) / palm
+                    if (!dropZ) out[o++] = (row[i + 2] - wz) / palm
+                }
+                out[o++] = wx
+                out[o] = wy
+                out[block + handBlock - 1] = 1f
+            }
+        }
+        if (!velocity) return
+
+        // Velocity: difference of the static block with the previous frame (both hands present)
+        for (t in output.indices) {
+            val out = output[t]
+            for (hand in 0 until 2) {
+                val block = hand * handBlock
+                val presentFlag = block + handBlock - 1
+                val prev = if (t > 0) output[t - 1] else null
+                if (prev == null || out[presentFlag] == 0f || prev[presentFlag] == 0f) {
+                    out.fill(0f, block + staticSize, block + 2 * staticSize)
+                    continue
+                }
+                for (i in 0 until staticSize) {
+                    out[block + staticSize + i] = out[block + i] - prev[block + i]
+                }
+            }
+        }
+    }
+
+    companion object {
+        const val SPEC_ASSET = "feature_spec.json"
+        private const val HAND_LANDMARKS = 21
+        private const val HAND_SIZE = HAND_LANDMARKS * 3
+        private const val MIDDLE_MCP = 9
+
+        /** Returns null when the model was trained on raw landmarks (no spec in assets). */
+        fun fromAssets(context: Context): FeatureTransform? {
+            if (context.assets.list("")?.contains(SPEC_ASSET) != true) return null
+            val spec = JSONObject(context.assets.open(SPEC_ASSET).bufferedReader().use { it.readText() })
+            val reference = spec.getString("reference")
+            check(reference == "wrist") { "Feature reference '$reference' needs pose landmarks, not available on Android" }
+
+            val transform = FeatureTransform(
+                dropZ = spec.getBoolean("drop_z"),
+                velocity = spec.getBoolean("velocity"),
+                palmEps = spec.getDouble("palm_eps").toFloat()
+            )
+            check(transform.outputSize == spec.getInt("output_size")) {
+                "feature_spec.json output_size ${spec.getInt("output_size")} != ${transform.outputSize}"
+            }
+            transform.selfCheck(spec.getJSONObject("fixture"))
+            return transform
+        }
+
+        private fun toMatrix(rows: JSONArray): Array<FloatArray> = Array(rows.length()) { r ->
+            val row = rows.getJSONArray(r)
+            FloatArray(row.length()) { c -> row.getDouble(c).toFloat() }
+        }
+    }
+
+    /** Runs the golden vectors exported with the model; fails loudly if Python and Kotlin drift. */
+    private fun selfCheck(fixture: JSONObject) {
+        val input = toMatrix(fixture.getJSONArray("input"))
+        val expected = toMatrix(fixture.getJSONArray("output"))
+        val atol = fixture.getDouble("atol").toFloat()
+        val got = Array(input.size) { FloatArray(outputSize) }
+        apply(input, got)
+        for (t in expected.indices) {
+            for (i in expected[t].indices) {
+                check(abs(got[t][i] - expected[t][i]) <= atol) {
+                    "Feature parity failed at frame $t, feature $i: ${got[t][i]} != ${expected[t][i]}"
+                }
+            }
+        }
+    }
+}
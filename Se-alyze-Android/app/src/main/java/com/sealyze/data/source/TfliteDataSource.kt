@@ -20,28 +20,73 @@ class TfliteDataSource @Inject constructor(
     private val SEQUENCE_LENGTH = 32 // Adjusted to 32 frames (approx 1.05s at 30 FPS)
     private val FEATURE_SIZE = 126 // 21*3 (LH) + 21*3 (RH) - Simplified for Android
     private var labels: List<String> = emptyList()
+    // Optional normalization stage (assets/feature_spec.json), mirrored from python_scripts/features.py
+    private var featureTransform: FeatureTransform? = null
+    private var featureInput: Array<Array<FloatArray>>? = null
+    private val MODEL_ASSET = "lsc_model.tflite"
+    private val LITE_MODEL_ASSET = "lsc_model_lite.tflite"
+    private val LOW_END_MEMORY_CLASS_MB = 128
+    // Last initialization failure, shown in the debug overlay instead of silently returning null
+    private var initError: String? = null
+    // Set when assets/feature_spec.json fails its parity self-check: deterministic, so no retries
+    private var featureSpecBroken = false
 
     init {
         initializeInterpreter()
     }
 
     private fun initializeInterpreter() {
-        if (interpreter != null) return
+        if (interpreter != null || featureSpecBroken) return
         try {
             android.util.Log.d("SealyzeDebug", "Attempting to initialize TFLite Interpreter...")
-            val modelBuffer = loadModelFile("lsc_model.tflite")
-            val options = Interpreter.Options()
-            options.addDelegate(FlexDelegate())
-            
-            interpreter = Interpreter(modelBuffer, options)
+            // Before the interpreter: a failed parity self-check must leave the model unloaded
+            featureTransform = try {
+                FeatureTransform.fromAssets(context)
+            } catch (e: IllegalStateException) {
+                featureSpecBroken = true
+                initError = "feature_spec.json: ${e.message}"
+                android.util.Log.e("SealyzeDebug", "CRITICAL: feature transform does not match the trained model. " +
+                    "Recognition is DISABLED until the assets are re-exported with 2_train_local.py.", e)
+                return
+            }?.also { transform ->
+                featureInput = Array(1) { Array(SEQUENCE_LENGTH) { FloatArray(transform.outputSize) } }
+                android.util.Log.d("SealyzeDebug", "Feature transform loaded: ${transform.outputSize} features per frame.")
+            }
+            val modelBuffer = loadModelFile(selectModelAsset())
+            interpreter = try {
+                // Builtins-only model (BUILTINS_ONLY export): no Flex runtime, faster startup, XNNPACK path
+                Interpreter(modelBuffer, Interpreter.Options()).also {
+                    android.util.Log.d("SealyzeDebug", "Success: TFLite Interpreter initialized (builtin ops only).")
+                }
+            } catch (e: IllegalArgumentException) {
+                // Older models exported with SELECT_TF_OPS still need the FlexDelegate
+                android.util.Log.w("SealyzeDebug", "Model needs Flex ops, retrying with FlexDelegate: ${e.message}")
+                val options = Interpreter.Options()
+                options.addDelegate(FlexDelegate())
+                Interpreter(modelBuffer, options).also {
+                    android.util.Log.d("SealyzeDebug", "Success: TFLite Interpreter initialized with FlexDelegate.")
+                }
+            }
             loadLabels()
-            android.util.Log.d("SealyzeDebug", "Success: TFLite Interpreter initialized with FlexDelegate.")
+            initError = null
         } catch (e: Throwable) { // Catch Throwable to handle UnsatisfiedLinkError/NoClassDefFoundError
+            initError = "${e.javaClass.simpleName}: ${e.message}"
             android.util.Log.e("SealyzeDebug", "CRITICAL FAILURE initializing TFLite: ${e.message}", e)
             e.printStackTrace()
         }
     }
 
+    // Tiered model: the distilled student (lsc_model_lite.tflite, DISTILL in 2_train_local.py)
+    // on low-memory devices, the full model everywhere else
+    private fun selectModelAsset(): String {
+        val hasLite = context.assets.list("")?.contains(LITE_MODEL_ASSET) == true
+        val activityManager = context.getSystemService(Context.ACTIVITY_SERVICE) as android.app.ActivityManager
+        val lowEnd = activityManager.isLowRamDevice || activityManager.memoryClass <= LOW_END_MEMORY_CLASS_MB
+        val modelName = if (hasLite && lowEnd) LITE_MODEL_ASSET else MODEL_ASSET
+        android.util.Log.d("SealyzeDebug", "Using model asset: $modelName (low-end device: $lowEnd)")
+        return modelName
+    }
+
     private fun loadModelFile(modelName: String): ByteBuffer {
         val fileDescriptor = context.assets.openFd(modelName)
         val inputStream = FileInputStream(fileDescriptor.fileDescriptor)
@@ -137,11 +182,19 @@ class TfliteDataSource @Inject constructor(
                 android.util.Log.w("SealyzeDebug", "Interpreter is null. Attempting re-initialization...")
                 initializeInterpreter()
                 if (interpreter == null) {
-                    android.util.Log.e("SealyzeDebug", "ERROR: Interpreter is STILL NULL after retry. Skipping inference.")
-                    return null
+                    android.util.Log.e("SealyzeDebug", "ERROR: Interpreter is STILL NULL after retry: $initError")
+                    // Surface the failure in the debug overlay so recognition does not just go quiet
+                    return TranslationResult("", 0f, null, "MODEL NOT LOADED\n${initError ?: "unknown error"}")
                 }
             }
-            interpreter?.run(inputData, outputData)
+            val transform = featureTransform
+            val transformed = featureInput
+            if (transform != null && transformed != null) {
+                transform.apply(inputData[0], transformed[0])
+                interpreter?.run(transformed, outputData)
+            } else {
+                interpreter?.run(inputData, outputData)
+            }
         } catch (e: Throwable) {
             android.util.Log.e("SealyzeDebug", "Inference error: ${e.message}", e)
             e.printStackTrace()
@@ -1,9 +1,14 @@
 import shutil
+import subprocess
 import cv2
 import os
 import time
 import numpy as np
-import mediapipe as mp
+import dataset_store
+import keypoints as kp
+import capture_pipeline
+import recording
+import telemetry
 
 # ==========================================
 # CONFIGURACIÓN
@@ -30,52 +35,74 @@ except FileNotFoundError:
 print(f"📋 Lista de trabajo cargada: {SIGN_LIST}") 
 DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dataset') # Ruta absoluta: Se-alyze/dataset
 NO_SEQUENCES = 30   # Videos por seña
-SEQUENCE_LENGTH = 32  # AJUSTADO: 32 frames (aprox 1.05 seg a 30 FPS)
-MIN_LENGTH = 15      # Mínimo de frames para que sea válidaara mayor velocidad)
+SEQUENCE_LENGTH = recording.SEQUENCE_LENGTH  # 32 frames (aprox 1.05 seg a 30 FPS)
+MIN_LENGTH = recording.MIN_LENGTH            # Mínimo de frames para que sea válida
+
+# Almacenamiento: True = dataset empaquetado (dataset_packed/, ver dataset_store.py)
+# False = layout antiguo dataset/<seña>/<n>/keypoints.npy
+USE_PACKED_STORE = True
+PACKED_PATH = dataset_store.PACKED_PATH
+
+# Captura en pipeline (grabber / MediaPipe / UI / video en hilos separados, ver capture_pipeline.py)
+# Cada secuencia dura SEQUENCE_LENGTH / TARGET_FPS segundos reales, sin importar los FPS de la máquina
+PIPELINED_CAPTURE = True
+TARGET_FPS = recording.TARGET_FPS
+SEQUENCE_DURATION = recording.SEQUENCE_DURATION
+
+# Telemetría: duración de cada etapa por frame, HUD de FPS/latencia y reporte por sesión en
+# <dataset>/telemetry/ (ver telemetry.py). False = sin ninguna medición.
+TELEMETRY = True
+START_SOUND = "/System/Library/Sounds/Ping.aiff"
+
+# Video: '<seña>_raw_video.mov' lleva los landmarks dibujados (para revisar a ojo). Con
+# SAVE_CLEAN_VIDEO también se graba '<seña>_clean_video.mov' sin anotar y un manifiesto
+# .jsonl con los frames de cada secuencia: es la entrada de extract_landmarks.py.
+SAVE_CLEAN_VIDEO = True
+CLEAN_VIDEO_SUFFIX = '_clean_video.mov'
 
 # ==========================================
-# MEDIAPIPE SETUP
+# MEDIAPIPE SETUP (compartido en recording.py)
 # ==========================================
-mp_holistic = mp.solutions.holistic
-mp_drawing = mp.solutions.drawing_utils
-
-def mediapipe_detection(image, model):
-    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB) 
-    image.flags.writeable = False                  
-    results = model.process(image)                 
-    image.flags.writeable = True                   
-    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) 
-    return image, results
-
-def draw_styled_landmarks(image, results):
-    # Cara (Mesh Contours) - Para que el usuario vea el mentón
-    if results.face_landmarks:
-        mp_drawing.draw_landmarks(
-            image, 
-            results.face_landmarks, 
-            mp_holistic.FACEMESH_CONTOURS,
-            mp_drawing.DrawingSpec(color=(80,110,10), thickness=1, circle_radius=1),
-            mp_drawing.DrawingSpec(color=(80,256,121), thickness=1, circle_radius=1)
-        )
-
-    # Manos
-    mp_drawing.draw_landmarks(image, results.left_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
-    mp_drawing.draw_landmarks(image, results.right_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
-    # Pose
-    mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_holistic.POSE_CONNECTIONS)
-
-def extract_keypoints(results):
-    # POSE contiene 33 puntos, incluyendo nariz (0), ojos y boca (9,10). 
-    # Usamos esto como referencia del "mentón".
-    pose = np.array([[res.x, res.y, res.z, res.visibility] for res in results.pose_landmarks.landmark]).flatten() if results.pose_landmarks else np.zeros(33*4)
-    lh = np.array([[res.x, res.y, res.z] for res in results.left_hand_landmarks.landmark]).flatten() if results.left_hand_landmarks else np.zeros(21*3)
-    rh = np.array([[res.x, res.y, res.z] for res in results.right_hand_landmarks.landmark]).flatten() if results.right_hand_landmarks else np.zeros(21*3)
-    return np.concatenate([pose, lh, rh])
+mp_holistic = recording.mp_holistic
+mediapipe_detection = recording.mediapipe_detection
+draw_styled_landmarks = recording.draw_styled_landmarks
+video_manifest_path = recording.video_manifest_path
+append_video_manifest = recording.append_video_manifest
+
+def draw_recording_overlay(image, results, sign_name, sequence, target_sequences, record_video_mode):
+    draw_styled_landmarks(image, results)
+
+    rec_indicator = "::: GRABANDO VIDEO :::" if record_video_mode else "::: GRABANDO :::"
+    rec_color = (0, 0, 255) if record_video_mode else (0, 255, 0)
+
+    cv2.putText(image, rec_indicator, (120,200), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1, rec_color, 4, cv2.LINE_AA)
+    cv2.putText(image, f'Palabra: {sign_name} - {sequence + 1}/{target_sequences}', (15,30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
+
+def close_video_outputs(video_encoder, out_video, clean_video, video_manifest):
+    """Cierra los videos y el manifiesto de una palabra."""
+    if video_encoder:
+        video_encoder.close()  # Vacía la cola y libera los dos writers
+    else:
+        if out_video: out_video.release()
+        if clean_video: clean_video.release()
+    if video_manifest:
+        video_manifest.close()
+    if out_video:
+        print("🎥 Video guardado correctamente.")
+
+def play_start_sound():
+    # Sin shell y sin esperar: os.system bloqueaba el bucle mientras arrancaba el proceso
+    try:
+        subprocess.Popen(["afplay", START_SOUND], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except OSError:
+        pass # afplay solo existe en macOS
 
 # ==========================================
 # CÓDIGO DE GRABACIÓN
 # ==========================================
-def record_sign():
+def record_sign(timing=telemetry.NULL_TELEMETRY):
     # CONFIGURAR PANTALLA COMPLETA
     cv2.namedWindow('Recolector LSC', cv2.WINDOW_NORMAL)
     cv2.setWindowProperty('Recolector LSC', cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN) 
@@ -96,6 +123,14 @@ def record_sign():
     # Iniciar MediaPipe Context
     with mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
         
+        # Conteo de secuencias ya empaquetadas (una sola lectura de labels.i32)
+        packed_counts = {}
+        if USE_PACKED_STORE:
+            # Antes de contar: las carpetas sin empaquetar quedarían fuera del entrenamiento
+            # y sus señas se volverían a grabar desde 0
+            dataset_store.import_folder_layout(DATA_PATH, PACKED_PATH)
+            packed_counts = dataset_store.count_sequences(PACKED_PATH)
+
         # --- BUCLE PRINCIPAL PARA CADA PALABRA ---
         for sign_name, target_sequences in SIGN_LIST:
             
@@ -104,16 +139,20 @@ def record_sign():
             # target_sequences viene de la tupla (parsed from txt)
             existing_sequences = 0
             
-            if os.path.exists(sign_folder):
+            if USE_PACKED_STORE:
+                existing_sequences = packed_counts.get(sign_name, 0)
+            elif os.path.exists(sign_folder):
                 existing_sequences = len([d for d in os.listdir(sign_folder) 
                                          if os.path.isdir(os.path.join(sign_folder, d))])
-                
-                if existing_sequences >= target_sequences:
-                    print(f"✅ Skipping '{sign_name}', ya tiene {existing_sequences}/{target_sequences} secuencias.")
-                    continue
-                else:
-                    print(f"📁 '{sign_name}' tiene {existing_sequences}/{target_sequences} secuencias. Grabando {target_sequences - existing_sequences} más...")
-            else:
+
+            if existing_sequences >= target_sequences:
+                print(f"✅ Skipping '{sign_name}', ya tiene {existing_sequences}/{target_sequences} secuencias.")
+                continue
+            elif existing_sequences > 0:
+                print(f"📁 '{sign_name}' tiene {existing_sequences}/{target_sequences} secuencias. Grabando {target_sequences - existing_sequences} más...")
+
+            # La carpeta de la seña se sigue usando para el video crudo (.mov)
+            if not os.path.exists(sign_folder):
                 os.makedirs(sign_folder)
                 print(f"📁 Creando carpeta para '{sign_name}'")
 
@@ -164,6 +203,8 @@ def record_sign():
 
             # --- INICIALIZAR GRABADOR DE VIDEO (Si se activó) ---
             out_video = None
+            clean_video = None
+            video_manifest = None
             if record_video_mode:
                 video_filename = os.path.join(sign_folder, f"{sign_name}_raw_video.mov")
                 fourcc = cv2.VideoWriter_fourcc(*'mp4v') # Codec .mov
@@ -171,128 +212,198 @@ def record_sign():
                 resolution = (1280, 720) # Debe coincidir con cap.set
                 out_video = cv2.VideoWriter(video_filename, fourcc, fps, resolution)
                 print(f"🎥 Grabando video en: {video_filename}")
+                if SAVE_CLEAN_VIDEO:
+                    clean_filename = os.path.join(sign_folder, f"{sign_name}{CLEAN_VIDEO_SUFFIX}")
+                    clean_video = cv2.VideoWriter(clean_filename, fourcc, fps, resolution)
+                    # Se reescribe junto con el video (VideoWriter no agrega a un archivo existente)
+                    video_manifest = open(video_manifest_path(clean_filename), 'w')
+
+            # En modo pipeline el dibujo + VideoWriter.write corren en su propio hilo
+            video_encoder = None
+            if out_video and PIPELINED_CAPTURE:
+                video_encoder = capture_pipeline.VideoEncoder(out_video, telemetry=timing, clean_writer=clean_video)
 
-            # --- INICIA GRABACIÓN DE LA PALABRA ---
-            # Solo grabar las secuencias que faltan, empezando desde existing_sequences
-            for sequence in range(existing_sequences, target_sequences):
-                # 3. Lógica de Espera UI
-                # CONTEO REGRESIVO (1) - MÁS RÁPIDO
-                collected_keypoints = [] # Initialize list for this sequence
+            try:
+                # --- INICIA GRABACIÓN DE LA PALABRA ---
+                # Solo grabar las secuencias que faltan, empezando desde existing_sequences
+                for sequence in range(existing_sequences, target_sequences):
+                    # 3. Lógica de Espera UI
+                    # CONTEO REGRESIVO (1) - MÁS RÁPIDO
+                    # Buffer preasignado (float32, ya con padding de ceros) para esta secuencia
+                    sequence_buffer = np.zeros((SEQUENCE_LENGTH, kp.NUM_FEATURES), dtype=np.float32)
+                    sequence_timestamps = np.full(SEQUENCE_LENGTH, np.nan, dtype=np.float32)
+                    frames_captured = 0
                 
-                for countdown in range(1, 0, -1):
-                    start_time = time.time()
-                    while time.time() - start_time < 1.0:
-                        ret_count, frame_count = cap.read()
-                        if not ret_count: break
-                        frame_count = cv2.flip(frame_count, 1)
+                    for countdown in range(1, 0, -1):
+                        start_time = time.time()
+                        while time.time() - start_time < 1.0:
+                            ret_count, frame_count = cap.read()
+                            if not ret_count: break
+                            frame_count = cv2.flip(frame_count, 1)
                         
-                        # Texto Gigante
-                        text = str(countdown)
-                        font_scale = 10.0
-                        thickness = 20
-                        font = cv2.FONT_HERSHEY_SIMPLEX
-                        text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
-                        text_x = (frame_count.shape[1] - text_size[0]) // 2
-                        text_y = (frame_count.shape[0] + text_size[1]) // 2
+                            # Texto Gigante
+                            text = str(countdown)
+                            font_scale = 10.0
+                            thickness = 20
+                            font = cv2.FONT_HERSHEY_SIMPLEX
+                            text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+                            text_x = (frame_count.shape[1] - text_size[0]) // 2
+                            text_y = (frame_count.shape[0] + text_size[1]) // 2
                         
-                        cv2.putText(frame_count, text, (text_x, text_y), 
-                                   font, font_scale, (0, 255, 255), thickness, cv2.LINE_AA)
-                        cv2.putText(frame_count, f"GRABANDO: {sign_name.replace('_', ' ').upper()}", (50, 100), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 2, (255,255,255), 3)
+                            cv2.putText(frame_count, text, (text_x, text_y), 
+                                       font, font_scale, (0, 255, 255), thickness, cv2.LINE_AA)
+                            cv2.putText(frame_count, f"GRABANDO: {sign_name.replace('_', ' ').upper()}", (50, 100), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 2, (255,255,255), 3)
                                    
-                        cv2.putText(frame_count, f'Video {sequence + 1}/{target_sequences}', (15,50), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
+                            cv2.putText(frame_count, f'Video {sequence + 1}/{target_sequences}', (15,50), 
+                                       cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
                         
 
-                        cv2.imshow('Recolector LSC', frame_count)
-                        if cv2.waitKey(10) == 27: # ESC
-                            print("Saliendo durante conteo...")
-                            if out_video: out_video.release()
+                            cv2.imshow('Recolector LSC', frame_count)
+                            if cv2.waitKey(10) == 27: # ESC
+                                print("Saliendo durante conteo...")
+                                cap.release()
+                                cv2.destroyAllWindows()
+                                return
+                            
+                    print(f"🎬 Grabando secuencia {sequence + 1}/{target_sequences} para '{sign_name}'...")
+                    timing.begin_sequence(sign_name, sequence)
+                    sound_start = timing.clock()
+                    play_start_sound() # Sonido de inicio
+                    timing.record('sonido', sound_start)
+                    dropped_frames = 0
+                    sequence_elapsed = 0.0
+                    video_frames = 0
+
+                    # GRABANDO FRAMES REALES
+                    if PIPELINED_CAPTURE:
+                        def render(frame, results):
+                            start = timing.clock()
+                            # Copia solo si el mismo frame va también al video (el encoder dibuja su propia versión)
+                            image = frame.copy() if video_encoder else frame
+                            draw_recording_overlay(image, results, sign_name, sequence, target_sequences, record_video_mode)
+                            timing.draw_hud(image)
+                            start = timing.record('dibujo', start)
+                            cv2.imshow('Recolector LSC', image)
+                            start = timing.record('imshow', start)
+                            key = cv2.waitKey(1) & 0xFF
+                            timing.record('waitkey', start)
+                            return key != 27 # ESC (ASCII 27)
+
+                        annotate = lambda image, results, seq=sequence: draw_recording_overlay(
+                            image, results, sign_name, seq, target_sequences, record_video_mode)
+
+                        captured = capture_pipeline.capture_sequence(cap, holistic, SEQUENCE_DURATION, SEQUENCE_LENGTH,
+                                                                     render=render, encoder=video_encoder, telemetry=timing,
+                                                                     annotate=annotate)
+                        if captured['aborted']:
+                            print("Interrupción detectada (ESC). Borrando secuencia corrupta...")
                             cap.release()
                             cv2.destroyAllWindows()
                             return
-                            
-                print(f"🎬 Grabando secuencia {sequence + 1}/{target_sequences} para '{sign_name}'...")
-                os.system("afplay /System/Library/Sounds/Ping.aiff &") # Sonido de inicio
-
-                # GRABANDO FRAMES REALES
-                for frame_num in range(SEQUENCE_LENGTH):
-                    ret, frame = cap.read()
-                    if not ret: 
-                        print(f"Error frame: No se pudo leer cámara.")
-                        break
-                    
-                    frame = cv2.flip(frame, 1)
-                    # 1. Detección
-                    image, results = mediapipe_detection(frame, holistic)
+                        if captured['error']:
+                            print(f"Error frame: {captured['error']}")
 
-                    # 2. Dibujar (Visual)
-                    draw_styled_landmarks(image, results)
+                        sequence_buffer = captured['keypoints']
+                        sequence_timestamps = captured['timestamps']
+                        frames_captured = captured['frames']
+                        video_frames = captured['encoded']
+                        dropped_frames = captured['dropped']
+                        sequence_elapsed = captured['elapsed']
+                        print(f"   ⏱️  {captured['grabbed']} frames leídos, {captured['frames']} detectados "
+                              f"({captured['frames'] / max(sequence_elapsed, 1e-6):.1f} FPS efectivos), {captured['dropped']} descartados")
+                    else:
+                        for frame_num in range(SEQUENCE_LENGTH):
+                            stage_start = timing.clock()
+                            ret, frame = cap.read()
+                            frame_time = time.perf_counter()
+                            timing.record('camara', stage_start)
+                            if not ret: 
+                                print(f"Error frame: No se pudo leer cámara.")
+                                break
+                            timing.frame(frame_time)
                     
-                    rec_indicator = "::: GRABANDO VIDEO :::" if record_video_mode else "::: GRABANDO :::"
-                    rec_color = (0, 0, 255) if record_video_mode else (0, 255, 0)
+                            frame = cv2.flip(frame, 1)
+                            # 1. Detección
+                            stage_start = timing.clock()
+                            image, results = mediapipe_detection(frame, holistic)
+                            stage_start = timing.record('holistic', stage_start)
 
-                    cv2.putText(image, rec_indicator, (120,200), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 1, rec_color, 4, cv2.LINE_AA)
-                    cv2.putText(image, f'Palabra: {sign_name} - {sequence + 1}/{target_sequences}', (15,30), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2, cv2.LINE_AA)
+                            # 2. Dibujar (Visual)
+                            draw_recording_overlay(image, results, sign_name, sequence, target_sequences, record_video_mode)
+                            stage_start = timing.record('dibujo', stage_start)
                     
-                    # ⚠️ GUARDAR VIDEO ANOTADO (Después de dibujar)
-                    if out_video:
-                        out_video.write(image)
+                            # ⚠️ GUARDAR VIDEO ANOTADO (Después de dibujar, sin el HUD)
+                            if out_video:
+                                if clean_video: clean_video.write(frame)
+                                out_video.write(image)
+                                video_frames += 1
+                                stage_start = timing.record('video_write', stage_start)
 
-                    cv2.imshow('Recolector LSC', image)
+                            timing.draw_hud(image)
+                            cv2.imshow('Recolector LSC', image)
+                            stage_start = timing.record('imshow', stage_start)
                     
-                    # 4. Exportar Keypoints
-                    keypoints = extract_keypoints(results)
-                    collected_keypoints.append(keypoints) # Collect keypoints for the sequence
+                            # 4. Exportar Keypoints (directo a la fila del buffer, sin listas intermedias)
+                            kp.extract_keypoints_into(results, sequence_buffer[frame_num])
+                            if frames_captured == 0: sequence_start = frame_time
+                            sequence_timestamps[frame_num] = frame_time - sequence_start
+                            frames_captured += 1
+                            sequence_elapsed = time.perf_counter() - sequence_start
+                            stage_start = timing.record('keypoints', stage_start)
                     
-                    if cv2.waitKey(1) & 0xFF == 27: # ESC (ASCII 27)
-                         print("Interrupción detectada (ESC). Borrando secuencia corrupta...")
-                         # No need to remove folder here, as it's handled after the loop
-                         if out_video: out_video.release()
-                         cap.release()
-                         cv2.destroyAllWindows()
-                         return
+                            key = cv2.waitKey(1) & 0xFF
+                            timing.record('waitkey', stage_start)
+                            if key == 27: # ESC (ASCII 27)
+                                 print("Interrupción detectada (ESC). Borrando secuencia corrupta...")
+                                 # No need to remove folder here, as it's handled after the loop
+                                 cap.release()
+                                 cv2.destroyAllWindows()
+                                 return
                 
-                # After collecting all frames for a sequence
-                # After collecting all frames for a sequence
-                seq_path = os.path.join(sign_folder, str(sequence))
+                    # After collecting all frames for a sequence
+                    # After collecting all frames for a sequence
+                    timing.end_sequence(frames_captured, sequence_elapsed, dropped_frames, saved=frames_captured >= MIN_LENGTH)
+                    if video_manifest:
+                        append_video_manifest(video_manifest, sequence, video_frames, frames_captured >= MIN_LENGTH)
+                    seq_path = os.path.join(sign_folder, str(sequence))
                 
-                # GUARDAR SECUENCIA (Rellenar con ceros si es corta)
-                if len(collected_keypoints) >= MIN_LENGTH: # Use collected_keypoints length
-                     res_array = np.array(collected_keypoints) # Shape: (frames_reales, 126)
-                     
-                     # PADDING: Rellenar hasta llegar a 60
-                     if len(collected_keypoints) < SEQUENCE_LENGTH:
-                         padding_needed = SEQUENCE_LENGTH - len(collected_keypoints)
-                         # Rellenamos con ceros al final
-                         # Shape del padding: (padding_needed, 126)
-                         padding = np.zeros((padding_needed, res_array.shape[1])) # Use actual keypoint dimension
-                         res_array = np.vstack((res_array, padding))
+                    # GUARDAR SECUENCIA (Rellenar con ceros si es corta)
+                    if frames_captured >= MIN_LENGTH:
+                         # Las filas no capturadas ya son ceros (padding hasta SEQUENCE_LENGTH)
+                         res_array = sequence_buffer
                      
-                     # Recortar si se pasó (por seguridad, aunque el break lo evita)
-                     res_array = res_array[:SEQUENCE_LENGTH]
-                     
-                     # Create folder if it doesn't exist
-                     if not os.path.exists(seq_path): os.makedirs(seq_path)
-                     
-                     npy_full_path = os.path.join(seq_path, "keypoints.npy") # Save as a single file for the sequence
-                     np.save(npy_full_path, res_array)
-                     print(f"🎬 Grabando secuencia {sequence + 1}/{target_sequences} para '{sign_name}'...")
-                else:
-                    print(f"⚠️ Seña muy corta ({len(collected_keypoints)} frames). Ignorada para '{sign_name}' secuencia {sequence + 1}.")
-                    # If the sequence is too short and ignored, remove its folder if it was created
-                    if os.path.exists(seq_path):
-                        shutil.rmtree(seq_path, ignore_errors=True)
-    
-    if out_video: 
-         out_video.release()
-         print("🎥 Video guardado correctamente.")
+                         if USE_PACKED_STORE:
+                             # Append directo al bloque contiguo (sin carpeta por secuencia)
+                             dataset_store.append_sequence(PACKED_PATH, sign_name, res_array,
+                                                           sequence=sequence, source='record_sign',
+                                                           timestamps=sequence_timestamps)
+                         else:
+                             # Create folder if it doesn't exist
+                             if not os.path.exists(seq_path): os.makedirs(seq_path)
+                         
+                             npy_full_path = os.path.join(seq_path, "keypoints.npy") # Save as a single file for the sequence
+                             np.save(npy_full_path, res_array)
+                             np.save(os.path.join(seq_path, "timestamps.npy"), sequence_timestamps)
+                         print(f"🎬 Grabando secuencia {sequence + 1}/{target_sequences} para '{sign_name}'...")
+                    else:
+                        print(f"⚠️ Seña muy corta ({frames_captured} frames). Ignorada para '{sign_name}' secuencia {sequence + 1}.")
+                        # If the sequence is too short and ignored, remove its folder if it was created
+                        if os.path.exists(seq_path):
+                            shutil.rmtree(seq_path, ignore_errors=True)
+            finally:
+                # También al salir con ESC: el manifiesto .jsonl es la entrada de extract_landmarks.py
+                close_video_outputs(video_encoder, out_video, clean_video, video_manifest)
 
     cap.release()
     cv2.destroyAllWindows()
     print("¡Sesión completa! Todas las palabras grabadas.")
 
 if __name__ == "__main__":
-    record_sign()
+    timing = telemetry.Telemetry() if TELEMETRY else telemetry.NULL_TELEMETRY
+    try:
+        record_sign(timing)
+    finally:
+        # También al salir con ESC: las secuencias ya grabadas quedan en el reporte
+        report_path = timing.write_report(PACKED_PATH if USE_PACKED_STORE else DATA_PATH)
+        if report_path: print(f"⏱️  Reporte de tiempos de la sesión: {report_path}")
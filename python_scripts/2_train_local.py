@@ -1,62 +1,83 @@
+import json
 import numpy as np
 import os
+import shutil
+import time
 from sklearn.model_selection import train_test_split
-from tensorflow.keras.utils import to_categorical
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense
 import tensorflow as tf
+import compact_store
+import dataset_store
+import features
+import input_pipeline
+import quality_index
 
 # ==========================================
 # CONFIGURACIÓN
 # ==========================================# Configuración
 DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dataset') 
+PACKED_PATH = dataset_store.PACKED_PATH # Si existe, se usa en lugar de DATA_PATH
+COMPACT_PATH = compact_store.COMPACT_PATH # Si existe y está al día, se usa en lugar de PACKED_PATH
 SEQUENCE_LENGTH = 32 # Ajustado a 32 frames (aprox 1.05 seg a 30 FPS)
 EPOCHS = 120         
 BATCH_SIZE = 32
+TEST_SIZE = 0.05     # Split de prueba (evaluate_model.py usa el mismo)
+SPLIT_SEED = 42
+SPLIT_PATH = 'lsc_model_split.json'  # IDs del split de prueba de este modelo (evaluate_model.py lo reutiliza)
+VAL_SIZE = 0.1       # Fracción del split de entrenamiento reservada para EarlyStopping
+AUGMENT = True       # Aumentación on-the-fly (espejo, escala, traslación, time warp, frame dropout)
+CACHE_PATH = None    # None = sin caché (memmap), '' = caché en memoria, o ruta de archivo
+# Normalización de landmarks (features.py), p. ej. features.DEFAULT_SPEC. None = coordenadas crudas.
+# Con spec, la app lee assets/feature_spec.json y aplica el mismo transform; la aumentación
+# se desactiva (la normalización ya quita escala y traslación).
+FEATURE_SPEC = None
+BUILTINS_ONLY = True # Exportar sin SELECT_TF_OPS: Android no necesita FlexDelegate
+PARITY_SAMPLES = 64  # Secuencias del split de prueba para verificar TFLite vs Keras
+PARITY_TOLERANCE = 0.05  # Diferencia máxima de probabilidad (el modelo lleva cuantización dinámica)
+PARITY_MIN_AGREEMENT = 0.98  # Fracción mínima de top-1 idéntico
 
-def train_local():
-    # 1. Cargar Datos
-    actions = np.array(sorted([folder for folder in os.listdir(DATA_PATH) if os.path.isdir(os.path.join(DATA_PATH, folder))]))
-    print(f"Señas encontradas: {actions}")
-    
-    label_map = {label:num for num, label in enumerate(actions)}
-    
-    sequences, labels = [], []
-    
-    for action in actions:
-        action_path = os.path.join(DATA_PATH, action)
-        # Listamos carpetas que sean números
-        video_dirs = [d for d in os.listdir(action_path) if d.isdigit()]
-        
-        # Cargar TODAS las secuencias disponibles
-        for sequence in video_dirs:
-            try:
-                # El archivo ya contiene la secuencia completa con padding
-                keypoints_file = os.path.join(action_path, str(sequence), "keypoints.npy")
-                window = np.load(keypoints_file)  # Shape: (35, 126)
-                sequences.append(window)
-                labels.append(label_map[action])
-            except Exception as e:
-                print(f"Error cargando secuencia {sequence} de {action}: {e}")
-
-    X = np.array(sequences)
-    
-    # --- CRITICAL FIX FOR ANDROID ---
-    # The Android App uses HandLandmarker (No Pose).
-    # The Dataset (Holistic) has 258 features: [Pose(132) + LH(63) + RH(63)].
-    # We must slice X to keep only the last 126 features (LH + RH) to match Android.
-    print(f"Original Shape: {X.shape}")
-    X = X[:, :, 132:] # Slice: Skip first 132 (Pose)
-    print(f"New Shape (Hands Only): {X.shape}") # Should be (N, 30, 126)
-    
-    y = to_categorical(labels, num_classes=actions.shape[0]).astype(int)
+# Cuantización post-entrenamiento: genera todas las variantes, mide tamaño / precisión /
+# latencia y envía a assets la más rápida dentro del presupuesto de precisión
+QUANTIZE = False
+QUANTIZATION_VARIANTS = ('float32', 'float16', 'dynamic', 'int8')
+REPRESENTATIVE_SAMPLES = 200  # Secuencias del split de entrenamiento para calibrar int8
+ACCURACY_BUDGET = 0.01        # Pérdida máxima de top-1 respecto a float32
+LATENCY_WARMUP = 10           # Inferencias descartadas antes de medir
+QUANT_OUTPUT_DIR = 'tflite_variants'
+INT8_PARITY_TOLERANCE = 0.15  # int8 también cuantiza activaciones: probabilidades menos exactas
 
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.05)
+# Destilación: tras entrenar el modelo actual (profesor) se entrena un alumno pequeño con sus
+# probabilidades suavizadas. Se exportan ambos con un reporte de tamaño / precisión / latencia,
+# y el alumno va a assets como lsc_model_lite.tflite (la app lo usa en dispositivos de poca RAM).
+# Con QUANTIZE el profesor se compara tal como se envía y el alumno pasa por la misma cuantización
+DISTILL = False
+STUDENT_ARCH = 'gru'          # 'gru' (una capa GRU) o 'tcn' (convoluciones temporales separables)
+DISTILL_TEMPERATURE = 4.0
+DISTILL_ALPHA = 0.7           # Peso de la pérdida contra el profesor (el resto, contra las etiquetas)
+STUDENT_EPOCHS = 300
+STUDENT_PATIENCE = 20
+DISTILL_OUTPUT_DIR = 'tflite_tiers'
 
-    # 2. Crear Modelo
+# Filtro de calidad (quality_index.py): descarta del split de entrenamiento las secuencias con
+# pocas manos, muy cortas, sin movimiento o duplicadas. None = sin filtro.
+QUALITY_FILTER = None   # p. ej. quality_index.DEFAULT_THRESHOLDS
+
+# Entrenamiento incremental: parte del modelo anterior (KERAS_MODEL_PATH + labels.txt de assets),
+# agrega salidas para las señas nuevas sin mover los índices existentes y hace fine-tuning con
+# los datos de las señas nuevas + REPLAY_PER_CLASS secuencias de cada seña anterior. El split de
+# prueba del modelo anterior (SPLIT_PATH) se conserva; solo las secuencias nuevas se reparten
+WARM_START = False
+KERAS_MODEL_PATH = 'lsc_model.keras'  # Se guarda en cada entrenamiento para el siguiente warm start
+PREVIOUS_LABELS_PATH = os.path.join('Se-alyze-Android', 'app', 'src', 'main', 'assets', 'labels.txt')
+REPLAY_PER_CLASS = 10
+WARM_START_LR = 1e-4
+WARM_START_EPOCHS = 60
+
+def build_model(num_classes, num_features=126):
     model = Sequential()
     # Capas LSTM con Dropout
-    model.add(LSTM(64, return_sequences=True, activation='tanh', recurrent_activation='sigmoid', input_shape=(SEQUENCE_LENGTH, 126))) # 126 = Keypoints LH+RH
+    model.add(LSTM(64, return_sequences=True, activation='tanh', recurrent_activation='sigmoid', input_shape=(SEQUENCE_LENGTH, num_features))) # 126 = Keypoints LH+RH (o features normalizadas)
     model.add(tf.keras.layers.Dropout(0.3))
     model.add(LSTM(128, return_sequences=True, activation='tanh', recurrent_activation='sigmoid'))
     model.add(tf.keras.layers.Dropout(0.3))
@@ -67,17 +88,413 @@ def train_local():
     model.add(tf.keras.layers.Dropout(0.4))
     model.add(Dense(32, activation='relu'))
     model.add(tf.keras.layers.Dropout(0.4))
-    model.add(Dense(actions.shape[0], activation='softmax')) # Salida = número de señas
+    model.add(Dense(num_classes, activation='softmax')) # Salida = número de señas
 
     model.compile(optimizer='Adam', loss='categorical_crossentropy', metrics=['categorical_accuracy'])
+    return model
+
+def build_student(num_classes, num_features=126, arch=STUDENT_ARCH):
+    inputs = tf.keras.layers.Input(shape=(SEQUENCE_LENGTH, num_features))
+    if arch == 'gru':
+        x = tf.keras.layers.GRU(48, reset_after=False)(inputs)
+    elif arch == 'tcn':
+        # Convoluciones depthwise + pointwise con dilatación creciente: campo receptivo de ~30 frames
+        x = tf.keras.layers.Conv1D(48, 1, activation='relu')(inputs)
+        for dilation in (1, 2, 4, 8):
+            x = tf.keras.layers.SeparableConv1D(48, 3, padding='same', dilation_rate=dilation, activation='relu')(x)
+        x = tf.keras.layers.GlobalAveragePooling1D()(x)
+    else:
+        raise ValueError(f"Arquitectura de alumno desconocida: {arch}")
+    x = tf.keras.layers.Dropout(0.2)(x)
+    outputs = tf.keras.layers.Dense(num_classes, activation='softmax')(x)
+    return tf.keras.Model(inputs, outputs)
+
+def _soften(probabilities, temperature):
+    # log(p) son los logits salvo una constante por fila: softmax(log(p) / T)
+    return tf.nn.softmax(tf.math.log(probabilities + 1e-8) / temperature)
+
+def distill_student(teacher, student, train_ds, val_ds):
+    optimizer = tf.keras.optimizers.Adam()
+    temperature = DISTILL_TEMPERATURE
+
+    @tf.function
+    def train_step(x, y):
+        soft_targets = _soften(teacher(x, training=False), temperature)
+        with tf.GradientTape() as tape:
+            probabilities = student(x, training=True)
+            # Escala T^2 para que los gradientes de la parte suave no se achiquen con T
+            soft_loss = tf.reduce_mean(tf.keras.losses.kl_divergence(soft_targets, _soften(probabilities, temperature)))
+            hard_loss = tf.reduce_mean(tf.keras.losses.categorical_crossentropy(y, probabilities))
+            loss = DISTILL_ALPHA * soft_loss * temperature ** 2 + (1 - DISTILL_ALPHA) * hard_loss
+        gradients = tape.gradient(loss, student.trainable_variables)
+        optimizer.apply_gradients(zip(gradients, student.trainable_variables))
+        return loss
+
+    def accuracy(ds):
+        hits = total = 0
+        for x, y in ds:
+            hits += int(tf.reduce_sum(tf.cast(tf.argmax(student(x, training=False), 1) == tf.argmax(y, 1), tf.int32)))
+            total += int(tf.shape(y)[0])
+        return hits / max(total, 1)
+
+    best, best_weights, waited = -1.0, student.get_weights(), 0
+    for epoch in range(STUDENT_EPOCHS):
+        losses = [float(train_step(x, y)) for x, y in train_ds]
+        val_accuracy = accuracy(val_ds)
+        print(f"Alumno época {epoch + 1}: pérdida {np.mean(losses):.4f}, precisión validación {val_accuracy:.1%}")
+        if val_accuracy > best:
+            best, best_weights, waited = val_accuracy, student.get_weights(), 0
+        else:
+            waited += 1
+            if waited >= STUDENT_PATIENCE: break
+    student.set_weights(best_weights)
+    return student
+
+def distillation_stage(teacher, teacher_tflite, source, train_ds, val_ds, train_idx, test_idx, num_features):
+    """Alumno TFLite para lsc_model_lite.tflite; teacher_tflite es el modelo principal tal como se envía."""
+    student = build_student(len(source.actions), num_features)
+    print(f"Destilando alumno '{STUDENT_ARCH}' ({student.count_params()} parámetros, "
+          f"profesor {teacher.count_params()})...")
+    # EarlyStopping sobre validación: el split de prueba queda solo para el reporte
+    distill_student(teacher, student, train_ds, val_ds)
+
+    x_test, y_test = source.read(test_idx), source.labels[test_idx]
+    if QUANTIZE:
+        student_tflite = quantization_stage(student, source, train_idx, test_idx,
+                                            output_dir=os.path.join(QUANT_OUTPUT_DIR, 'student'))
+    else:
+        student_tflite = convert_builtins_only(student, num_features=num_features)
+        verify_builtins_model(student, student_tflite, x_test[:PARITY_SAMPLES])
+
+    os.makedirs(DISTILL_OUTPUT_DIR, exist_ok=True)
+    report = {}
+    for name, model, tflite_model in (('teacher', teacher, teacher_tflite), ('student', student, student_tflite)):
+        with open(os.path.join(DISTILL_OUTPUT_DIR, f'lsc_model_{name}.tflite'), 'wb') as f:
+            f.write(tflite_model)
+        report[name] = {'params': int(model.count_params()), 'size_bytes': len(tflite_model),
+                        **evaluate_tflite(tflite_model, x_test, y_test, num_threads=1)}
+    report['student']['arch'] = STUDENT_ARCH
+    report['quantized'] = QUANTIZE
+
+    print(f"\n{'Modelo':<8} {'Params':>9} {'Tamaño':>10} {'Top-1':>8} {'Media':>9} {'p95':>9}")
+    for name in ('teacher', 'student'):
+        r = report[name]
+        print(f"{name:<8} {r['params']:>9} {r['size_bytes'] / 1024:>8.1f}KB {r['accuracy']:>8.1%} "
+              f"{r['latency_mean_ms']:>7.3f}ms {r['latency_p95_ms']:>7.3f}ms")
+    with open(os.path.join(DISTILL_OUTPUT_DIR, 'distillation_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Reporte de destilación en: {DISTILL_OUTPUT_DIR}/distillation_report.json")
+    return student_tflite
+
+def load_previous_model(num_features):
+    """(modelo Keras, etiquetas en su orden de salida) del entrenamiento anterior, o (None, None)."""
+    if not os.path.exists(KERAS_MODEL_PATH) or not os.path.exists(PREVIOUS_LABELS_PATH):
+        print(f"⚠️ Sin modelo anterior ({KERAS_MODEL_PATH} / {PREVIOUS_LABELS_PATH}): entrenamiento completo")
+        return None, None
+    previous = tf.keras.models.load_model(KERAS_MODEL_PATH)
+    with open(PREVIOUS_LABELS_PATH, 'r') as f:
+        labels = [line.strip() for line in f if line.strip()]
+    if previous.output_shape[-1] != len(labels):
+        raise ValueError(f"{KERAS_MODEL_PATH} tiene {previous.output_shape[-1]} salidas y labels.txt {len(labels)} señas")
+    if previous.input_shape[-1] != num_features:
+        print(f"⚠️ El modelo anterior espera {previous.input_shape[-1]} features (ahora {num_features}): entrenamiento completo")
+        return None, None
+    return previous, labels
+
+def warm_start_model(previous, num_classes, num_features):
+    """Misma arquitectura con la capa de salida extendida; las clases existentes conservan su fila."""
+    model = build_model(num_classes, num_features)
+    if len(model.layers) != len(previous.layers):
+        raise ValueError("La arquitectura de build_model cambió desde el modelo anterior")
+    for layer, old_layer in zip(model.layers[:-1], previous.layers[:-1]):
+        layer.set_weights(old_layer.get_weights())
+    kernel, bias = model.layers[-1].get_weights()
+    old_kernel, old_bias = previous.layers[-1].get_weights()
+    old_classes = old_kernel.shape[1]
+    kernel[:, :old_classes] = old_kernel
+    bias[:old_classes] = old_bias
+    bias[old_classes:] = old_bias.mean()  # Las clases nuevas arrancan con un prior comparable
+    model.layers[-1].set_weights([kernel, bias])
+    model.compile(optimizer=tf.keras.optimizers.Adam(WARM_START_LR), loss='categorical_crossentropy',
+                  metrics=['categorical_accuracy'])
+    return model
+
+def replay_indices(labels, train_idx, old_classes, seed=SPLIT_SEED):
+    """Todas las secuencias de señas nuevas + una muestra acotada de cada seña anterior."""
+    rng = np.random.default_rng(seed)
+    train_labels = labels[train_idx]
+    selected = [train_idx[train_labels >= old_classes]]
+    for c in range(old_classes):
+        candidates = train_idx[train_labels == c]
+        selected.append(rng.choice(candidates, size=min(REPLAY_PER_CLASS, len(candidates)), replace=False))
+    return np.concatenate(selected)
+
+def save_split(source, train_idx, test_idx, path=SPLIT_PATH):
+    """Guarda los IDs de cada split junto al modelo (no los índices: cambian si el store se regenera)."""
+    split = {'fingerprint': source.fingerprint, 'train': source.ids[train_idx].tolist(),
+             'test': source.ids[test_idx].tolist()}
+    with open(path, 'w') as f:
+        json.dump(split, f, ensure_ascii=False)
+    print(f"Split guardado en: {path} ({len(test_idx)} secuencias de prueba)")
+
+def load_split(source, path=SPLIT_PATH):
+    """
+    (train_idx, test_idx, new_idx) del split guardado; new_idx son las secuencias que no estaban.
+    Falla si algún ID guardado ya no existe: con el store regenerado o filas renombradas, las
+    secuencias de prueba volverían como "nuevas" y podrían caer en entrenamiento.
+    """
+    with open(path, 'r') as f:
+        split = json.load(f)
+    if split.get('fingerprint') != source.fingerprint:
+        print(f"El dataset cambió desde {path}: el split se resuelve por ID de secuencia")
+    position = {sequence_id: i for i, sequence_id in enumerate(source.ids)}
+    missing = sum(sequence_id not in position for sequence_id in split['train'] + split['test'])
+    if missing:
+        raise RuntimeError(f"{missing} secuencias de {path} no están en el dataset (store regenerado, secuencias "
+                           f"borradas u otro layout): no se puede reutilizar el split sin riesgo de fuga. "
+                           f"Borra {path} para empezar un split nuevo.")
+    train_idx = np.array([position[i] for i in split['train']], dtype=np.int64)
+    test_idx = np.array([position[i] for i in split['test']], dtype=np.int64)
+    seen = np.zeros(len(source), dtype=bool)
+    seen[train_idx] = seen[test_idx] = True
+    return train_idx, test_idx, np.flatnonzero(~seen)
+
+def export_saved_model(model, saved_model_dir):
+    # Convertir a TFLite usando SavedModel (compatible con Keras 3.x)
+    model.export(saved_model_dir)
+
+def convert_saved_model(saved_model_dir):
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    # Optimizaciones para móvil
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_ops = [
+        tf.lite.OpsSet.TFLITE_BUILTINS, # Enable TensorFlow Lite ops.
+        tf.lite.OpsSet.SELECT_TF_OPS # Enable TensorFlow ops.
+    ]
+    return converter.convert()
+
+def convert_to_tflite(model, temp_saved_model_dir='temp_saved_model'):
+    export_saved_model(model, temp_saved_model_dir)
+    try:
+        return convert_saved_model(temp_saved_model_dir)
+    finally:
+        # Limpiar directorio temporal
+        if os.path.exists(temp_saved_model_dir):
+            shutil.rmtree(temp_saved_model_dir)
+
+def _builtins_converter(model, sequence_length=SEQUENCE_LENGTH, num_features=126, batch_size=1):
+    # Batch fijo de 1 y longitud fija: el LSTM de Keras se convierte al op fusionado
+    # UNIDIRECTIONAL_SEQUENCE_LSTM en lugar de un bucle while con TensorList (Flex).
+    # batch_size=None deja el batch dinámico (solo para benchmarks de evaluate_model.py)
+    run_model = tf.function(lambda x: model(x, training=False))
+    concrete_func = run_model.get_concrete_function(
+        tf.TensorSpec([batch_size, sequence_length, num_features], tf.float32))
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete_func], model)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    return converter
+
+def convert_builtins_only(model, sequence_length=SEQUENCE_LENGTH, num_features=126, batch_size=1):
+    converter = _builtins_converter(model, sequence_length, num_features, batch_size)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    return converter.convert()
+
+def find_flex_ops(tflite_model):
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    op_names = {op['op_name'] for op in interpreter._get_ops_details()}
+    return sorted(name for name in op_names if name.startswith('Flex') or name == 'DELEGATE')
+
+def verify_builtins_model(model, tflite_model, x_check, tolerance=PARITY_TOLERANCE):
+    # 1. Sin ops Flex
+    flex_ops = find_flex_ops(tflite_model)
+    if flex_ops:
+        raise RuntimeError(f"El modelo exportado todavía usa ops Flex: {flex_ops}")
+
+    # 2. Paridad numérica con Keras sobre un batch del split de prueba
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    expected = model.predict(x_check, verbose=0)
+    got = np.empty_like(expected)
+    for i in range(len(x_check)):
+        interpreter.set_tensor(input_index, x_check[i:i + 1])
+        interpreter.invoke()
+        got[i] = interpreter.get_tensor(output_index)[0]
+
+    max_diff = float(np.max(np.abs(expected - got)))
+    agreement = float(np.mean(np.argmax(expected, axis=1) == np.argmax(got, axis=1)))
+    print(f"Paridad TFLite vs Keras: diferencia máx {max_diff:.4f}, top-1 idéntico {agreement:.1%} ({len(x_check)} secuencias)")
+    if max_diff > tolerance or agreement < PARITY_MIN_AGREEMENT:
+        raise RuntimeError("El modelo TFLite no coincide con el modelo Keras")
+
+def convert_variant(model, variant, representative_x=None):
+    converter = _builtins_converter(model, num_features=model.input_shape[-1])
+    if variant == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == 'int8':
+        # Activaciones y pesos en int8 (calibrado con secuencias reales); entrada/salida
+        # siguen en float32 para que TfliteDataSource no cambie
+        def representative_dataset():
+            for i in range(len(representative_x)):
+                yield [representative_x[i:i + 1]]
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif variant != 'float32':
+        raise ValueError(f"Variante de cuantización desconocida: {variant}")
+    return converter.convert()
+
+def evaluate_tflite(tflite_model, x, y, num_threads=None):
+    interpreter = tf.lite.Interpreter(model_content=tflite_model, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+
+    for i in range(min(LATENCY_WARMUP, len(x))):
+        interpreter.set_tensor(input_index, x[i:i + 1])
+        interpreter.invoke()
+
+    predictions = np.empty(len(x), dtype=np.int64)
+    latencies = np.empty(len(x))
+    for i in range(len(x)):
+        interpreter.set_tensor(input_index, x[i:i + 1])
+        start = time.perf_counter()
+        interpreter.invoke()
+        latencies[i] = time.perf_counter() - start
+        predictions[i] = np.argmax(interpreter.get_tensor(output_index)[0])
+
+    return {
+        'accuracy': float(np.mean(predictions == y)),
+        'latency_mean_ms': float(latencies.mean() * 1000),
+        'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+    }
+
+def quantization_stage(model, source, train_idx, test_idx, output_dir=QUANT_OUTPUT_DIR):
+    rng = np.random.default_rng(0)
+    representative_idx = rng.choice(train_idx, size=min(REPRESENTATIVE_SAMPLES, len(train_idx)), replace=False)
+    representative_x = source.read(representative_idx)
+    x_test, y_test = source.read(test_idx), source.labels[test_idx]
+
+    os.makedirs(output_dir, exist_ok=True)
+    report, models = {}, {}
+    for variant in QUANTIZATION_VARIANTS:
+        try:
+            tflite_model = convert_variant(model, variant, representative_x)
+        except Exception as e:
+            print(f"⚠️ Variante {variant} no se pudo convertir: {e}")
+            report[variant] = {'error': str(e)}
+            continue
+        flex_ops = find_flex_ops(tflite_model)
+        if flex_ops:
+            raise RuntimeError(f"La variante {variant} usa ops Flex: {flex_ops}")
+        with open(os.path.join(output_dir, f'lsc_model_{variant}.tflite'), 'wb') as f:
+            f.write(tflite_model)
+        models[variant] = tflite_model
+        report[variant] = {'size_bytes': len(tflite_model), **evaluate_tflite(tflite_model, x_test, y_test)}
+
+    print(f"\n{'Variante':<10} {'Tamaño':>10} {'Top-1':>8} {'Media':>9} {'p95':>9}")
+    for variant, r in report.items():
+        if 'error' in r: continue
+        print(f"{variant:<10} {r['size_bytes'] / 1024:>8.1f}KB {r['accuracy']:>8.1%} "
+              f"{r['latency_mean_ms']:>7.3f}ms {r['latency_p95_ms']:>7.3f}ms")
+
+    if not models:
+        raise RuntimeError("Ninguna variante de cuantización se pudo convertir")
+
+    # La más rápida que no pierda más de ACCURACY_BUDGET frente a float32
+    if 'float32' in models:
+        reference = report['float32']['accuracy']
+    else:
+        # Sin float32 la referencia es el modelo Keras, no 0.0 (dejaría pasar cualquier variante)
+        keras_predictions = np.argmax(model.predict(x_test, verbose=0), axis=1)
+        reference = float(np.mean(keras_predictions == y_test))
+        print(f"⚠️ Sin variante float32: presupuesto de precisión contra Keras ({reference:.1%})")
+    report['reference_accuracy'] = reference
+    candidates = [v for v in models if report[v]['accuracy'] >= reference - ACCURACY_BUDGET]
+    chosen = min(candidates, key=lambda v: report[v]['latency_mean_ms']) if candidates else None
+    report['selected'] = chosen
+    with open(os.path.join(output_dir, 'quantization_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    if chosen is None:
+        raise RuntimeError(f"Ninguna variante queda dentro de {ACCURACY_BUDGET:.1%} de la precisión de referencia "
+                           f"({reference:.1%}); revisa {os.path.join(output_dir, 'quantization_report.json')}")
+    # Misma verificación de paridad que la exportación por defecto, sobre la variante que se envía
+    verify_builtins_model(model, models[chosen], x_test[:PARITY_SAMPLES],
+                          tolerance=INT8_PARITY_TOLERANCE if chosen == 'int8' else PARITY_TOLERANCE)
+    print(f"Variante elegida para Android: {chosen} (reporte en {os.path.join(output_dir, 'quantization_report.json')})")
+    return models[chosen]
+
+def train_local():
+    # 1. Cargar Datos (lectura perezosa: ni se copia el corpus ni se abre un archivo por secuencia)
+    raw_source = source = input_pipeline.open_source(PACKED_PATH, DATA_PATH, COMPACT_PATH)
+    num_features = features.output_size(FEATURE_SPEC) if FEATURE_SPEC is not None else 126
+    previous, previous_labels = load_previous_model(num_features) if WARM_START else (None, None)
+    if previous is not None:
+        # Orden de salida: el del modelo anterior y las señas nuevas al final
+        new_signs = sorted(set(source.actions) - set(previous_labels))
+        print(f"Warm start desde {KERAS_MODEL_PATH}: {len(previous_labels)} señas previas, nuevas: {new_signs}")
+        raw_source = source = input_pipeline.relabel_source(source, previous_labels + new_signs)
+    if FEATURE_SPEC is not None:
+        source = input_pipeline.open_feature_source(raw_source, FEATURE_SPEC)
+    actions = source.actions
+    print(f"Señas encontradas: {actions}")
+
+    # --- CRITICAL FIX FOR ANDROID ---
+    # The Android App uses HandLandmarker (No Pose).
+    # The Dataset (Holistic) has 258 features: [Pose(132) + LH(63) + RH(63)].
+    # The input pipeline only reads the last 126 features (LH + RH) to match Android.
+    print(f"Dataset: {len(source)} secuencias de {source.sequence_length} frames, {raw_source.num_features} -> {num_features} features (Hands Only)")
+
+    if previous is not None and os.path.exists(SPLIT_PATH):
+        # El modelo anterior ya vio todo lo que no era prueba: un split nuevo metería esas
+        # secuencias en prueba. Se conserva el guardado y solo se reparten las secuencias nuevas
+        train_idx, test_idx, new_idx = load_split(source, SPLIT_PATH)
+        if len(new_idx) >= 2:
+            new_train, new_test = train_test_split(new_idx, test_size=TEST_SIZE, random_state=SPLIT_SEED)
+            train_idx, test_idx = np.concatenate([train_idx, new_train]), np.concatenate([test_idx, new_test])
+        else:
+            train_idx = np.concatenate([train_idx, new_idx])
+        print(f"Split de {SPLIT_PATH}: {len(new_idx)} secuencias nuevas repartidas, {len(test_idx)} de prueba")
+    else:
+        if previous is not None:
+            print(f"⚠️ Sin {SPLIT_PATH}: split nuevo, la prueba puede incluir secuencias que el modelo anterior vio")
+        train_idx, test_idx = train_test_split(np.arange(len(source)), test_size=TEST_SIZE, random_state=SPLIT_SEED)
+    split_train_idx = train_idx  # Lo que se guarda en SPLIT_PATH: entrenamiento + validación
+    # Validación separada del entrenamiento: EarlyStopping no puede mirar los batches aumentados
+    train_idx, val_idx = train_test_split(train_idx, test_size=VAL_SIZE, random_state=SPLIT_SEED)
+    if QUALITY_FILTER is not None:
+        # Solo el split de entrenamiento: la evaluación sigue viendo el mismo split de prueba
+        kept = quality_index.filter_indices(quality_index.load_or_build(raw_source), train_idx, QUALITY_FILTER)
+        print(f"Filtro de calidad: {len(train_idx) - len(kept)} de {len(train_idx)} secuencias de entrenamiento descartadas")
+        train_idx = kept
+    if previous is not None and len(actions) > len(previous_labels):
+        train_idx = replay_indices(source.labels, train_idx, len(previous_labels))
+        print(f"Fine-tuning con {len(train_idx)} secuencias (señas nuevas + replay de {REPLAY_PER_CLASS} por seña)")
+
+    train_ds = input_pipeline.make_dataset(source, train_idx, BATCH_SIZE, training=True,
+                                           augment=AUGMENT and FEATURE_SPEC is None, cache=CACHE_PATH)
+    val_ds = input_pipeline.make_dataset(source, val_idx, BATCH_SIZE, training=False)
+
+    # 2. Crear Modelo
+    if previous is not None:
+        model = warm_start_model(previous, actions.shape[0], num_features)
+        epochs = WARM_START_EPOCHS
+    else:
+        model = build_model(actions.shape[0], num_features)
+        epochs = 500
 
     # 3. Entrenar
     print("Iniciando entrenamiento local...")
     
     # CALLBACKS: EarlyStopping para evitar sobreentrenamiento y que el modelo "empeore"
-    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='categorical_accuracy', patience=20, restore_best_weights=True)
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_categorical_accuracy', patience=20, restore_best_weights=True)
     
-    model.fit(X_train, y_train, epochs=500, callbacks=[early_stopping])
+    model.fit(train_ds, validation_data=val_ds, epochs=epochs, callbacks=[early_stopping])
+    model.save(KERAS_MODEL_PATH)
+    save_split(source, split_train_idx, test_idx)
 
     # 4. Guardar
     # Ruta relativa desde la raíz del proyecto (donde se ejecuta el script)
@@ -94,23 +511,24 @@ def train_local():
          model.save('lsc_model_v1.h5')
     
     if os.path.exists(assets_path) or os.path.exists('lsc_model_v1.h5'):
-        # Convertir a TFLite usando SavedModel (compatible con Keras 3.x)
-        temp_saved_model_dir = 'temp_saved_model'
-        model.export(temp_saved_model_dir)
-        
-        converter = tf.lite.TFLiteConverter.from_saved_model(temp_saved_model_dir)
-        # Optimizaciones para móvil
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-        converter.target_spec.supported_ops = [
-            tf.lite.OpsSet.TFLITE_BUILTINS, # Enable TensorFlow Lite ops.
-            tf.lite.OpsSet.SELECT_TF_OPS # Enable TensorFlow ops.
-        ]
-        tflite_model = converter.convert()
-        
-        # Limpiar directorio temporal
-        import shutil
-        if os.path.exists(temp_saved_model_dir):
-            shutil.rmtree(temp_saved_model_dir)
+        if QUANTIZE:
+            tflite_model = quantization_stage(model, source, train_idx, test_idx)
+        elif BUILTINS_ONLY:
+            tflite_model = convert_builtins_only(model, num_features=num_features)
+            verify_builtins_model(model, tflite_model, source.read(test_idx[:PARITY_SAMPLES]))
+        else:
+            tflite_model = convert_to_tflite(model)
+
+        lite_path = os.path.join(assets_path, 'lsc_model_lite.tflite')
+        if DISTILL:
+            student_model = distillation_stage(model, tflite_model, source, train_ds, val_ds, train_idx, test_idx,
+                                               num_features)
+            with open(lite_path, 'wb') as f:
+                f.write(student_model)
+            print(f"Modelo ligero (alumno) guardado en: {lite_path}")
+        elif os.path.exists(lite_path):
+            # Un alumno de otro entrenamiento no coincidiría con las etiquetas nuevas
+            os.remove(lite_path)
         
         output_path = os.path.join(assets_path, 'lsc_model.tflite')
         with open(output_path, 'wb') as f:
@@ -125,5 +543,18 @@ def train_local():
                 f.write(label + '\n')
         print(f"Etiquetas guardadas en: {labels_path}")
 
+        # Spec de features para la app; sin spec la app usa las coordenadas crudas
+        spec_path = os.path.join(assets_path, 'feature_spec.json')
+        if FEATURE_SPEC is not None:
+            # transform vectorizado vs. el algoritmo frame a frame de FeatureTransform.kt
+            features.parity_check(FEATURE_SPEC, raw_source)
+            features.export_spec(FEATURE_SPEC, spec_path, raw_source)
+            if not features.check_fixture(spec_path):
+                raise RuntimeError("El fixture de feature_spec.json no coincide con features.transform o no cubre los casos")
+            print(f"Spec de features guardado en: {spec_path}")
+        elif os.path.exists(spec_path):
+            os.remove(spec_path)
+        print("Evalúa el modelo exportado con: python python_scripts/evaluate_model.py")
+
 if __name__ == "__main__":
     train_local()
@@ -0,0 +1,151 @@
+"""
+Microbenchmark: extract_keypoints (recording.py) vs. keypoints.py vectorizado.
+
+Trabaja sobre protos de landmarks grabados, no sobre la cámara:
+  --record VIDEO   pasa un video por Holistic y guarda los protos serializados en --protos
+  --protos FILE    usa protos grabados previamente (por defecto landmark_protos.pkl)
+Si no hay protos grabados, los reconstruye a partir del dataset empaquetado.
+
+Uso:
+    python python_scripts/bench_keypoints.py --record dataset/hola/hola_raw_video.mov
+    python python_scripts/bench_keypoints.py
+"""
+import argparse
+import os
+import pickle
+import timeit
+from types import SimpleNamespace
+
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+import dataset_store
+import keypoints as kp
+import recording
+
+
+PROTOS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'landmark_protos.pkl')
+ATTRS = ('pose_landmarks', 'left_hand_landmarks', 'right_hand_landmarks')
+
+
+# ==========================================
+# PROTOS DE ENTRADA
+# ==========================================
+def record_protos(video_path, protos_path=PROTOS_PATH):
+    import cv2
+    frames = []
+    cap = cv2.VideoCapture(video_path)
+    with recording.mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
+        while True:
+            ret, frame = cap.read()
+            if not ret: break
+            _, results = recording.mediapipe_detection(frame, holistic)
+            frames.append({attr: getattr(results, attr).SerializeToString() if getattr(results, attr) else None
+                           for attr in ATTRS})
+    cap.release()
+    with open(protos_path, 'wb') as f:
+        pickle.dump(frames, f)
+    print(f"🎥 {len(frames)} frames grabados en: {protos_path}")
+
+
+def load_protos(protos_path=PROTOS_PATH):
+    with open(protos_path, 'rb') as f:
+        frames = pickle.load(f)
+    results = []
+    for frame in frames:
+        parsed = {}
+        for attr in ATTRS:
+            parsed[attr] = landmark_pb2.NormalizedLandmarkList.FromString(frame[attr]) if frame[attr] else None
+        results.append(SimpleNamespace(**parsed))
+    return results
+
+
+def _to_proto(values, with_visibility):
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    width = 4 if with_visibility else 3
+    for row in values.reshape(-1, width):
+        landmark = landmark_list.landmark.add(x=row[0], y=row[1], z=row[2])
+        if with_visibility: landmark.visibility = row[3]
+    return landmark_list
+
+
+def protos_from_dataset(max_frames, store_path=dataset_store.PACKED_PATH):
+    if dataset_store.store_exists(store_path):
+        X, _, _ = dataset_store.open_store(store_path)
+        frames = np.asarray(X[:max(1, max_frames // X.shape[1] + 1)]).reshape(-1, X.shape[2])[:max_frames]
+    else:
+        print("⚠️ No hay protos ni dataset empaquetado: usando landmarks aleatorios.")
+        frames = np.random.rand(max_frames, kp.NUM_FEATURES).astype(np.float32)
+        frames[::3, kp.LH_SLICE] = 0.0  # Simular manos ausentes
+
+    results = []
+    for row in frames:
+        parts = {}
+        for attr, part, with_visibility in ((ATTRS[0], kp.POSE_SLICE, True),
+                                            (ATTRS[1], kp.LH_SLICE, False),
+                                            (ATTRS[2], kp.RH_SLICE, False)):
+            values = row[part]
+            parts[attr] = _to_proto(values, with_visibility) if np.any(values) else None
+        results.append(SimpleNamespace(**parts))
+    return results
+
+
+# ==========================================
+# BENCHMARK
+# ==========================================
+def run_benchmark(results, repeats=5, sequence_length=kp.SEQUENCE_LENGTH):
+    n_seq = len(results) // sequence_length
+    if n_seq == 0:
+        raise ValueError(f"Se necesitan al menos {sequence_length} frames (hay {len(results)})")
+    sequences = [results[i * sequence_length:(i + 1) * sequence_length] for i in range(n_seq)]
+    n_frames = n_seq * sequence_length
+
+    buffer = np.zeros((sequence_length, kp.NUM_FEATURES), dtype=np.float32)
+    mask = np.zeros((sequence_length, 3), dtype=bool)
+
+    def legacy():
+        for seq in sequences:
+            np.array([recording.extract_keypoints(r) for r in seq])
+
+    def per_frame():
+        for seq in sequences:
+            for i, r in enumerate(seq):
+                kp.extract_keypoints_into(r, buffer[i])
+
+    def batched():
+        for seq in sequences:
+            kp.extract_sequence(seq, out=buffer, mask=mask)
+
+    # Verificación de paridad antes de medir
+    for seq in sequences:
+        expected = np.array([recording.extract_keypoints(r) for r in seq], dtype=np.float32)
+        got, _ = kp.extract_sequence(seq)
+        if not np.allclose(expected, got, atol=1e-6):
+            raise AssertionError("extract_sequence no coincide con extract_keypoints")
+
+    print(f"Frames: {n_frames} ({n_seq} secuencias de {sequence_length}), repeticiones: {repeats}")
+    baseline = None
+    for name, fn in (('extract_keypoints (actual)', legacy),
+                     ('extract_keypoints_into', per_frame),
+                     ('extract_sequence', batched)):
+        best = min(timeit.repeat(fn, number=1, repeat=repeats))
+        us_per_frame = best / n_frames * 1e6
+        baseline = baseline or us_per_frame
+        print(f"  {name:<28} {us_per_frame:8.2f} µs/frame   x{baseline / us_per_frame:.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microbenchmark de extracción de keypoints")
+    parser.add_argument('--record', metavar='VIDEO', help="Graba protos desde un video antes de medir")
+    parser.add_argument('--protos', default=PROTOS_PATH)
+    parser.add_argument('--frames', type=int, default=3200, help="Frames sintéticos si no hay protos grabados")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.record:
+        record_protos(args.record, args.protos)
+    if os.path.exists(args.protos):
+        results = load_protos(args.protos)
+    else:
+        results = protos_from_dataset(args.frames)
+    run_benchmark(results, args.repeats)
@@ -0,0 +1,203 @@
+"""
+Benchmark de throughput y perfilado de 2_train_local.py.
+
+Genera datasets sintéticos con el layout dataset/<seña>/<n>/keypoints.npy (y opcionalmente
+su versión empaquetada) a distintos tamaños, y mide cada fase del entrenamiento:
+load, slice, split, fit (steps/s), export (SavedModel) y convert (TFLite), con el pico de
+RSS tras cada fase. Cada configuración corre en su propio proceso (spawn): ru_maxrss es el
+pico de todo el proceso, así que en uno compartido arrastraría el de las corridas anteriores.
+Opcionalmente captura una traza del profiler de TensorFlow durante fit.
+
+Los resultados se escriben en JSON para comparar entre cambios de modelo o pipeline.
+
+Uso:
+    python python_scripts/bench_train.py --sizes 10x30,50x100 --layouts folders,packed --output bench_train.json
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+
+import dataset_store
+import input_pipeline
+
+trainer = importlib.import_module('2_train_local')
+
+
+# ==========================================
+# DATASET SINTÉTICO
+# ==========================================
+def generate_dataset(data_path, signs, sequences, sequence_length=dataset_store.SEQUENCE_LENGTH, seed=0):
+    """Escribe signs x sequences secuencias float64 (como np.save en el recolector)."""
+    rng = np.random.default_rng(seed)
+    for s in range(signs):
+        # Un patrón base por seña + ruido, para que fit tenga algo que aprender
+        base = rng.random((sequence_length, dataset_store.NUM_FEATURES))
+        for n in range(sequences):
+            window = base + rng.normal(0, 0.05, base.shape)
+            window[:, input_pipeline.HAND_SLICE][rng.random(sequence_length) < 0.2] = 0.0  # Manos ausentes
+            seq_path = os.path.join(data_path, f"sign_{s:03d}", str(n))
+            os.makedirs(seq_path, exist_ok=True)
+            np.save(os.path.join(seq_path, "keypoints.npy"), window)
+
+
+# ==========================================
+# MEDICIÓN
+# ==========================================
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Phases:
+    def __init__(self):
+        self.results = {}
+
+    def run(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        value = fn(*args, **kwargs)
+        self.results[name] = {'seconds': time.perf_counter() - start, 'peak_rss_mb': peak_rss_mb()}
+        print(f"   {name:<8} {self.results[name]['seconds']:8.3f}s  (RSS pico {self.results[name]['peak_rss_mb']:.0f} MB)")
+        return value
+
+
+class StepTimer(tf.keras.callbacks.Callback):
+    """Tiempo por batch, descartando la primera época (trazado del grafo / warmup)."""
+
+    def __init__(self):
+        super().__init__()
+        self.epoch_times = []
+        self.steps = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+        self._steps = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._steps += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_times.append(time.perf_counter() - self._start)
+        self.steps.append(self._steps)
+
+    def steps_per_sec(self):
+        times, steps = (self.epoch_times[1:], self.steps[1:]) if len(self.epoch_times) > 1 else (self.epoch_times, self.steps)
+        return sum(steps) / max(sum(times), 1e-9)
+
+
+def benchmark_run(data_path, store_path, layout, epochs, batch_size, profile_dir=None):
+    phases = Phases()
+    if layout == 'packed':
+        source = phases.run('load', input_pipeline.open_packed_source, store_path)
+    else:
+        source = phases.run('load', input_pipeline.open_folder_source, data_path)
+    all_idx = np.arange(len(source))
+
+    # slice: materializar las 126 columnas de manos de todo el corpus (lo que lee una época)
+    phases.run('slice', source.read, all_idx, input_pipeline.HAND_SLICE)
+    train_idx, test_idx = phases.run('split', train_test_split, all_idx, test_size=0.05)
+    train_ds = input_pipeline.make_dataset(source, train_idx, batch_size, training=True, augment=trainer.AUGMENT)
+
+    model = trainer.build_model(len(source.actions))
+    timer = StepTimer()
+    if profile_dir:
+        tf.profiler.experimental.start(profile_dir)
+    try:
+        phases.run('fit', model.fit, train_ds, epochs=epochs, callbacks=[timer], verbose=0)
+    finally:
+        if profile_dir:
+            tf.profiler.experimental.stop()
+
+    saved_model_dir = tempfile.mkdtemp(prefix='bench_saved_model_')
+    try:
+        phases.run('export', trainer.export_saved_model, model, saved_model_dir)
+        tflite_model = phases.run('convert', trainer.convert_saved_model, saved_model_dir)
+    finally:
+        shutil.rmtree(saved_model_dir, ignore_errors=True)
+
+    steps_per_sec = timer.steps_per_sec()
+    return {
+        'layout': layout,
+        'sequences_total': len(source),
+        'phases': phases.results,
+        'fit': {
+            'epochs': epochs,
+            'batch_size': batch_size,
+            'steps_per_sec': steps_per_sec,
+            'samples_per_sec': steps_per_sec * batch_size,
+            'epoch_seconds': timer.epoch_times,
+        },
+        'params': int(model.count_params()),
+        'tflite_bytes': len(tflite_model),
+    }
+
+
+def benchmark_isolated(*args):
+    """benchmark_run en un proceso nuevo: el RSS pico medido es solo el de esta configuración."""
+    with multiprocessing.get_context('spawn').Pool(processes=1) as pool:
+        return pool.apply(benchmark_run, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de entrenamiento (2_train_local.py)")
+    parser.add_argument('--sizes', default='10x30,50x100', help="Lista de SEÑASxSECUENCIAS separada por comas")
+    parser.add_argument('--layouts', default='folders,packed', help="folders y/o packed")
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=trainer.BATCH_SIZE)
+    parser.add_argument('--profile', metavar='DIR', help="Guarda una traza del profiler de TF durante fit")
+    parser.add_argument('--workdir', help="Directorio para los datasets sintéticos (por defecto temporal)")
+    parser.add_argument('--output', default='bench_train.json')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_train_')
+    report = {
+        'python': platform.python_version(),
+        'tensorflow': tf.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'runs': [],
+    }
+
+    try:
+        for size in args.sizes.split(','):
+            signs, sequences = (int(v) for v in size.lower().split('x'))
+            data_path = os.path.join(workdir, f"{signs}x{sequences}", 'dataset')
+            store_path = os.path.join(workdir, f"{signs}x{sequences}", 'dataset_packed')
+            print(f"📦 Dataset sintético: {signs} señas x {sequences} secuencias")
+            start = time.perf_counter()
+            if not os.path.exists(data_path):
+                generate_dataset(data_path, signs, sequences)
+            if 'packed' in args.layouts and not dataset_store.store_exists(store_path):
+                dataset_store.convert_folder_layout(data_path, store_path)
+            print(f"   (generado en {time.perf_counter() - start:.1f}s)")
+
+            for layout in args.layouts.split(','):
+                print(f"⏱️  Layout: {layout}")
+                profile_dir = os.path.join(args.profile, f"{signs}x{sequences}_{layout}") if args.profile else None
+                run = benchmark_isolated(data_path, store_path, layout, args.epochs, args.batch_size, profile_dir)
+                run.update({'signs': signs, 'sequences_per_sign': sequences})
+                report['runs'].append(run)
+                print(f"   fit: {run['fit']['steps_per_sec']:.1f} steps/s ({run['fit']['samples_per_sec']:.0f} secuencias/s)")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Resultados guardados en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Captura en pipeline para el recolector (hilos + colas acotadas).
+
+    cámara -> [FrameGrabber] -> frames_q -> [LandmarkWorker] -> render_q -> render (hilo principal)
+                                                  |
+                                                  +-> keypoints + timestamp de cada frame detectado
+    frames elegidos -> encode_q -> [VideoEncoder] (dibuja + VideoWriter.write)
+
+- El grabber nunca espera: si el detector va atrasado se descarta el frame más viejo.
+- La UI nunca frena la detección: render_q también descarta el más viejo.
+- Cada secuencia dura exactamente `duration` segundos de reloj: los frames detectados se
+  remuestrean a una rejilla uniforme de SEQUENCE_LENGTH instantes (vecino más cercano)
+  y se guarda el timestamp real de cada frame elegido junto a los keypoints.
+
+cv2.imshow/waitKey se quedan en el hilo principal (requisito de macOS).
+"""
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import keypoints as kp
+from telemetry import NULL_TELEMETRY
+
+
+def _put_drop_oldest(q, item):
+    """put() sin bloquear: si la cola está llena descarta el elemento más viejo. True si descartó."""
+    dropped = False
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped = True
+            except queue.Empty:
+                pass
+
+
+class FrameGrabber(threading.Thread):
+    """Lee la cámara durante `duration` segundos y publica (timestamp, frame) en out_queue."""
+
+    def __init__(self, cap, out_queue, duration, flip=True, telemetry=NULL_TELEMETRY):
+        super().__init__(daemon=True)
+        self.telemetry = telemetry
+        self.cap = cap
+        self.out_queue = out_queue
+        self.duration = duration
+        self.flip = flip
+        self.stop_event = threading.Event()
+        self.t0 = None
+        self.frames = 0
+        self.dropped = 0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                start = self.telemetry.clock()
+                ret, frame = self.cap.read()
+                t = time.perf_counter()
+                self.telemetry.record('camara', start)
+                if not ret:
+                    self.error = "No se pudo leer cámara."
+                    break
+                if self.t0 is None: self.t0 = t
+                if t - self.t0 >= self.duration: break
+                if self.flip: frame = cv2.flip(frame, 1)
+                self.telemetry.frame(t)
+                self.frames += 1
+                if _put_drop_oldest(self.out_queue, (t, frame)): self.dropped += 1
+        finally:
+            _put_drop_oldest(self.out_queue, None)
+
+
+class LandmarkWorker(threading.Thread):
+    """Corre Holistic sobre cada frame recibido y acumula (timestamp, keypoints)."""
+
+    def __init__(self, holistic, in_queue, render_queue, keep_frames=False, telemetry=NULL_TELEMETRY):
+        super().__init__(daemon=True)
+        self.telemetry = telemetry
+        self.holistic = holistic
+        self.in_queue = in_queue
+        self.render_queue = render_queue
+        self.keep_frames = keep_frames
+        self.timestamps = []
+        self.keypoints = []
+        self.frames = []    # (frame, results) de cada detección, solo si keep_frames (video)
+        self.error = None
+
+    def run(self):
+        try:
+            while True:
+                item = self.in_queue.get()
+                if item is None: break
+                t, frame = item
+                # Solo convertimos a RGB para MediaPipe; la UI dibuja sobre el frame BGR original
+                start = self.telemetry.clock()
+                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                image.flags.writeable = False
+                results = self.holistic.process(image)
+                start = self.telemetry.record('holistic', start)
+
+                row = np.empty(kp.NUM_FEATURES, dtype=np.float32)
+                kp.extract_keypoints_into(results, row)
+                self.telemetry.record('keypoints', start)
+                self.timestamps.append(t)
+                self.keypoints.append(row)
+                if self.keep_frames: self.frames.append((frame, results))
+
+                _put_drop_oldest(self.render_queue, (frame, results))
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            _put_drop_oldest(self.render_queue, None)
+
+
+class VideoEncoder(threading.Thread):
+    """
+    Dibuja (opcional) y escribe frames en un cv2.VideoWriter fuera del hilo de la UI.
+    Con clean_writer también escribe cada frame sin anotar (fuente para extract_landmarks.py).
+    """
+
+    def __init__(self, writer, annotate=None, queue_size=64, telemetry=NULL_TELEMETRY, clean_writer=None):
+        super().__init__(daemon=True)
+        self.telemetry = telemetry
+        self.writer = writer
+        self.clean_writer = clean_writer
+        self.annotate = annotate
+        self.in_queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.start()
+
+    def submit(self, frame, results=None, annotate=None):
+        """annotate viaja con el frame: cambiarla para la siguiente secuencia no afecta a los encolados."""
+        self.in_queue.put((frame, results, annotate or self.annotate))  # Bloquea si el encoder va atrasado
+
+    def run(self):
+        while True:
+            item = self.in_queue.get()
+            if item is None: break
+            frame, results, annotate = item
+            if self.clean_writer is not None:
+                start = self.telemetry.clock()
+                self.clean_writer.write(frame)
+                self.telemetry.record('video_limpio', start)
+                # El mismo frame puede repetirse en la rejilla: se dibuja sobre una copia
+                if annotate: frame = frame.copy()
+            start = self.telemetry.clock()
+            if annotate: annotate(frame, results)
+            start = self.telemetry.record('video_dibujo', start)
+            self.writer.write(frame)
+            self.telemetry.record('video_write', start)
+            self.written += 1
+
+    def close(self):
+        self.in_queue.put(None)
+        self.join()
+        self.writer.release()
+        if self.clean_writer is not None: self.clean_writer.release()
+
+
+def resample_to_grid(timestamps, t0, duration, sequence_length):
+    """Índice del frame detectado más cercano a cada instante de una rejilla uniforme."""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    grid = t0 + np.arange(sequence_length) * (duration / sequence_length)
+    right = np.clip(np.searchsorted(timestamps, grid), 1, len(timestamps) - 1)
+    left = right - 1
+    nearest_left = (grid - timestamps[left]) <= (timestamps[right] - grid)
+    return np.where(nearest_left, left, right)
+
+
+def capture_sequence(cap, holistic, duration, sequence_length, render=None, encoder=None, queue_size=2,
+                     telemetry=NULL_TELEMETRY, annotate=None):
+    """
+    Captura una secuencia de `duration` segundos con grabber/detector/render en paralelo.
+
+    render(frame, results) se llama en el hilo actual y devuelve False para abortar (ESC).
+    annotate(image, results) dibuja sobre los frames de esta secuencia que van al encoder.
+    Devuelve un dict con keypoints (sequence_length, 258) float32, timestamps (segundos
+    desde el primer frame, float32), frames (detecciones distintas usadas), encoded (frames
+    enviados al encoder de video), elapsed (segundos reales del primer al último frame
+    detectado) y contadores.
+    telemetry (telemetry.Telemetry) registra cámara, holistic y keypoints por frame.
+    """
+    frames_queue = queue.Queue(maxsize=queue_size)
+    render_queue = queue.Queue(maxsize=queue_size)
+    grabber = FrameGrabber(cap, frames_queue, duration, telemetry=telemetry)
+    worker = LandmarkWorker(holistic, frames_queue, render_queue, keep_frames=encoder is not None, telemetry=telemetry)
+    grabber.start()
+    worker.start()
+
+    aborted = False
+    rendered = 0
+    while True:
+        item = render_queue.get()
+        if item is None: break
+        if render is not None and not aborted:
+            if render(*item) is False:
+                aborted = True
+                grabber.stop_event.set()
+            rendered += 1
+    grabber.join()
+    worker.join()
+
+    result = {
+        'keypoints': np.zeros((sequence_length, kp.NUM_FEATURES), dtype=np.float32),
+        'timestamps': np.full(sequence_length, np.nan, dtype=np.float32),
+        'frames': 0,
+        'grabbed': grabber.frames,
+        'dropped': grabber.dropped,
+        'rendered': rendered,
+        'encoded': 0,
+        'elapsed': 0.0,
+        'aborted': aborted,
+        'error': grabber.error or worker.error,
+    }
+    if aborted or not worker.timestamps:
+        return result
+
+    if len(worker.timestamps) == 1:
+        idx = np.zeros(sequence_length, dtype=np.int64)
+    else:
+        idx = resample_to_grid(worker.timestamps, grabber.t0, duration, sequence_length)
+    result['keypoints'][:] = np.stack(worker.keypoints)[idx]
+    result['timestamps'][:] = np.asarray(worker.timestamps)[idx] - grabber.t0
+    result['frames'] = len(np.unique(idx))
+    result['elapsed'] = float(worker.timestamps[-1] - grabber.t0)
+
+    # El video recibe exactamente los frames elegidos: queda alineado con los keypoints
+    if encoder is not None:
+        for i in idx:
+            encoder.submit(*worker.frames[i], annotate=annotate)
+        result['encoded'] = len(idx)
+    return result
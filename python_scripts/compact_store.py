@@ -0,0 +1,278 @@
+"""
+Almacén compacto de keypoints (dataset_compact/).
+
+Cada secuencia se guarda sin padding y sin los ceros de las partes no detectadas:
+
+    meta.json      -> codificación, forma lógica, conteos y lista de señas
+    labels.i32     -> int32 por secuencia (índice en meta.json["actions"])
+    lengths.u8     -> longitud real (frames) de cada secuencia
+    presence.u8    -> un byte por frame real: bit 0 = pose, bit 1 = mano izq., bit 2 = mano der.
+    pose.<ext>     -> (P, 132) solo los frames con pose
+    lh.<ext>       -> (Q, 63)  solo los frames con mano izquierda
+    rh.<ext>       -> (R, 63)  solo los frames con mano derecha
+    ids.json       -> ID estable de cada secuencia (los del empaquetado, mismo orden)
+
+<ext> es 'f16' (float16) o 'q16' (uint16 en punto fijo sobre FIXED_RANGE; los valores fuera
+del rango se recortan y la conversión avisa cuántos). Frente a
+32x258 float64 (66 KB por secuencia) ocupa varias veces menos, y la lectura decodifica
+en bloque (sin bucles por frame) de vuelta al layout denso (N, 32, 258) de entrenamiento.
+
+Uso:
+    python python_scripts/compact_store.py convert --encoding q16
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import dataset_store
+import keypoints as kp
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+COMPACT_PATH = os.path.join(dataset_store.BASE_PATH, 'dataset_compact')
+ENCODINGS = ('f16', 'q16')
+FIXED_RANGE = (-2.0, 2.0)   # Rango de coordenadas de MediaPipe representable en punto fijo
+CONVERT_CHUNK = 1024        # Secuencias por bloque al convertir (memoria acotada)
+FORMAT_VERSION = 1
+IDS_FILE = 'ids.json'
+
+# (nombre, slice en el vector denso, bit de presencia)
+PARTS = (
+    ('pose', kp.POSE_SLICE, 1 << kp.MASK_POSE),
+    ('lh', kp.LH_SLICE, 1 << kp.MASK_LH),
+    ('rh', kp.RH_SLICE, 1 << kp.MASK_RH),
+)
+
+
+def _part_width(part):
+    return part.stop - part.start
+
+
+def read_meta(store_path):
+    with open(os.path.join(store_path, 'meta.json'), 'r') as f:
+        return json.load(f)
+
+
+def fingerprint(store_path=COMPACT_PATH):
+    """Huella del compacto: su meta.json (incluye la huella del empaquetado de origen y la codificación)."""
+    with open(os.path.join(store_path, 'meta.json'), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def _write_meta(store_path, meta):
+    meta_path = os.path.join(store_path, 'meta.json')
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+# ==========================================
+# CODIFICACIÓN
+# ==========================================
+def _out_of_range(values, encoding):
+    """Número de valores que q16 recortaría a FIXED_RANGE (f16 no recorta)."""
+    if encoding == 'f16' or not values.size:
+        return 0
+    low, high = FIXED_RANGE
+    return int(np.count_nonzero((values < low) | (values > high)))
+
+
+def _quantize(values, encoding):
+    if encoding == 'f16':
+        return values.astype(np.float16)
+    low, high = FIXED_RANGE
+    scaled = (np.clip(values, low, high) - low) * (65535.0 / (high - low))
+    return np.round(scaled).astype(np.uint16)
+
+
+def _dequantize(values, encoding, out_dtype=np.float32):
+    if encoding == 'f16':
+        return values.astype(out_dtype)
+    low, high = FIXED_RANGE
+    return values.astype(out_dtype) * ((high - low) / 65535.0) + low
+
+
+def encode_sequences(X):
+    """
+    X: (n, L, 258) denso con padding. Devuelve (lengths, presence, {parte: valores})
+    donde solo se conservan los frames reales y las partes detectadas.
+    """
+    n, length, _ = X.shape
+    nonzero = np.zeros((n, length, len(PARTS)), dtype=bool)
+    for col, (_, part, _) in enumerate(PARTS):
+        nonzero[:, :, col] = np.any(X[:, :, part] != 0, axis=-1)
+
+    # Longitud real = último frame con algún dato + 1 (lo demás era padding)
+    any_frame = nonzero.any(axis=-1)
+    lengths = np.where(any_frame.any(axis=1), length - np.argmax(any_frame[:, ::-1], axis=1), 0)
+    valid = np.arange(length)[np.newaxis, :] < lengths[:, np.newaxis]
+
+    flat_valid = valid.reshape(-1)
+    presence = np.zeros(n * length, dtype=np.uint8)
+    values = {}
+    for col, (name, part, bit) in enumerate(PARTS):
+        present = nonzero[:, :, col].reshape(-1)
+        presence |= np.where(present, bit, 0).astype(np.uint8)
+        values[name] = X[:, :, part].reshape(n * length, -1)[present & flat_valid]
+    return lengths.astype(np.uint8), presence[flat_valid], values
+
+
+# ==========================================
+# ESCRITURA
+# ==========================================
+def create_store(store_path=COMPACT_PATH, encoding='q16', sequence_length=dataset_store.SEQUENCE_LENGTH):
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Codificación desconocida: {encoding} (opciones: {ENCODINGS})")
+    os.makedirs(store_path, exist_ok=True)
+    for name in ['labels.i32', 'lengths.u8', 'presence.u8'] + [f'{p}.{encoding}' for p, _, _ in PARTS]:
+        open(os.path.join(store_path, name), 'wb').close()
+    meta = {
+        'version': FORMAT_VERSION,
+        'encoding': encoding,
+        'fixed_range': list(FIXED_RANGE),
+        'sequence_length': sequence_length,
+        'num_features': kp.NUM_FEATURES,
+        'count': 0,
+        'frames': 0,
+        'rows': {name: 0 for name, _, _ in PARTS},
+        'clipped': 0,
+        'actions': [],
+    }
+    _write_meta(store_path, meta)
+    return meta
+
+
+def append_sequences(store_path, X, labels, meta):
+    """Añade un bloque (n, L, 258) al final de cada archivo y actualiza `meta` (sin escribirlo)."""
+    lengths, presence, values = encode_sequences(np.asarray(X, dtype=np.float32))
+    encoding = meta['encoding']
+    with open(os.path.join(store_path, 'labels.i32'), 'ab') as f:
+        f.write(np.asarray(labels, dtype=np.int32).tobytes())
+    with open(os.path.join(store_path, 'lengths.u8'), 'ab') as f:
+        f.write(lengths.tobytes())
+    with open(os.path.join(store_path, 'presence.u8'), 'ab') as f:
+        f.write(presence.tobytes())
+    for name, _, _ in PARTS:
+        meta['clipped'] += _out_of_range(values[name], encoding)
+        with open(os.path.join(store_path, f'{name}.{encoding}'), 'ab') as f:
+            f.write(_quantize(values[name], encoding).tobytes())
+        meta['rows'][name] += len(values[name])
+    meta['count'] += len(lengths)
+    meta['frames'] += len(presence)
+
+
+def is_current(store_path=COMPACT_PATH, packed_path=dataset_store.PACKED_PATH):
+    """True si el compacto se convirtió del contenido actual del empaquetado (misma huella)."""
+    if not os.path.exists(os.path.join(store_path, 'meta.json')):
+        return False
+    if not os.path.exists(os.path.join(store_path, IDS_FILE)):
+        return False  # Convertido antes de guardar los IDs: el split guardado no se podría resolver
+    if not dataset_store.store_exists(packed_path):
+        return True  # Sin empaquetado contra el que comparar: el compacto es la única copia
+    return read_meta(store_path).get('source_fingerprint') == dataset_store.fingerprint(packed_path)
+
+
+def convert_packed(packed_path=dataset_store.PACKED_PATH, store_path=COMPACT_PATH, encoding='q16'):
+    X, labels, packed_meta = dataset_store.open_store(packed_path)
+    meta = create_store(store_path, encoding, packed_meta['sequence_length'])
+    meta['actions'] = packed_meta['actions']
+    meta['source_count'] = packed_meta['count']
+    meta['source_fingerprint'] = dataset_store.fingerprint(packed_path)
+    for start in range(0, len(labels), CONVERT_CHUNK):
+        append_sequences(store_path, X[start:start + CONVERT_CHUNK], labels[start:start + CONVERT_CHUNK], meta)
+    # Mismo orden de filas que el empaquetado: sus IDs valen tal cual
+    with open(os.path.join(store_path, IDS_FILE), 'w') as f:
+        json.dump(dataset_store.sequence_ids(packed_path).tolist(), f)
+    _write_meta(store_path, meta)
+    if meta['clipped']:
+        print(f"⚠️ {meta['clipped']} coordenadas fuera de {FIXED_RANGE} se recortaron al codificar en q16. "
+              f"Usa --encoding f16 si esos valores importan.")
+
+    compact_bytes = sum(os.path.getsize(os.path.join(store_path, f)) for f in os.listdir(store_path))
+    dense_bytes = meta['count'] * meta['sequence_length'] * kp.NUM_FEATURES * 8
+    print(f"✅ {meta['count']} secuencias ({meta['frames']} frames reales) -> {compact_bytes / 1e6:.1f} MB "
+          f"(float64 denso: {dense_bytes / 1e6:.1f} MB, x{dense_bytes / max(compact_bytes, 1):.1f})")
+    return meta
+
+
+# ==========================================
+# LECTURA VECTORIZADA
+# ==========================================
+class CompactReader:
+    def __init__(self, store_path=COMPACT_PATH):
+        self.meta = meta = read_meta(store_path)
+        n, encoding = meta['count'], meta['encoding']
+        self.encoding = encoding
+        self.sequence_length = meta['sequence_length']
+        self.num_features = meta['num_features']
+        self.actions = meta['actions']
+        self.labels = np.fromfile(os.path.join(store_path, 'labels.i32'), dtype=np.int32, count=n)
+        ids_path = os.path.join(store_path, IDS_FILE)
+        self.ids = None  # Compacto convertido antes de ids.json
+        if os.path.exists(ids_path):
+            with open(ids_path, 'r') as f:
+                self.ids = np.array(json.load(f))
+        self.lengths = np.fromfile(os.path.join(store_path, 'lengths.u8'), dtype=np.uint8, count=n).astype(np.int64)
+        self.presence = np.fromfile(os.path.join(store_path, 'presence.u8'), dtype=np.uint8, count=meta['frames'])
+        # Primer frame global de cada secuencia
+        self.frame_start = np.concatenate([[0], np.cumsum(self.lengths)[:-1]]).astype(np.int64)
+
+        dtype = np.float16 if encoding == 'f16' else np.uint16
+        self.values, self.row_index = {}, {}
+        for name, part, bit in PARTS:
+            rows = meta['rows'][name]
+            path = os.path.join(store_path, f'{name}.{encoding}')
+            self.values[name] = (np.memmap(path, dtype=dtype, mode='r', shape=(rows, _part_width(part)))
+                                 if rows else np.zeros((0, _part_width(part)), dtype=dtype))
+            # Fila de la parte que corresponde a cada frame global (válida solo si el bit está activo)
+            self.row_index[name] = np.cumsum((self.presence & bit) != 0) - 1
+
+    def read_rows(self, indices, features=slice(None)):
+        """Decodifica las secuencias `indices` al layout denso (n, L, F') float32."""
+        indices = np.asarray(indices, dtype=np.int64)
+        n, length = len(indices), self.sequence_length
+        lens = self.lengths[indices]
+        # Un elemento por frame real de las secuencias pedidas
+        seq_of = np.repeat(np.arange(n), lens)
+        frame_in_seq = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens)
+        frame_global = self.frame_start[indices][seq_of] + frame_in_seq
+        presence = self.presence[frame_global]
+
+        wanted = range(self.num_features)[features]
+        out = np.zeros((n, length, self.num_features), dtype=np.float32)
+        for name, part, bit in PARTS:
+            if not range(max(part.start, wanted.start), min(part.stop, wanted.stop)): continue
+            sel = (presence & bit) != 0
+            rows = self.row_index[name][frame_global[sel]]
+            out[seq_of[sel], frame_in_seq[sel], part] = _dequantize(self.values[name][rows], self.encoding)
+        return out[:, :, features]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén compacto de keypoints (float16 / punto fijo)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    convert = sub.add_parser('convert', help="Convierte el dataset empaquetado al formato compacto")
+    convert.add_argument('--packed-path', default=dataset_store.PACKED_PATH)
+    convert.add_argument('--store-path', default=COMPACT_PATH)
+    convert.add_argument('--encoding', choices=ENCODINGS, default='q16')
+
+    verify = sub.add_parser('verify', help="Compara el formato compacto con el empaquetado")
+    verify.add_argument('--packed-path', default=dataset_store.PACKED_PATH)
+    verify.add_argument('--store-path', default=COMPACT_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'convert':
+        convert_packed(args.packed_path, args.store_path, args.encoding)
+    elif args.command == 'verify':
+        X, _, _ = dataset_store.open_store(args.packed_path)
+        reader = CompactReader(args.store_path)
+        max_error = 0.0
+        for start in range(0, len(reader.labels), CONVERT_CHUNK):
+            idx = np.arange(start, min(start + CONVERT_CHUNK, len(reader.labels)))
+            max_error = max(max_error, float(np.max(np.abs(reader.read_rows(idx) - X[idx]))))
+        print(f"Error máximo de reconstrucción: {max_error:.2e}")
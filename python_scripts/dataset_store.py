@@ -0,0 +1,372 @@
+"""
+Almacén empaquetado del dataset (dataset_packed/).
+
+Reemplaza el layout dataset/<seña>/<n>/keypoints.npy (miles de archivos pequeños)
+por un único bloque contiguo que se abre con np.memmap sin copiar nada:
+
+    keypoints.f32  -> float32 crudo de forma (N, SEQUENCE_LENGTH, NUM_FEATURES)
+    labels.i32     -> int32 por secuencia, índice dentro de meta.json["actions"]
+    timestamps.f32 -> float32 (N, SEQUENCE_LENGTH): segundos de cada frame desde el
+                      inicio de la secuencia (NaN si no se registraron)
+    index.jsonl    -> una línea por secuencia: {"i", "sign", "sequence", "source", "id"}
+    meta.json      -> forma, dtype, lista de señas y número de secuencias confirmadas
+
+meta.json["count"] es la fuente de verdad: se escribe (atómicamente) al final de
+cada append, así que una grabación interrumpida nunca deja secuencias a medias
+visibles para el entrenamiento.
+
+"id" identifica la secuencia aunque cambie su fila: 'folder:<seña>/<n>/keypoints.npy' para
+las que vienen del layout de carpetas (igual tras reconvertir con --overwrite, que ordena
+las filas de otra forma) y un UUID para el resto. Lo usa el split guardado de 2_train_local.py.
+
+Uso (conversión única desde el layout de carpetas):
+    python python_scripts/dataset_store.py convert
+    python python_scripts/dataset_store.py import   # solo las carpetas que falten en el store
+"""
+import argparse
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+BASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATA_PATH = os.path.join(BASE_PATH, 'dataset')           # Layout antiguo (carpetas)
+PACKED_PATH = os.path.join(BASE_PATH, 'dataset_packed')  # Layout empaquetado
+SEQUENCE_LENGTH = 32
+NUM_FEATURES = 258  # Pose(132) + LH(63) + RH(63)
+
+KEYPOINTS_FILE = 'keypoints.f32'
+LABELS_FILE = 'labels.i32'
+TIMESTAMPS_FILE = 'timestamps.f32'
+INDEX_FILE = 'index.jsonl'
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+
+# ==========================================
+# METADATOS
+# ==========================================
+def store_exists(store_path=PACKED_PATH):
+    return os.path.exists(os.path.join(store_path, META_FILE))
+
+
+def read_meta(store_path=PACKED_PATH):
+    with open(os.path.join(store_path, META_FILE), 'r') as f:
+        return json.load(f)
+
+
+def _write_meta(store_path, meta):
+    # Escritura atómica: nunca queda un meta.json truncado
+    meta_path = os.path.join(store_path, META_FILE)
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def create_store(store_path=PACKED_PATH, sequence_length=SEQUENCE_LENGTH, num_features=NUM_FEATURES):
+    if store_exists(store_path):
+        raise FileExistsError(f"Ya existe un dataset empaquetado en: {store_path}")
+    os.makedirs(store_path, exist_ok=True)
+    for name in (KEYPOINTS_FILE, LABELS_FILE, TIMESTAMPS_FILE, INDEX_FILE):
+        open(os.path.join(store_path, name), 'wb').close()
+    meta = {
+        'version': FORMAT_VERSION,
+        'dtype': 'float32',
+        'sequence_length': sequence_length,
+        'num_features': num_features,
+        'count': 0,
+        'actions': [],
+        'store_id': uuid.uuid4().hex,  # Cambia si el store se regenera
+    }
+    _write_meta(store_path, meta)
+    return meta
+
+
+# ==========================================
+# LECTURA
+# ==========================================
+def open_store(store_path=PACKED_PATH, mode='r'):
+    """Devuelve (X, labels, meta). X es un np.memmap (N, L, F) float32, sin copia."""
+    meta = read_meta(store_path)
+    n = meta['count']
+    shape = (n, meta['sequence_length'], meta['num_features'])
+    if n == 0:
+        # np.memmap no admite archivos vacíos
+        X = np.empty(shape, dtype=np.float32)
+    else:
+        X = np.memmap(os.path.join(store_path, KEYPOINTS_FILE), dtype=np.float32, mode=mode, shape=shape)
+    labels = np.fromfile(os.path.join(store_path, LABELS_FILE), dtype=np.int32, count=n)
+    return X, labels, meta
+
+
+def open_timestamps(store_path=PACKED_PATH):
+    """Timestamps por frame (N, L) como memmap; NaN donde no se registraron."""
+    meta = read_meta(store_path)
+    n, length = meta['count'], meta['sequence_length']
+    path = os.path.join(store_path, TIMESTAMPS_FILE)
+    if n == 0 or not os.path.exists(path):
+        return np.full((n, length), np.nan, dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode='r', shape=(n, length))
+
+
+def fingerprint(store_path=PACKED_PATH):
+    """
+    Huella del contenido confirmado del store: meta.json, etiquetas y la última escritura de
+    keypoints.f32. Cambia con cada append y con cada reconversión, aunque el conteo sea el
+    mismo; la usan los derivados (compacto, features, índice de calidad) para saber si están al día.
+    """
+    meta = read_meta(store_path)
+    digest = hashlib.sha1(json.dumps(meta, sort_keys=True).encode())
+    digest.update(np.fromfile(os.path.join(store_path, LABELS_FILE), dtype=np.int32, count=meta['count']).tobytes())
+    keypoints_path = os.path.join(store_path, KEYPOINTS_FILE)
+    if os.path.exists(keypoints_path):
+        stat = os.stat(keypoints_path)
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def read_index(store_path=PACKED_PATH):
+    """Metadatos por secuencia (lista de dicts, posición i = fila i de X)."""
+    n = read_meta(store_path)['count']
+    entries = [None] * n
+    with open(os.path.join(store_path, INDEX_FILE), 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
+            entry = json.loads(line)
+            # Una línea huérfana de un append interrumpido puede repetirse: gana la última
+            if entry['i'] < n:
+                entries[entry['i']] = entry
+    return entries
+
+
+def folder_sequence_id(relpath):
+    """ID de una secuencia del layout de carpetas (relpath de su keypoints.npy dentro de dataset/)."""
+    return 'folder:' + relpath.replace(os.sep, '/')
+
+
+def sequence_ids(store_path=PACKED_PATH):
+    """
+    ID de cada fila (array de str). Las filas escritas antes de que index.jsonl guardara "id"
+    usan '<store_id>/<seña>#<fila>': dejan de coincidir si el store se regenera, en lugar de
+    apuntar en silencio a otra secuencia.
+    """
+    store_id = read_meta(store_path).get('store_id', 'legacy')
+    ids = []
+    for i, entry in enumerate(read_index(store_path)):
+        if entry and entry.get('id'):
+            ids.append(entry['id'])
+        else:
+            ids.append(f"{store_id}/{entry['sign'] if entry else ''}#{i}")
+    return np.array(ids)
+
+
+def count_sequences(store_path=PACKED_PATH):
+    """{seña: número de secuencias} a partir de labels.i32 (sin tocar los keypoints)."""
+    if not store_exists(store_path):
+        return {}
+    meta = read_meta(store_path)
+    labels = np.fromfile(os.path.join(store_path, LABELS_FILE), dtype=np.int32, count=meta['count'])
+    counts = np.bincount(labels, minlength=len(meta['actions']))
+    return {action: int(counts[i]) for i, action in enumerate(meta['actions'])}
+
+
+# ==========================================
+# ESCRITURA INCREMENTAL (usada por 1_collect_data.py)
+# ==========================================
+def _write_row(path, i, row):
+    with open(path, 'r+b') as f:
+        f.seek(i * row.nbytes)
+        f.write(row.tobytes())
+        f.truncate()
+
+
+def append_sequence(store_path, sign, keypoints, sequence=None, source=None, timestamps=None, sequence_id=None):
+    if not store_exists(store_path):
+        create_store(store_path, keypoints.shape[0], keypoints.shape[1])
+    meta = read_meta(store_path)
+
+    expected = (meta['sequence_length'], meta['num_features'])
+    if keypoints.shape != expected:
+        raise ValueError(f"Forma de secuencia {keypoints.shape} no coincide con el dataset {expected}")
+
+    if sign not in meta['actions']:
+        meta['actions'].append(sign)
+    label = meta['actions'].index(sign)
+    i = meta['count']
+
+    # Escribimos en la posición i (no al final del archivo) para pisar
+    # restos de un append previo que no llegó a confirmarse en meta.json
+    _write_row(os.path.join(store_path, KEYPOINTS_FILE), i, np.ascontiguousarray(keypoints, dtype=np.float32))
+    _write_row(os.path.join(store_path, LABELS_FILE), i, np.array([label], dtype=np.int32))
+
+    timestamps_path = os.path.join(store_path, TIMESTAMPS_FILE)
+    if not os.path.exists(timestamps_path):
+        # Store anterior a los timestamps: las secuencias previas quedan en NaN
+        np.full((i, meta['sequence_length']), np.nan, dtype=np.float32).tofile(timestamps_path)
+    if timestamps is None:
+        timestamps = np.full(meta['sequence_length'], np.nan, dtype=np.float32)
+    _write_row(timestamps_path, i, np.ascontiguousarray(timestamps, dtype=np.float32))
+
+    with open(os.path.join(store_path, INDEX_FILE), 'a') as f:
+        entry = {'i': i, 'sign': sign, 'sequence': sequence, 'source': source,
+                 'id': sequence_id or uuid.uuid4().hex}
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    meta['count'] = i + 1
+    _write_meta(store_path, meta)
+    return i
+
+
+# ==========================================
+# CONVERSIÓN ÚNICA DESDE dataset/<seña>/<n>/keypoints.npy
+# ==========================================
+def list_folder_sequences(data_path=DATA_PATH):
+    """[(seña, n, ruta de keypoints.npy)] del layout de carpetas, ordenado por seña y número (solo rutas)."""
+    if not os.path.isdir(data_path):
+        return []
+    files = []
+    for action in sorted([d for d in os.listdir(data_path) if os.path.isdir(os.path.join(data_path, d))]):
+        action_path = os.path.join(data_path, action)
+        for sequence in sorted([d for d in os.listdir(action_path) if d.isdigit()], key=int):
+            keypoints_file = os.path.join(action_path, sequence, "keypoints.npy")
+            if os.path.exists(keypoints_file):
+                files.append((action, int(sequence), keypoints_file))
+    return files
+
+
+def unconverted_folder_sequences(data_path=DATA_PATH, store_path=PACKED_PATH):
+    """Secuencias del layout de carpetas que no están en el store (por su ruta en index.jsonl)."""
+    files = list_folder_sequences(data_path)
+    if not files or not store_exists(store_path):
+        return files
+    known = {entry['source'] for entry in read_index(store_path) if entry}
+    return [item for item in files if os.path.relpath(item[2], data_path) not in known]
+
+
+def _load_folder_timestamps(keypoints_file, sequence_length):
+    # NaN para las secuencias grabadas antes de que el layout de carpetas guardara timestamps.npy
+    timestamps_file = os.path.join(os.path.dirname(keypoints_file), "timestamps.npy")
+    if os.path.exists(timestamps_file):
+        return np.load(timestamps_file)
+    return np.full(sequence_length, np.nan, dtype=np.float32)
+
+
+def import_folder_layout(data_path=DATA_PATH, store_path=PACKED_PATH):
+    """
+    Lleva al store las secuencias de carpetas que le falten: conversión completa si el store no
+    existe, append de las pendientes si ya existe. Devuelve cuántas se importaron.
+    """
+    pending = unconverted_folder_sequences(data_path, store_path)
+    if not pending:
+        return 0
+    if not store_exists(store_path):
+        return convert_folder_layout(data_path, store_path)['count']
+    imported = 0
+    for action, sequence, keypoints_file in pending:
+        try:
+            window = np.load(keypoints_file)
+            timestamps = _load_folder_timestamps(keypoints_file, window.shape[0])
+        except Exception as e:
+            print(f"Error cargando secuencia {sequence} de {action}: {e}")
+            continue
+        relpath = os.path.relpath(keypoints_file, data_path)
+        append_sequence(store_path, action, window, sequence=sequence, source=relpath, timestamps=timestamps,
+                        sequence_id=folder_sequence_id(relpath))
+        imported += 1
+    print(f"✅ {imported} secuencias de {data_path} agregadas a: {store_path}")
+    return imported
+
+
+def convert_folder_layout(data_path=DATA_PATH, store_path=PACKED_PATH, overwrite=False):
+    if store_exists(store_path):
+        if not overwrite:
+            raise FileExistsError(f"Ya existe {store_path}. Usa --overwrite para regenerarlo.")
+        for name in (KEYPOINTS_FILE, LABELS_FILE, TIMESTAMPS_FILE, INDEX_FILE, META_FILE):
+            path = os.path.join(store_path, name)
+            if os.path.exists(path): os.remove(path)
+
+    actions = sorted([d for d in os.listdir(data_path) if os.path.isdir(os.path.join(data_path, d))])
+    label_of = {action: label for label, action in enumerate(actions)}
+
+    # 1. Inventario (solo rutas, sin leer datos)
+    files = [(label_of[action], action, sequence, keypoints_file)
+             for action, sequence, keypoints_file in list_folder_sequences(data_path)]
+
+    meta = create_store(store_path)
+    meta['actions'] = actions
+    if not files:
+        _write_meta(store_path, meta)
+        print("⚠️ No se encontraron secuencias para convertir.")
+        return meta
+
+    # 2. Volcado directo a un memmap preasignado: nunca hay dos copias del corpus en RAM
+    shape = (len(files), meta['sequence_length'], meta['num_features'])
+    X = np.memmap(os.path.join(store_path, KEYPOINTS_FILE), dtype=np.float32, mode='w+', shape=shape)
+    labels = np.empty(len(files), dtype=np.int32)
+    timestamps = np.full((len(files), meta['sequence_length']), np.nan, dtype=np.float32)
+    n = 0
+    with open(os.path.join(store_path, INDEX_FILE), 'w') as index_file:
+        for label, action, sequence, keypoints_file in files:
+            try:
+                window = np.load(keypoints_file)
+                X[n] = window  # Cast float64 -> float32 sobre el propio memmap
+                timestamps[n] = _load_folder_timestamps(keypoints_file, meta['sequence_length'])
+            except Exception as e:
+                print(f"Error cargando secuencia {sequence} de {action}: {e}")
+                continue
+            labels[n] = label
+            relpath = os.path.relpath(keypoints_file, data_path)
+            entry = {'i': n, 'sign': action, 'sequence': sequence, 'source': relpath,
+                     'id': folder_sequence_id(relpath)}
+            index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            n += 1
+    X.flush()
+    del X
+
+    # Si se saltó alguna secuencia corrupta, recortamos el sobrante
+    row_bytes = meta['sequence_length'] * meta['num_features'] * 4
+    with open(os.path.join(store_path, KEYPOINTS_FILE), 'r+b') as f:
+        f.truncate(n * row_bytes)
+    labels[:n].tofile(os.path.join(store_path, LABELS_FILE))
+    timestamps[:n].tofile(os.path.join(store_path, TIMESTAMPS_FILE))
+
+    meta['count'] = n
+    _write_meta(store_path, meta)
+    print(f"✅ {n} secuencias de {len(actions)} señas empaquetadas en: {store_path}")
+    return meta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dataset empaquetado (memmap) de Se-alyze")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    convert = sub.add_parser('convert', help="Convierte dataset/<seña>/<n>/keypoints.npy al formato empaquetado")
+    convert.add_argument('--data-path', default=DATA_PATH)
+    convert.add_argument('--store-path', default=PACKED_PATH)
+    convert.add_argument('--overwrite', action='store_true')
+
+    import_cmd = sub.add_parser('import', help="Agrega al empaquetado las carpetas que todavía no tiene")
+    import_cmd.add_argument('--data-path', default=DATA_PATH)
+    import_cmd.add_argument('--store-path', default=PACKED_PATH)
+
+    info = sub.add_parser('info', help="Muestra el resumen del dataset empaquetado")
+    info.add_argument('--store-path', default=PACKED_PATH)
+
+    args = parser.parse_args()
+    if args.command == 'convert':
+        convert_folder_layout(args.data_path, args.store_path, overwrite=args.overwrite)
+    elif args.command == 'import':
+        if not import_folder_layout(args.data_path, args.store_path):
+            print("Nada que importar: todas las carpetas ya están en el dataset empaquetado.")
+    elif args.command == 'info':
+        meta = read_meta(args.store_path)
+        print(f"Secuencias: {meta['count']}  Forma: ({meta['count']}, {meta['sequence_length']}, {meta['num_features']})")
+        for action, count in count_sequences(args.store_path).items():
+            print(f"  {action}: {count}")
@@ -0,0 +1,343 @@
+"""
+Evaluación del modelo exportado (lsc_model.tflite + labels.txt) antes de enviarlo a la app.
+
+- Usa el split de prueba que guardó 2_train_local.py (SPLIT_PATH, por IDs de secuencia: las
+  secuencias agregadas después del entrenamiento no entran) o todo el dataset con --all, y
+  aplica feature_spec.json si existe junto al modelo.
+- Inferencia por batches redimensionando la entrada del intérprete ([B, L, F]). El modelo de
+  la app se exporta con batch fijo de 1: para el throughput se convierte una variante con
+  batch dinámico desde KERAS_MODEL_PATH (o --bench-model). Si aun así el batch no se puede
+  cambiar, la fila se mide con B invocaciones y el reporte guarda el error.
+- Reporta matriz de confusión, precisión/recall por clase, top-k, latencia por clase
+  (batch 1) y throughput en secuencias/s para cada batch y número de hilos.
+- Con --baseline compara contra un reporte anterior y falla si la precisión cae más de
+  ACCURACY_BUDGET o el throughput a batch 1 cae más de THROUGHPUT_BUDGET.
+
+Uso:
+    python python_scripts/evaluate_model.py --threads 1,4 --output evaluation_report.json
+    python python_scripts/evaluate_model.py --baseline evaluation_report.json
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import features
+import input_pipeline
+import keypoints as kp
+
+trainer = importlib.import_module('2_train_local')
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Se-alyze-Android', 'app', 'src', 'main', 'assets')
+MODEL_PATH = os.path.join(ASSETS_PATH, 'lsc_model.tflite')
+LABELS_PATH = os.path.join(ASSETS_PATH, 'labels.txt')
+BATCH_SIZES = (1, 2, 4, 8, 16, 32, 64)
+TOP_K = (1, 3, 5)
+WARMUP_BATCHES = 3
+MIN_TIMED_SEQUENCES = 256    # Si el set es más chico se repite hasta completar
+ACCURACY_BUDGET = trainer.ACCURACY_BUDGET
+THROUGHPUT_BUDGET = 0.10     # Caída relativa máxima de secuencias/s a batch 1
+
+
+# ==========================================
+# DATOS
+# ==========================================
+def load_labels(labels_path):
+    with open(labels_path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def load_eval_set(labels, input_shape, spec=None, use_all=False, split_path=trainer.SPLIT_PATH):
+    """(x, y) con y en el orden de labels.txt; se omiten señas que el modelo no conoce."""
+    source = input_pipeline.open_source(trainer.PACKED_PATH, trainer.DATA_PATH, trainer.COMPACT_PATH)
+    indices = np.arange(len(source))
+    if not use_all:
+        # Recalcular train_test_split sobre un dataset que creció mezclaría secuencias de entrenamiento
+        if not os.path.exists(split_path):
+            raise RuntimeError(f"No existe {split_path}: entrena con 2_train_local.py o evalúa con --all")
+        _, indices, new_idx = trainer.load_split(source, split_path)
+        if len(new_idx):
+            print(f"{len(new_idx)} secuencias agregadas después del entrenamiento no se evalúan")
+
+    model_index = {label: i for i, label in enumerate(labels)}
+    to_model = np.array([model_index.get(action, -1) for action in source.actions])
+    y = to_model[source.labels[indices]]
+    unknown = int(np.sum(y < 0))
+    if unknown:
+        print(f"⚠️ {unknown} secuencias de señas que no están en labels.txt se omiten")
+    indices, y = indices[y >= 0], y[y >= 0]
+
+    if spec is None:
+        x = source.read(indices)
+    else:
+        x = features.transform(source.read(indices, slice(kp.POSE_SIZE, kp.NUM_FEATURES)), spec)
+    # Modelos con menos frames (sweep.py): mismo submuestreo uniforme que en el entrenamiento
+    length = input_shape[1]
+    if length != x.shape[1]:
+        frames = np.round(np.linspace(0, x.shape[1] - 1, length)).astype(np.int64)
+        x = np.ascontiguousarray(x[:, frames])
+    if x.shape[2] != input_shape[2]:
+        raise ValueError(f"El modelo espera {input_shape[2]} features por frame y el dataset da {x.shape[2]}")
+    return x, y
+
+
+# ==========================================
+# INFERENCIA
+# ==========================================
+class BatchedInterpreter:
+    def __init__(self, model_path, num_threads=None):
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        details = self.interpreter.get_input_details()[0]
+        self.input_index = details['index']
+        self.input_shape = tuple(int(d) for d in details['shape'])
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self.batch = self.input_shape[0]
+        self.resizable = True
+        self.resize_error = None
+
+    def set_batch(self, batch):
+        if not self.resizable or batch == self.batch:
+            return self.batch
+        try:
+            self.interpreter.resize_tensor_input(self.input_index, (batch,) + self.input_shape[1:])
+            self.interpreter.allocate_tensors()
+            self.batch = batch
+            self.predict(np.zeros((batch,) + self.input_shape[1:], dtype=np.float32))
+        except (RuntimeError, ValueError) as e:
+            print(f"⚠️ El modelo no admite batch {batch} ({e}); se mide con invocaciones de batch 1")
+            self.resizable = False
+            self.resize_error = str(e)
+            self.interpreter.resize_tensor_input(self.input_index, self.input_shape)
+            self.interpreter.allocate_tensors()
+            self.batch = self.input_shape[0]
+        return self.batch
+
+    def predict(self, x):
+        """Probabilidades (len(x), C); x puede ser más largo que el batch actual."""
+        out = []
+        for start in range(0, len(x), self.batch):
+            chunk = x[start:start + self.batch]
+            if len(chunk) < self.batch:
+                chunk = np.concatenate([chunk, np.zeros((self.batch - len(chunk),) + chunk.shape[1:], np.float32)])
+            self.interpreter.set_tensor(self.input_index, chunk)
+            self.interpreter.invoke()
+            out.append(self.interpreter.get_tensor(self.output_index).copy())
+        return np.concatenate(out)[:len(x)]
+
+
+def measure_throughput(runner, x, batch):
+    """Secuencias/s y latencia media por batch con `batch` secuencias por invocación lógica."""
+    effective = runner.set_batch(batch)
+    repeats = int(np.ceil(max(MIN_TIMED_SEQUENCES, batch) / len(x)))
+    data = np.concatenate([x] * repeats) if repeats > 1 else x
+    data = data[:len(data) - len(data) % batch]  # Solo batches completos
+    for i in range(min(WARMUP_BATCHES, len(data) // batch)):
+        runner.predict(data[i * batch:(i + 1) * batch])
+
+    start = time.perf_counter()
+    for i in range(len(data) // batch):
+        runner.predict(data[i * batch:(i + 1) * batch])
+    elapsed = time.perf_counter() - start
+    batches = len(data) // batch
+    row = {
+        'batch': batch,
+        'native_batch': effective == batch,
+        'sequences_per_sec': len(data) / elapsed,
+        'batch_latency_ms': elapsed / batches * 1000,
+    }
+    if effective != batch:
+        row['resize_error'] = runner.resize_error
+    return row
+
+
+def benchmark_model(model_path, input_shape, work_dir, bench_path=None):
+    """
+    Modelo para medir throughput: el exportado si admite otro batch; si no, una variante con
+    batch dinámico convertida desde KERAS_MODEL_PATH (mismo modelo y cuantización dinámica que
+    la exportación por defecto) y escrita en work_dir, nunca junto al modelo (assets va en el
+    APK). None si no hay forma de obtenerla.
+    """
+    if bench_path:
+        return bench_path
+    probe = tf.lite.Interpreter(model_path=model_path)
+    input_index = probe.get_input_details()[0]['index']
+    try:
+        probe.resize_tensor_input(input_index, (2,) + tuple(input_shape[1:]))
+        probe.allocate_tensors()
+        probe.set_tensor(input_index, np.zeros((2,) + tuple(input_shape[1:]), dtype=np.float32))
+        probe.invoke()
+        return model_path
+    except (RuntimeError, ValueError) as e:
+        print(f"El modelo exportado tiene batch fijo ({e})")
+    if not os.path.exists(trainer.KERAS_MODEL_PATH):
+        print(f"⚠️ Sin {trainer.KERAS_MODEL_PATH} para convertir una variante de batch dinámico: "
+              "los batches > 1 se miden con invocaciones de batch 1")
+        return None
+    model = tf.keras.models.load_model(trainer.KERAS_MODEL_PATH)
+    if tuple(model.input_shape[1:]) != tuple(input_shape[1:]):
+        print(f"⚠️ {trainer.KERAS_MODEL_PATH} espera {model.input_shape[1:]} y el modelo {input_shape[1:]}: "
+              "los batches > 1 se miden con invocaciones de batch 1")
+        return None
+    try:
+        tflite_model = trainer.convert_builtins_only(model, input_shape[1], input_shape[2], batch_size=None)
+    except Exception as e:
+        # p. ej. el LSTM sin batch fijo no se fusiona en un op builtin
+        print(f"⚠️ No se pudo convertir la variante de batch dinámico ({e}): "
+              "los batches > 1 se miden con invocaciones de batch 1")
+        return None
+    path = os.path.join(work_dir, os.path.splitext(os.path.basename(model_path))[0] + '_dynamic_batch.tflite')
+    with open(path, 'wb') as f:
+        f.write(tflite_model)
+    print("Throughput medido con una variante de batch dinámico convertida desde " + trainer.KERAS_MODEL_PATH)
+    return path
+
+
+# ==========================================
+# MÉTRICAS
+# ==========================================
+def classification_metrics(probabilities, y, labels):
+    num_classes = len(labels)
+    predicted = np.argmax(probabilities, axis=1)
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    np.add.at(confusion, (y, predicted), 1)
+
+    # Posición de la clase correcta en el ranking de cada secuencia
+    ranks = np.sum(probabilities > probabilities[np.arange(len(y)), y][:, np.newaxis], axis=1)
+    support = confusion.sum(axis=1)
+    predicted_count = confusion.sum(axis=0)
+    hits = np.diag(confusion)
+    return {
+        'samples': int(len(y)),
+        'top_k': {str(k): float(np.mean(ranks < k)) for k in TOP_K if k <= num_classes},
+        'per_class': {
+            label: {
+                'support': int(support[i]),
+                'recall': float(hits[i] / support[i]) if support[i] else None,
+                'precision': float(hits[i] / predicted_count[i]) if predicted_count[i] else None,
+            }
+            for i, label in enumerate(labels)
+        },
+        'confusion': confusion.tolist(),
+    }
+
+
+def per_class_latency(runner, x, y, labels):
+    """Latencia de una secuencia (batch 1) agrupada por clase verdadera."""
+    runner.set_batch(1)
+    latencies = np.empty(len(x))
+    for i in range(len(x)):
+        start = time.perf_counter()
+        runner.predict(x[i:i + 1])
+        latencies[i] = time.perf_counter() - start
+    return {labels[c]: float(latencies[y == c].mean() * 1000) for c in np.unique(y)}
+
+
+def evaluate(model_path=MODEL_PATH, labels_path=LABELS_PATH, threads=(None,), batch_sizes=BATCH_SIZES, use_all=False,
+             split_path=trainer.SPLIT_PATH, bench_path=None):
+    labels = load_labels(labels_path)
+    spec_path = os.path.join(os.path.dirname(model_path), 'feature_spec.json')
+    spec = features.load_spec(spec_path) if os.path.exists(spec_path) else None
+
+    runner = BatchedInterpreter(model_path, threads[0])
+    x, y = load_eval_set(labels, runner.input_shape, spec, use_all, split_path)
+    if not len(x):
+        raise ValueError("No hay secuencias para evaluar")
+    print(f"Evaluando {len(x)} secuencias, {len(labels)} clases, entrada {runner.input_shape}")
+
+    # Precisión y latencia por clase con el modelo exportado tal cual (batch 1)
+    report = {
+        'model': os.path.abspath(model_path),
+        'model_bytes': os.path.getsize(model_path),
+        'feature_spec': spec,
+        **classification_metrics(runner.predict(x), y, labels),
+        'latency_per_class_ms': per_class_latency(runner, x, y, labels),
+        'throughput': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='lsc_bench_') as work_dir:
+        throughput_path = benchmark_model(model_path, runner.input_shape, work_dir, bench_path) or model_path
+        # La variante temporal se borra al terminar: el reporte dice de dónde salió
+        converted = os.path.dirname(throughput_path) == work_dir
+        report['throughput_model'] = (f"{trainer.KERAS_MODEL_PATH} (batch dinámico)" if converted
+                                      else os.path.abspath(throughput_path))
+        for num_threads in threads:
+            runner = BatchedInterpreter(throughput_path, num_threads)
+            report['throughput'][str(num_threads or 'default')] = [measure_throughput(runner, x, b) for b in batch_sizes]
+    return report
+
+
+def print_report(report, labels):
+    print(f"\nTop-k: " + ", ".join(f"top-{k} {v:.1%}" for k, v in report['top_k'].items()))
+    worst = sorted(((r['recall'], label) for label, r in report['per_class'].items() if r['recall'] is not None))[:10]
+    print("Clases con menor recall: " + ", ".join(f"{label} {recall:.0%}" for recall, label in worst))
+
+    confusion = np.array(report['confusion'])
+    np.fill_diagonal(confusion, 0)
+    pairs = np.dstack(np.unravel_index(np.argsort(confusion, axis=None)[::-1], confusion.shape))[0]
+    confused = [f"{labels[a]} -> {labels[b]} ({confusion[a, b]})" for a, b in pairs[:10] if confusion[a, b]]
+    if confused:
+        print("Confusiones más frecuentes: " + ", ".join(confused))
+
+    print(f"\n{'Hilos':>7} {'Batch':>6} {'Seq/s':>10} {'ms/batch':>10}")
+    for num_threads, rows in report['throughput'].items():
+        for r in rows:
+            note = '' if r['native_batch'] else f" (batch 1 x B: {r.get('resize_error')})"
+            print(f"{num_threads:>7} {r['batch']:>6} {r['sequences_per_sec']:>10.1f} {r['batch_latency_ms']:>10.3f}{note}")
+
+
+def compare_with_baseline(report, baseline):
+    """Lista de regresiones respecto a un reporte anterior (vacía si no hay)."""
+    regressions = []
+    accuracy, previous = report['top_k']['1'], baseline['top_k']['1']
+    print(f"\nTop-1: {previous:.1%} -> {accuracy:.1%}")
+    if accuracy < previous - ACCURACY_BUDGET:
+        regressions.append(f"top-1 cae {previous - accuracy:.1%} (presupuesto {ACCURACY_BUDGET:.1%})")
+
+    for num_threads, rows in report['throughput'].items():
+        old_rows = {r['batch']: r for r in baseline.get('throughput', {}).get(num_threads, [])}
+        new_rows = {r['batch']: r for r in rows}
+        if 1 in old_rows and 1 in new_rows:
+            old, new = old_rows[1]['sequences_per_sec'], new_rows[1]['sequences_per_sec']
+            print(f"Batch 1, hilos {num_threads}: {old:.1f} -> {new:.1f} seq/s")
+            if new < old * (1 - THROUGHPUT_BUDGET):
+                regressions.append(f"throughput batch 1 (hilos {num_threads}) cae {1 - new / old:.0%}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluación del modelo TFLite exportado")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--labels', default=LABELS_PATH)
+    parser.add_argument('--threads', default='1', help="Lista de hilos del intérprete, p. ej. 1,2,4 (0 = por defecto)")
+    parser.add_argument('--batch-sizes', default=','.join(str(b) for b in BATCH_SIZES))
+    parser.add_argument('--all', action='store_true', help="Evaluar todo el dataset, no solo el split de prueba")
+    parser.add_argument('--split', default=trainer.SPLIT_PATH, help="Split guardado por 2_train_local.py")
+    parser.add_argument('--bench-model', help="Modelo con batch dinámico para medir throughput")
+    parser.add_argument('--output', default='evaluation_report.json')
+    parser.add_argument('--baseline', help="Reporte anterior para detectar regresiones")
+    args = parser.parse_args()
+
+    threads = [int(t) or None for t in args.threads.split(',')]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(',')]
+    report = evaluate(args.model, args.labels, threads, batch_sizes, args.all, args.split, args.bench_model)
+    print_report(report, load_labels(args.labels))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare_with_baseline(report, json.load(f))
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✅ Reporte guardado en: {args.output}")
+    if regressions:
+        print("❌ Regresiones: " + "; ".join(regressions))
+        sys.exit(1)
@@ -0,0 +1,297 @@
+"""
+Extracción offline de landmarks desde videos grabados (Fase B del plan de entrenamiento).
+
+Recorre un directorio de videos (<videos>/<seña>/*.mov, como los '_clean_video.mov' que
+guarda 1_collect_data.py) y los reparte en un pool de procesos. Cada video se procesa con
+una instancia nueva de Holistic (el tracking no arrastra estado entre videos) y se
+decodifica en un hilo aparte con una cola acotada (prefetch) mientras MediaPipe procesa.
+Las secuencias salen en el mismo layout de extract_keypoints (258 features, padding hasta
+SEQUENCE_LENGTH), extraídas por bloques con keypoints.extract_sequence.
+
+Los cortes entre secuencias salen del manifiesto .jsonl que el recolector escribe junto
+al video limpio (frames de cada secuencia); si el número de frames no cuadra con el
+manifiesto el video se rechaza en lugar de adivinar. Un video sin manifiesto se toma como
+una sola secuencia de MIN_LENGTH a SEQUENCE_LENGTH frames.
+
+Con --legacy-chunks se reprocesan también los videos anteriores al manifiesto: los
+'_raw_video.mov' sin video limpio al lado (llevan los landmarks dibujados, que es todo lo
+que se guardó) y cualquier video sin manifiesto se cortan en bloques fijos de
+SEQUENCE_LENGTH frames; el resto final se guarda si tiene al menos MIN_LENGTH frames.
+
+Las secuencias van por defecto al dataset empaquetado que lee 2_train_local.py (PACKED_PATH).
+Las que el recolector ya guardó en vivo (misma seña y número de secuencia) no se duplican;
+los bloques de --legacy-chunks no tienen número y conviene extraerlos a un store nuevo
+(--store-path) si sus señas ya están en el empaquetado.
+El proceso principal es el único que escribe en el store (dataset_store), y el progreso
+se guarda por video, así que una ejecución interrumpida se puede reanudar.
+
+Uso:
+    python python_scripts/extract_landmarks.py --videos-dir dataset --workers 8
+    python python_scripts/extract_landmarks.py --legacy-chunks --store-path dataset_reextracted
+"""
+import argparse
+import json
+import multiprocessing as mp_proc
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+import dataset_store
+import keypoints as kp
+import recording
+
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+VIDEOS_PATH = dataset_store.DATA_PATH
+OUTPUT_PATH = dataset_store.PACKED_PATH  # El que usa 2_train_local.py
+VIDEO_EXTENSIONS = ('.mov', '.mp4', '.avi', '.mkv')
+PREFETCH_FRAMES = 64       # Frames decodificados por adelantado (por worker)
+PROGRESS_FILE = 'extract_progress.json'
+ANNOTATED_SUFFIX = '_raw_video.mov'   # Video con overlay del recolector: solo con --legacy-chunks
+CLEAN_SUFFIX = '_clean_video.mov'
+
+SEQUENCE_LENGTH = recording.SEQUENCE_LENGTH
+MIN_LENGTH = recording.MIN_LENGTH
+
+# Estado propio de cada proceso worker
+_prefetch = PREFETCH_FRAMES
+
+
+def find_videos(videos_dir, legacy=False):
+    """
+    Videos a procesar. Un '_raw_video.mov' solo entra con legacy=True y si no hay un video
+    limpio de la misma seña (el limpio tiene los mismos frames sin el overlay).
+    """
+    videos, skipped = [], 0
+    for root, _, files in os.walk(videos_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(VIDEO_EXTENSIONS): continue
+            if name.endswith(ANNOTATED_SUFFIX):
+                if name[:-len(ANNOTATED_SUFFIX)] + CLEAN_SUFFIX in files: continue
+                if not legacy:
+                    skipped += 1
+                    continue
+            videos.append(os.path.join(root, name))
+    if skipped:
+        print(f"⚠️ {skipped} videos '{ANNOTATED_SUFFIX}' sin video limpio se omiten; "
+              "usa --legacy-chunks para reprocesarlos")
+    return sorted(videos)
+
+
+def sequence_plan(path):
+    """Entradas {"sequence", "frames", "saved"} del manifiesto del recolector, o None si no hay."""
+    manifest_path = recording.video_manifest_path(path)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _video_key(path, videos_dir):
+    stat = os.stat(path)
+    return os.path.relpath(path, videos_dir), {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+# ==========================================
+# WORKER
+# ==========================================
+def _init_worker(prefetch):
+    global _prefetch
+    _prefetch = prefetch
+    # Un solo hilo de OpenCV por proceso: el paralelismo lo da el pool
+    cv2.setNumThreads(1)
+
+
+def _decode_frames(path, frames_queue, stop_event):
+    cap = cv2.VideoCapture(path)
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret: break
+            frames_queue.put(frame)  # Bloquea si la cola está llena (memoria acotada)
+    finally:
+        cap.release()
+        frames_queue.put(None)
+
+
+def _read_results(frames_queue, holistic, count):
+    """Procesa hasta `count` frames de la cola (menos si el video termina antes)."""
+    results = []
+    while len(results) < count:
+        frame = frames_queue.get()
+        if frame is None: break
+        # Solo necesitamos RGB para MediaPipe, no la imagen de vuelta en BGR
+        image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        results.append(holistic.process(image))
+    return results
+
+
+def process_video(task):
+    path, plan, legacy = task
+    frames_queue = queue.Queue(maxsize=_prefetch)
+    stop_event = threading.Event()
+    reader = threading.Thread(target=_decode_frames, args=(path, frames_queue, stop_event), daemon=True)
+    reader.start()
+
+    start_time = time.time()
+    frames = 0
+    sequences = []
+    try:
+        # Instancia nueva por video: el modo tracking no debe arrastrar landmarks de otro video
+        with recording.mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
+            if plan is None and legacy:
+                # Video anterior al manifiesto: bloques fijos de SEQUENCE_LENGTH frames
+                while True:
+                    chunk = _read_results(frames_queue, holistic, SEQUENCE_LENGTH)
+                    frames += len(chunk)
+                    if len(chunk) >= MIN_LENGTH:
+                        sequences.append((None, kp.extract_sequence(chunk, sequence_length=SEQUENCE_LENGTH)[0]))
+                    if len(chunk) < SEQUENCE_LENGTH: break
+            elif plan is None:
+                # Sin manifiesto: el video entero es una secuencia
+                chunk = _read_results(frames_queue, holistic, SEQUENCE_LENGTH + 1)
+                frames = len(chunk)
+                if not MIN_LENGTH <= frames <= SEQUENCE_LENGTH:
+                    return {'path': path, 'error': f"{frames} frames sin manifiesto "
+                                                   f"(se esperaba una secuencia de {MIN_LENGTH}-{SEQUENCE_LENGTH}; "
+                                                   f"--legacy-chunks lo corta en bloques)"}
+                sequences.append((0, kp.extract_sequence(chunk, sequence_length=SEQUENCE_LENGTH)[0]))
+            else:
+                for entry in plan:
+                    if entry['frames'] > SEQUENCE_LENGTH:
+                        return {'path': path, 'error': f"secuencia {entry['sequence']}: {entry['frames']} frames "
+                                                       f"en el manifiesto (máximo {SEQUENCE_LENGTH})"}
+                    chunk = _read_results(frames_queue, holistic, entry['frames'])
+                    frames += len(chunk)
+                    if len(chunk) < entry['frames']:
+                        return {'path': path, 'error': f"el video termina en la secuencia {entry['sequence']} "
+                                                       f"({frames} frames, el manifiesto espera "
+                                                       f"{sum(e['frames'] for e in plan)})"}
+                    # Las secuencias que el recolector descartó (muy cortas) solo se saltan
+                    if entry['saved'] and len(chunk) >= MIN_LENGTH:
+                        sequences.append((entry['sequence'],
+                                          kp.extract_sequence(chunk, sequence_length=SEQUENCE_LENGTH)[0]))
+                extra = _read_results(frames_queue, holistic, 1)
+                if extra:
+                    return {'path': path, 'error': f"el video tiene más frames que los {frames} del manifiesto"}
+    except Exception as e:
+        return {'path': path, 'error': str(e)}
+    finally:
+        stop_event.set()
+        # Vaciar la cola para que el lector no quede bloqueado en put()
+        while reader.is_alive():
+            try:
+                frames_queue.get_nowait()
+            except queue.Empty:
+                time.sleep(0.01)
+
+    return {
+        'path': path,
+        'frames': frames,
+        'sequences': sequences,
+        'seconds': time.time() - start_time,
+    }
+
+
+# ==========================================
+# ORQUESTACIÓN
+# ==========================================
+def _load_progress(store_path):
+    progress_path = os.path.join(store_path, PROGRESS_FILE)
+    if os.path.exists(progress_path):
+        with open(progress_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_progress(store_path, progress):
+    progress_path = os.path.join(store_path, PROGRESS_FILE)
+    tmp_path = progress_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, progress_path)
+
+
+def extract_all(videos_dir=VIDEOS_PATH, store_path=OUTPUT_PATH, workers=None, prefetch=PREFETCH_FRAMES, legacy=False):
+    workers = workers or os.cpu_count()
+    os.makedirs(store_path, exist_ok=True)
+    progress = _load_progress(store_path)
+
+    # Secuencias ya escritas en el store: por si se cortó a mitad de un video, y las que el
+    # recolector guardó en vivo (misma seña y número) para no duplicarlas
+    written_sources, written_sequences = set(), set()
+    if dataset_store.store_exists(store_path):
+        for entry in dataset_store.read_index(store_path):
+            if not entry: continue
+            written_sources.add(entry['source'])
+            if entry['sequence'] is not None:
+                written_sequences.add((entry['sign'], entry['sequence']))
+    stored_signs = set(dataset_store.count_sequences(store_path))
+
+    pending = []
+    for path in find_videos(videos_dir, legacy):
+        rel_path, signature = _video_key(path, videos_dir)
+        done = progress.get(rel_path)
+        if done and done['size'] == signature['size'] and done['mtime'] == signature['mtime']:
+            continue
+        pending.append((path, sequence_plan(path), legacy))
+
+    print(f"🎞️  {len(pending)} videos pendientes ({len(progress)} ya procesados). Workers: {workers}")
+    if not pending: return
+
+    start_time = time.time()
+    total_frames = 0
+    with mp_proc.Pool(processes=workers, initializer=_init_worker, initargs=(prefetch,)) as pool:
+        for n, result in enumerate(pool.imap_unordered(process_video, pending), start=1):
+            rel_path, signature = _video_key(result['path'], videos_dir)
+            if 'error' in result:
+                print(f"❌ [{n}/{len(pending)}] {rel_path}: {result['error']}")
+                continue
+
+            # La seña es la carpeta que contiene el video
+            sign = os.path.basename(os.path.dirname(result['path']))
+            duplicates = 0
+            for n_chunk, (sequence, window) in enumerate(result['sequences']):
+                source = f"{rel_path}#{sequence}" if sequence is not None else f"{rel_path}#chunk{n_chunk}"
+                if source in written_sources: continue
+                if (sign, sequence) in written_sequences:
+                    duplicates += 1
+                    continue
+                dataset_store.append_sequence(store_path, sign, window, sequence=sequence, source=source)
+            if duplicates:
+                print(f"   {duplicates} secuencias de '{sign}' ya estaban en el store (grabadas en vivo)")
+            if sign in stored_signs and any(sequence is None for sequence, _ in result['sequences']):
+                print(f"⚠️ '{sign}' ya tenía secuencias en {store_path}: los bloques de {rel_path} pueden duplicarlas")
+
+            signature['sequences'] = len(result['sequences'])
+            progress[rel_path] = signature
+            _save_progress(store_path, progress)
+
+            total_frames += result['frames']
+            fps = result['frames'] / max(result['seconds'], 1e-6)
+            print(f"✅ [{n}/{len(pending)}] {rel_path}: {result['frames']} frames -> "
+                  f"{len(result['sequences'])} secuencias ({fps:.1f} FPS)")
+
+    elapsed = time.time() - start_time
+    print(f"¡Extracción completa! {total_frames} frames en {elapsed:.1f}s "
+          f"({total_frames / max(elapsed, 1e-6):.1f} FPS agregados)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extracción offline de landmarks con un pool de procesos")
+    parser.add_argument('--videos-dir', default=VIDEOS_PATH)
+    parser.add_argument('--store-path', default=OUTPUT_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_FRAMES)
+    parser.add_argument('--legacy-chunks', action='store_true',
+                        help=f"Cortar en bloques de {SEQUENCE_LENGTH} frames los videos sin manifiesto "
+                             f"(incluye '{ANNOTATED_SUFFIX}' sin video limpio)")
+    args = parser.parse_args()
+
+    extract_all(args.videos_dir, args.store_path, args.workers, args.prefetch, args.legacy_chunks)
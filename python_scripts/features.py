@@ -0,0 +1,323 @@
+"""
+Normalización de landmarks e ingeniería de features, vectorizada sobre todo el corpus.
+
+Para cada mano y cada frame:
+    rel      -> 20 landmarks relativos a la muñeca, divididos por el tamaño de la palma
+                (distancia muñeca -> MCP del dedo medio, landmark 9). La muñeca relativa a
+                sí misma es siempre 0, así que se descarta (y z opcionalmente).
+    wrist    -> posición de la muñeca: en coordenadas de imagen ('wrist') o relativa al
+                centro de los hombros y dividida por su ancho ('shoulders', requiere pose)
+    vel      -> (opcional) diferencia con el frame anterior de rel + wrist
+    present  -> 1 si la mano fue detectada
+Las manos ausentes quedan en cero, como en el layout crudo.
+
+El transform se describe con un spec JSON pequeño que se exporta a los assets de Android
+(feature_spec.json). Solo la referencia 'wrist' se puede replicar en la app (HandLandmarker
+no da pose). El spec incluye un fixture de entrada/salida que FeatureTransform.kt verifica
+al cargar, para que las dos implementaciones no diverjan: frames reales con ambas manos,
+con una sola y consecutivos (velocidad). parity_check() compara además el transform
+vectorizado con reference_transform(), el mismo algoritmo frame a frame que el Kotlin.
+
+Uso (verificación sin entrenar):
+    python python_scripts/features.py check
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import dataset_store
+import keypoints as kp
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+SPEC_VERSION = 1
+DEFAULT_SPEC = {
+    'reference': 'wrist',   # 'wrist' (replicable en Android) o 'shoulders' (solo escritorio)
+    'drop_z': True,         # La z de las manos es relativa a la muñeca y muy ruidosa
+    'velocity': False,
+    'palm_eps': 1e-6,
+}
+FEATURE_CACHE_PATH = os.path.join(dataset_store.BASE_PATH, 'dataset_features')
+PRECOMPUTE_CHUNK = 4096
+FIXTURE_FRAMES = 4
+FIXTURE_SCAN = 1024       # Secuencias revisadas para armar el fixture con datos reales
+PARITY_ATOL = 1e-5
+PARITY_SEQUENCES = 64     # Secuencias del dataset para parity_check()
+
+MIDDLE_MCP = 9
+LEFT_SHOULDER, RIGHT_SHOULDER = 11, 12
+
+
+def hand_block_size(spec):
+    static = (kp.HAND_LANDMARKS - 1) * (2 if spec['drop_z'] else 3) + 2
+    return static * (2 if spec['velocity'] else 1) + 1
+
+
+def output_size(spec):
+    return 2 * hand_block_size(spec)
+
+
+def requires_pose(spec):
+    return spec['reference'] == 'shoulders'
+
+
+def transform(X, spec=DEFAULT_SPEC):
+    """
+    X: (N, L, 258) Holistic completo o (N, L, 126) solo manos.
+    Devuelve (N, L, output_size(spec)) float32 con bloques [LH | RH] de
+    [rel | wrist | vel? | present].
+    """
+    X = np.asarray(X, dtype=np.float32)
+    n, length, num_features = X.shape
+    hands_start = kp.POSE_SIZE if num_features == kp.NUM_FEATURES else 0
+    if requires_pose(spec) and hands_start == 0:
+        raise ValueError("La referencia 'shoulders' necesita la pose (entrada de 258 features)")
+
+    hands = X[:, :, hands_start:hands_start + 2 * kp.HAND_SIZE].reshape(n, length, 2, kp.HAND_LANDMARKS, 3)
+    present = np.any(hands != 0, axis=(-2, -1))                       # (N, L, 2)
+    wrist = hands[:, :, :, 0, :]                                      # (N, L, 2, 3)
+
+    palm = np.linalg.norm(hands[:, :, :, MIDDLE_MCP, :2] - wrist[..., :2], axis=-1)
+    palm = np.where(palm > spec['palm_eps'], palm, 1.0)
+    rel = (hands[:, :, :, 1:, :] - wrist[:, :, :, np.newaxis, :]) / palm[..., np.newaxis, np.newaxis]
+    if spec['drop_z']:
+        rel = rel[..., :2]
+
+    if requires_pose(spec):
+        pose = X[:, :, :kp.POSE_SIZE].reshape(n, length, kp.POSE_LANDMARKS, 4)
+        left, right = pose[:, :, LEFT_SHOULDER, :2], pose[:, :, RIGHT_SHOULDER, :2]
+        pose_present = np.any(pose != 0, axis=(-2, -1))[..., np.newaxis]
+        width = np.linalg.norm(left - right, axis=-1, keepdims=True)
+        # Sin pose en el frame: centro de la imagen y escala 1
+        center = np.where(pose_present, (left + right) / 2, 0.5)
+        width = np.where(pose_present & (width > spec['palm_eps']), width, 1.0)
+        wrist_pos = (wrist[..., :2] - center[:, :, np.newaxis, :]) / width[:, :, np.newaxis, :]
+    else:
+        wrist_pos = wrist[..., :2]
+
+    static = np.concatenate([rel.reshape(n, length, 2, -1), wrist_pos], axis=-1)
+    static *= present[..., np.newaxis]
+    parts = [static]
+    if spec['velocity']:
+        vel = np.zeros_like(static)
+        both = (present[:, 1:] & present[:, :-1])[..., np.newaxis]
+        vel[:, 1:] = (static[:, 1:] - static[:, :-1]) * both
+        parts.append(vel)
+    parts.append(present[..., np.newaxis].astype(np.float32))
+    return np.concatenate(parts, axis=-1).reshape(n, length, -1).astype(np.float32)
+
+
+# ==========================================
+# PRECÁLCULO SOBRE EL CORPUS (una vez, con caché)
+# ==========================================
+def spec_hash(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:10]
+
+
+def precompute(source, spec=DEFAULT_SPEC, cache_path=FEATURE_CACHE_PATH):
+    """
+    Calcula las features de todo el corpus por bloques y las guarda en un memmap.
+    Devuelve (ruta, forma). La clave es spec + huella del contenido de `source`
+    (source.fingerprint): reconvertir o cambiar de store invalida la caché aunque el
+    número de secuencias sea el mismo.
+    """
+    shape = (len(source), source.sequence_length, output_size(spec))
+    os.makedirs(cache_path, exist_ok=True)
+    prefix = os.path.join(cache_path, f"features_{spec_hash(spec)}_")
+    path = f"{prefix}{source.fingerprint}.f32"
+    if os.path.exists(path) and os.path.getsize(path) == int(np.prod(shape)) * 4:
+        return path, shape
+    # Cachés del mismo spec sobre contenido anterior: ya no sirven
+    for stale in glob.glob(prefix + '*.f32'):
+        os.remove(stale)
+
+    # Solo se lee la pose si el spec la necesita
+    columns = slice(None) if requires_pose(spec) else slice(kp.POSE_SIZE, kp.NUM_FEATURES)
+    out = np.memmap(path + '.tmp', dtype=np.float32, mode='w+', shape=shape)
+    for start in range(0, len(source), PRECOMPUTE_CHUNK):
+        idx = np.arange(start, min(start + PRECOMPUTE_CHUNK, len(source)))
+        out[idx] = transform(source.read(idx, columns), spec)
+    out.flush()
+    del out
+    os.replace(path + '.tmp', path)
+    print(f"Features precalculadas: {shape} -> {path}")
+    return path, shape
+
+
+# ==========================================
+# EXPORTACIÓN PARA ANDROID
+# ==========================================
+def _hand_presence(raw):
+    """raw: (..., 126). Presencia (..., 2) de [LH, RH]."""
+    return np.any(raw.reshape(raw.shape[:-1] + (2, kp.HAND_SIZE)) != 0, axis=-1)
+
+
+def fixture_covers(raw):
+    """True si el fixture ejercita ambas manos, una mano ausente y la velocidad (dos frames seguidos con manos)."""
+    present = _hand_presence(raw)
+    both = present.all(-1)
+    return bool(both.any() and (present.sum(-1) == 1).any() and (both[1:] & both[:-1]).any())
+
+
+def synthetic_fixture(seed=0):
+    rng = np.random.default_rng(seed)
+    raw = rng.random((FIXTURE_FRAMES, 2 * kp.HAND_SIZE)).astype(np.float32)
+    raw[2, :kp.HAND_SIZE] = 0.0  # Frames 0-1 con ambas manos (velocidad), 2 sin mano izquierda
+    return raw
+
+
+def fixture_input(source=None):
+    """
+    (FIXTURE_FRAMES, 126) para el fixture: dos frames consecutivos con ambas manos, uno con una
+    sola mano y otro con ambas, tomados del dataset. Sintético si el dataset no tiene esos casos
+    (el inicio de las secuencias suele venir sin manos, y un fixture en ceros no verifica nada).
+    """
+    if source is None or not len(source):
+        return synthetic_fixture()
+    idx = np.arange(min(len(source), FIXTURE_SCAN))
+    hands = source.read(idx, slice(kp.POSE_SIZE, kp.NUM_FEATURES))
+    present = _hand_presence(hands)
+    both = present.all(-1)
+    pairs = np.argwhere(both[:, 1:] & both[:, :-1])
+    singles = np.argwhere(present.sum(-1) == 1)
+    if not len(pairs) or not len(singles):
+        print("⚠️ El dataset no tiene frames con ambas manos y con una sola: fixture sintético")
+        return synthetic_fixture()
+    (s, t), single, last = pairs[0], singles[0], pairs[-1]
+    return np.stack([hands[s, t], hands[s, t + 1], hands[single[0], single[1]], hands[last[0], last[1] + 1]])
+
+
+def export_spec(spec, path, fixture_source=None):
+    """Escribe feature_spec.json con un fixture (entrada cruda de manos -> salida esperada)."""
+    if requires_pose(spec):
+        raise ValueError("La referencia 'shoulders' no se puede replicar en Android (sin pose)")
+    raw = fixture_input(fixture_source)
+    expected = transform(raw[np.newaxis], spec)[0]
+
+    document = {
+        'version': SPEC_VERSION,
+        'input': 'hands',
+        'input_size': 2 * kp.HAND_SIZE,
+        **spec,
+        'output_size': output_size(spec),
+        'fixture': {'input': raw.tolist(), 'output': expected.tolist(), 'atol': PARITY_ATOL},
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=1)
+    return document
+
+
+def load_spec(path):
+    with open(path, 'r') as f:
+        document = json.load(f)
+    return {key: document[key] for key in DEFAULT_SPEC}
+
+
+def check_fixture(path):
+    """
+    Recalcula el fixture de un feature_spec.json exportado (misma verificación que la app), con
+    el transform vectorizado y con reference_transform(). False también si el fixture no cubre
+    manos presentes / ausentes / velocidad.
+    """
+    with open(path, 'r') as f:
+        document = json.load(f)
+    raw = np.array(document['fixture']['input'], dtype=np.float32)
+    expected = np.array(document['fixture']['output'], dtype=np.float32)
+    spec, atol = load_spec(path), document['fixture']['atol']
+    if not fixture_covers(raw):
+        return False
+    for got in (transform(raw[np.newaxis], spec)[0], reference_transform(raw, spec)):
+        if float(np.max(np.abs(got - expected))) > atol:
+            return False
+    return True
+
+
+# ==========================================
+# PARIDAD CON FeatureTransform.kt
+# ==========================================
+def reference_transform(raw, spec=DEFAULT_SPEC):
+    """
+    raw: (L, 126). El algoritmo de FeatureTransform.apply(), frame a frame y mano a mano,
+    sin vectorizar: referencia para verificar transform() contra el código de la app.
+    """
+    coords = 2 if spec['drop_z'] else 3
+    static_size = (kp.HAND_LANDMARKS - 1) * coords + 2
+    block = hand_block_size(spec)
+    out = np.zeros((len(raw), 2 * block), dtype=np.float32)
+    for t, row in enumerate(np.asarray(raw, dtype=np.float32)):
+        for hand in range(2):
+            base, start = hand * kp.HAND_SIZE, hand * block
+            landmarks = row[base:base + kp.HAND_SIZE]
+            if not np.any(landmarks != 0):
+                continue
+            wx, wy, wz = landmarks[0:3]
+            dx, dy = landmarks[MIDDLE_MCP * 3] - wx, landmarks[MIDDLE_MCP * 3 + 1] - wy
+            palm = np.float32(np.sqrt(dx * dx + dy * dy))
+            if palm <= spec['palm_eps']: palm = np.float32(1.0)
+            o = start
+            for k in range(1, kp.HAND_LANDMARKS):
+                out[t, o] = (landmarks[k * 3] - wx) / palm
+                out[t, o + 1] = (landmarks[k * 3 + 1] - wy) / palm
+                if not spec['drop_z']:
+                    out[t, o + 2] = (landmarks[k * 3 + 2] - wz) / palm
+                o += coords
+            out[t, o], out[t, o + 1] = wx, wy
+            out[t, start + block - 1] = 1.0
+    if spec['velocity']:
+        for t in range(1, len(out)):
+            for hand in range(2):
+                start, flag = hand * block, hand * block + block - 1
+                if out[t, flag] and out[t - 1, flag]:
+                    out[t, start + static_size:start + 2 * static_size] = (
+                        out[t, start:start + static_size] - out[t - 1, start:start + static_size])
+    return out
+
+
+def parity_check(spec=DEFAULT_SPEC, source=None, atol=PARITY_ATOL):
+    """
+    Compara transform() con reference_transform() sobre el fixture y sobre PARITY_SEQUENCES
+    secuencias del dataset (o sintéticas), y la entrada de 258 con la de 126 features.
+    Devuelve la diferencia máxima; lanza AssertionError si supera atol.
+    """
+    samples = [fixture_input(source)]
+    if source is not None and len(source):
+        raw = source.read(np.arange(min(len(source), PARITY_SEQUENCES)), slice(None))
+        if raw.shape[-1] == kp.NUM_FEATURES:
+            hands = raw[:, :, kp.POSE_SIZE:]
+            if not np.array_equal(transform(raw, spec), transform(hands, spec)):
+                raise AssertionError("transform() da resultados distintos con 258 y con 126 features")
+            samples.extend(hands)
+    else:
+        samples.append(synthetic_fixture(seed=1))
+
+    max_diff = 0.0
+    for raw in samples:
+        got = transform(raw[np.newaxis], spec)[0]
+        max_diff = max(max_diff, float(np.max(np.abs(got - reference_transform(raw, spec)))))
+    if max_diff > atol:
+        raise AssertionError(f"transform() y reference_transform() difieren en {max_diff:.2e} (> {atol})")
+    return max_diff
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificación del transform de features")
+    parser.add_argument('command', choices=['check'])
+    parser.add_argument('--spec', help="feature_spec.json exportado (por defecto DEFAULT_SPEC)")
+    parser.add_argument('--no-dataset', action='store_true', help="Solo datos sintéticos")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec) if args.spec else DEFAULT_SPEC
+    source = None
+    if not args.no_dataset:
+        import input_pipeline  # Importa TensorFlow: solo para leer el dataset
+        source = input_pipeline.open_source()
+    print(f"Paridad transform / referencia: diferencia máx {parity_check(spec, source):.2e}")
+    for velocity in (False, True):
+        parity_check({**spec, 'velocity': velocity}, source)
+    if args.spec:
+        print(f"Fixture de {args.spec}: {'OK' if check_fixture(args.spec) else 'NO COINCIDE o no cubre los casos'}")
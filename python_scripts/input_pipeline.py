@@ -0,0 +1,265 @@
+"""
+Pipeline de entrada tf.data para 2_train_local.py.
+
+- SequenceSource lee las secuencias de forma perezosa (dataset compacto, memmap del
+  dataset empaquetado o archivos keypoints.npy) y solo copia las columnas pedidas: las 126 de manos, sin la
+  pose, nunca se materializa el corpus completo.
+- open_feature_source() sustituye las coordenadas crudas por las features normalizadas de
+  features.py, calculadas una sola vez para todo el corpus y guardadas en un memmap.
+- make_dataset() lee por bloques en paralelo, cachea opcionalmente, baraja, agrupa en
+  batches y aplica aumentaciones vectorizadas sobre el batch entero (TensorFlow ops):
+  espejo izquierda/derecha, escala, traslación, time warping y frame dropout.
+"""
+import hashlib
+import os
+
+import numpy as np
+import tensorflow as tf
+
+import compact_store
+import dataset_store
+import features as ft
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+HAND_SLICE = slice(132, 258)  # LH(63) + RH(63), igual que en Android (sin pose)
+HAND_LANDMARKS = 21
+READ_CHUNK = 256              # Secuencias por lectura a disco
+SHUFFLE_BUFFER = 4096
+
+# Aumentación (probabilidades por secuencia, rangos uniformes)
+MIRROR_PROB = 0.5
+SCALE_RANGE = (0.85, 1.15)
+TRANSLATE_RANGE = 0.08        # En coordenadas normalizadas de imagen
+TIME_WARP_RANGE = (0.8, 1.2)  # Factor de velocidad
+FRAME_DROPOUT = 0.1           # Probabilidad de perder un frame (como si MediaPipe no detectara)
+
+
+# ==========================================
+# LECTURA PEREZOSA
+# ==========================================
+class SequenceSource:
+    """Acceso por índices a las secuencias del dataset, sin cargarlo entero."""
+
+    def __init__(self, read_rows, labels, actions, sequence_length, num_features, default_features=HAND_SLICE,
+                 fingerprint=None, ids=None):
+        self._read_rows = read_rows
+        self.labels = labels
+        self.actions = actions
+        self.sequence_length = sequence_length
+        self.num_features = num_features
+        self.default_features = default_features
+        # Huella del contenido (clave de las cachés derivadas: features, índice de calidad)
+        self.fingerprint = fingerprint
+        # ID estable de cada secuencia (no cambia al agregar otras): clave del split de prueba guardado
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.labels)
+
+    def read(self, indices, features=None):
+        """(len(indices), L, F') float32 con solo las columnas `features` (None = las de entrenamiento)."""
+        features = self.default_features if features is None else features
+        indices = np.asarray(indices, dtype=np.int64)
+        # Orden ascendente para leer el disco secuencialmente, luego se restaura el orden pedido
+        order = np.argsort(indices, kind='stable')
+        out = np.empty((len(indices),) + self.feature_shape(features), dtype=np.float32)
+        out[order] = self._read_rows(indices[order], features)
+        return out
+
+    def feature_shape(self, features=None):
+        features = self.default_features if features is None else features
+        return (self.sequence_length, len(range(self.num_features)[features]))
+
+
+def open_packed_source(store_path=dataset_store.PACKED_PATH):
+    X, stored_labels, meta = dataset_store.open_store(store_path)
+    actions = np.array(sorted(meta['actions']))
+    # Las etiquetas del store siguen el orden de aparición; las remapeamos al orden alfabético
+    remap = np.searchsorted(actions, np.array(meta['actions']))
+    labels = remap[stored_labels].astype(np.int32)
+
+    def read_rows(indices, features):
+        # Fancy indexing sobre el memmap: solo se copian las filas y columnas pedidas
+        return X[indices, :, features]
+
+    return SequenceSource(read_rows, labels, actions, meta['sequence_length'], meta['num_features'],
+                          fingerprint=dataset_store.fingerprint(store_path), ids=dataset_store.sequence_ids(store_path))
+
+
+def open_folder_source(data_path=dataset_store.DATA_PATH, sequence_length=dataset_store.SEQUENCE_LENGTH):
+    actions = np.array(sorted([folder for folder in os.listdir(data_path) if os.path.isdir(os.path.join(data_path, folder))]))
+    files, labels, ids = [], [], []
+    digest = hashlib.sha1()
+    for num, action in enumerate(actions):
+        action_path = os.path.join(data_path, action)
+        for sequence in sorted([d for d in os.listdir(action_path) if d.isdigit()], key=int):
+            keypoints_file = os.path.join(action_path, sequence, "keypoints.npy")
+            if os.path.exists(keypoints_file):
+                files.append(keypoints_file)
+                labels.append(num)
+                ids.append(dataset_store.folder_sequence_id(os.path.relpath(keypoints_file, data_path)))
+                stat = os.stat(keypoints_file)
+                digest.update(f"{action}/{sequence}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+
+    def read_rows(indices, features):
+        rows = np.empty((len(indices), sequence_length, len(range(dataset_store.NUM_FEATURES)[features])), dtype=np.float32)
+        for n, i in enumerate(indices):
+            rows[n] = np.load(files[i], mmap_mode='r')[:, features]
+        return rows
+
+    return SequenceSource(read_rows, np.array(labels, dtype=np.int32), actions,
+                          sequence_length, dataset_store.NUM_FEATURES, fingerprint=digest.hexdigest()[:16],
+                          ids=np.array(ids))
+
+
+def open_compact_source(compact_path=compact_store.COMPACT_PATH):
+    reader = compact_store.CompactReader(compact_path)
+    actions = np.array(sorted(reader.actions))
+    remap = np.searchsorted(actions, np.array(reader.actions))
+    labels = remap[reader.labels].astype(np.int32)
+    return SequenceSource(reader.read_rows, labels, actions, reader.sequence_length, reader.num_features,
+                          fingerprint='compact-' + compact_store.fingerprint(compact_path),
+                          ids=reader.ids)
+
+
+def open_source(store_path=dataset_store.PACKED_PATH, data_path=dataset_store.DATA_PATH,
+                compact_path=compact_store.COMPACT_PATH):
+    if dataset_store.store_exists(store_path):
+        # Con el empaquetado presente las carpetas no se leen: las que no se importaron se pierden
+        pending = dataset_store.unconverted_folder_sequences(data_path, store_path)
+        if pending:
+            print(f"⚠️ {len(pending)} secuencias de {data_path} no están en {store_path} y NO se usan. "
+                  "Ejecuta 'python python_scripts/dataset_store.py import'.")
+    if compact_path and os.path.exists(os.path.join(compact_path, 'meta.json')):
+        # El compacto es una conversión del empaquetado: solo sirve si su huella sigue coincidiendo
+        if compact_store.is_current(compact_path, store_path):
+            print(f"Usando dataset compacto: {compact_path}")
+            return open_compact_source(compact_path)
+        print("⚠️ El dataset compacto está desactualizado (el empaquetado cambió desde la conversión). "
+              "Ejecuta 'python python_scripts/compact_store.py convert'.")
+    if dataset_store.store_exists(store_path):
+        print(f"Usando dataset empaquetado: {store_path}")
+        return open_packed_source(store_path)
+    return open_folder_source(data_path)
+
+
+def relabel_source(source, actions):
+    """Misma fuente con las etiquetas en el orden `actions` (que debe incluir todas las señas)."""
+    actions = np.asarray(actions)
+    position = {action: i for i, action in enumerate(actions)}
+    missing = [action for action in source.actions if action not in position]
+    if missing:
+        raise ValueError(f"Señas sin índice en el nuevo orden: {missing}")
+    remap = np.array([position[action] for action in source.actions], dtype=np.int32)
+    return SequenceSource(source._read_rows, remap[source.labels], actions, source.sequence_length,
+                          source.num_features, source.default_features, source.fingerprint, source.ids)
+
+
+def open_feature_source(source, spec=ft.DEFAULT_SPEC, cache_path=ft.FEATURE_CACHE_PATH):
+    """Features normalizadas (features.py) precalculadas una vez sobre todo el corpus."""
+    path, shape = ft.precompute(source, spec, cache_path)
+    X = np.memmap(path, dtype=np.float32, mode='r', shape=shape)
+
+    def read_rows(indices, columns):
+        return X[indices, :, columns]
+
+    return SequenceSource(read_rows, source.labels, source.actions, shape[1], shape[2], default_features=slice(None),
+                          fingerprint=os.path.basename(path), ids=source.ids)
+
+
+# ==========================================
+# AUMENTACIÓN VECTORIZADA (sobre batches)
+# ==========================================
+def _uniform(batch, low, high):
+    return tf.random.uniform([batch, 1, 1, 1, 1], low, high)
+
+
+def augment_batch(x):
+    """x: (B, L, 126) manos [LH | RH]. Los landmarks ausentes (ceros) se mantienen en cero."""
+    batch = tf.shape(x)[0]
+    length = tf.shape(x)[1]
+    hands = tf.reshape(x, [batch, length, 2, HAND_LANDMARKS, 3])
+
+    # 1. Time warping: remuestreo por vecino más cercano (no mezcla frames con y sin mano)
+    speed = tf.random.uniform([batch, 1], *TIME_WARP_RANGE)
+    positions = tf.cast(tf.range(length), tf.float32)[tf.newaxis, :] * speed
+    offset = tf.random.uniform([batch, 1]) * tf.maximum(tf.cast(length - 1, tf.float32) - positions[:, -1:], 0.0)
+    source = tf.clip_by_value(tf.round(positions + offset), 0, tf.cast(length - 1, tf.float32))
+    hands = tf.gather(hands, tf.cast(source, tf.int32), axis=1, batch_dims=1)
+
+    present = tf.reduce_any(tf.not_equal(hands, 0.0), axis=[-2, -1], keepdims=True)  # (B, L, 2, 1, 1)
+    present_f = tf.cast(present, tf.float32)
+
+    # 2. Espejo: intercambia manos y refleja x (x -> 1 - x)
+    mirror = tf.random.uniform([batch, 1, 1, 1, 1]) < MIRROR_PROB
+    flip_x = tf.constant([-1.0, 1.0, 1.0])
+    shift_x = tf.constant([1.0, 0.0, 0.0])
+    mirrored = tf.reverse(hands, axis=[2]) * flip_x + shift_x
+    hands = tf.where(mirror, mirrored, hands)
+    present_f = tf.where(mirror, tf.reverse(present_f, axis=[2]), present_f)
+
+    # 3. Escala alrededor del centro de los landmarks presentes + traslación
+    count = tf.maximum(tf.reduce_sum(present_f, axis=[1, 2, 3], keepdims=True) * HAND_LANDMARKS, 1.0)
+    center = tf.reduce_sum(hands * present_f, axis=[1, 2, 3], keepdims=True) / count
+    scale = _uniform(batch, *SCALE_RANGE)
+    translate = tf.concat([_uniform(batch, -TRANSLATE_RANGE, TRANSLATE_RANGE),
+                           _uniform(batch, -TRANSLATE_RANGE, TRANSLATE_RANGE),
+                           tf.zeros([batch, 1, 1, 1, 1])], axis=-1)
+    hands = (hands - center) * scale + center + translate
+
+    # 4. Frame dropout: frames completos a cero
+    keep = tf.cast(tf.random.uniform([batch, length, 1, 1, 1]) >= FRAME_DROPOUT, tf.float32)
+
+    hands = hands * present_f * keep
+    return tf.reshape(hands, [batch, length, 2 * HAND_LANDMARKS * 3])
+
+
+# ==========================================
+# DATASET
+# ==========================================
+def make_dataset(source, indices, batch_size, training=True, augment=True, cache=None, features=None, frames=None):
+    """
+    tf.data.Dataset de (x, y_one_hot) sobre las secuencias `indices` de `source`.
+
+    cache: None (sin caché; el memmap ya usa la caché del SO), '' (memoria) o una ruta de archivo.
+    features: columnas a leer, None = las de entrenamiento de `source` (manos, o todas si son features).
+    frames: índices de frames a conservar (submuestreo temporal), None = todos.
+    """
+    if training and augment and source.default_features != HAND_SLICE:
+        # augment_batch trabaja sobre coordenadas crudas de manos, no sobre features normalizadas
+        raise ValueError("La aumentación requiere las 126 coordenadas de manos; usa augment=False")
+    indices = np.asarray(indices, dtype=np.int64)
+    if training:
+        indices = np.random.permutation(indices)
+    labels = source.labels[indices]
+    num_classes = len(source.actions)
+    feature_shape = source.feature_shape(features)
+
+    if frames is not None:
+        frames = np.asarray(frames, dtype=np.int64)
+        feature_shape = (len(frames),) + feature_shape[1:]
+
+    def read(chunk):
+        x = source.read(chunk, features)
+        return x if frames is None else np.ascontiguousarray(x[:, frames])
+
+    def read_chunk(chunk, y):
+        x = tf.numpy_function(read, [chunk], tf.float32)
+        x.set_shape((None,) + feature_shape)
+        return x, y
+
+    ds = tf.data.Dataset.from_tensor_slices((indices, labels))
+    ds = ds.batch(READ_CHUNK)
+    ds = ds.map(read_chunk, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not training)
+    if cache is not None:
+        ds = ds.cache(cache)
+    ds = ds.unbatch()
+    if training:
+        ds = ds.shuffle(min(SHUFFLE_BUFFER, len(indices)), reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    if training and augment:
+        ds = ds.map(lambda x, y: (augment_batch(x), y), num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.map(lambda x, y: (x, tf.one_hot(y, num_classes)), num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,90 @@
+"""
+Extracción vectorizada de keypoints de MediaPipe Holistic.
+
+Mismo layout que extract_keypoints() de recording.py (el del recolector):
+    [Pose 33*(x,y,z,visibility) | LH 21*(x,y,z) | RH 21*(x,y,z)] = 258 floats
+
+pero sin listas intermedias: los valores se leen con attrgetter + itertools (en C)
+directamente hacia np.fromiter, y se escriben en un buffer float32 preasignado.
+extract_sequence() procesa una secuencia completa con una sola llamada a np.fromiter
+por parte del cuerpo (pose, mano izquierda, mano derecha).
+"""
+import itertools
+import operator
+
+import numpy as np
+
+SEQUENCE_LENGTH = 32
+
+POSE_LANDMARKS = 33
+HAND_LANDMARKS = 21
+POSE_SIZE = POSE_LANDMARKS * 4   # 132
+HAND_SIZE = HAND_LANDMARKS * 3   # 63
+NUM_FEATURES = POSE_SIZE + 2 * HAND_SIZE  # 258
+
+POSE_SLICE = slice(0, POSE_SIZE)
+LH_SLICE = slice(POSE_SIZE, POSE_SIZE + HAND_SIZE)
+RH_SLICE = slice(POSE_SIZE + HAND_SIZE, NUM_FEATURES)
+
+# Columnas de la máscara de presencia
+MASK_POSE, MASK_LH, MASK_RH = 0, 1, 2
+
+_XYZ = operator.attrgetter('x', 'y', 'z')
+_XYZV = operator.attrgetter('x', 'y', 'z', 'visibility')
+
+# (atributo de results, getter, slice en el vector, tamaño, columna de la máscara)
+_PARTS = (
+    ('pose_landmarks', _XYZV, POSE_SLICE, POSE_SIZE, MASK_POSE),
+    ('left_hand_landmarks', _XYZ, LH_SLICE, HAND_SIZE, MASK_LH),
+    ('right_hand_landmarks', _XYZ, RH_SLICE, HAND_SIZE, MASK_RH),
+)
+
+
+def _landmark_values(landmark_lists, getter):
+    # Iterador plano de floats: todo el recorrido por landmark ocurre en C
+    landmarks = itertools.chain.from_iterable(l.landmark for l in landmark_lists)
+    return itertools.chain.from_iterable(map(getter, landmarks))
+
+
+def extract_keypoints_into(results, out):
+    """Escribe los 258 keypoints de un frame en `out` (vista float32) y devuelve la presencia."""
+    present = [False, False, False]
+    for attr, getter, part, size, mask_col in _PARTS:
+        landmarks = getattr(results, attr)
+        if landmarks:
+            out[part] = np.fromiter(_landmark_values((landmarks,), getter), dtype=np.float32, count=size)
+            present[mask_col] = True
+        else:
+            out[part] = 0.0
+    return present
+
+
+def extract_sequence(results_seq, out=None, mask=None, sequence_length=SEQUENCE_LENGTH):
+    """
+    Extrae una secuencia completa de resultados de Holistic.
+
+    Devuelve (out, mask): out (sequence_length, 258) float32 con padding de ceros al
+    final si hay menos frames, y mask (sequence_length, 3) bool con la presencia de
+    pose / mano izquierda / mano derecha por frame.
+    """
+    n = len(results_seq)
+    if n > sequence_length:
+        raise ValueError(f"La secuencia tiene {n} frames (máximo {sequence_length})")
+    if out is None:
+        out = np.zeros((sequence_length, NUM_FEATURES), dtype=np.float32)
+    else:
+        out.fill(0.0)
+    if mask is None:
+        mask = np.zeros((sequence_length, 3), dtype=bool)
+    else:
+        mask.fill(False)
+
+    for attr, getter, part, size, mask_col in _PARTS:
+        present = [getattr(r, attr) for r in results_seq]
+        rows = [i for i, landmarks in enumerate(present) if landmarks]
+        if not rows: continue
+        values = np.fromiter(_landmark_values((present[i] for i in rows), getter),
+                             dtype=np.float32, count=len(rows) * size)
+        out[rows, part] = values.reshape(len(rows), size)
+        mask[rows, mask_col] = True
+    return out, mask
@@ -0,0 +1,220 @@
+"""
+Reconocimiento en vivo en escritorio con lsc_model.tflite (el mismo modelo de la app).
+
+Reproduce el flujo de TfliteDataSource.kt: ventana deslizante de SEQUENCE_LENGTH frames
+(solo manos, 126 features), mínimo de frames con manos y umbral de confianza. El buffer
+es un anillo preasignado sin copias por frame y el intérprete se prepara una sola vez.
+La inferencia corre cada INFERENCE_STRIDE frames en lugar de en todos, o con --segment
+solo sobre los tramos que propone segmentation.StreamSegmenter. Si hay un
+feature_spec.json junto al modelo se aplica el mismo transform que en la app (features.py).
+
+Reporta latencia por etapa (captura, landmarks, inferencia) y el retardo seña -> etiqueta:
+tiempo desde que aparecen las manos hasta la primera etiqueta sobre el umbral.
+
+Uso:
+    python python_scripts/live_inference.py                 # cámara
+    python python_scripts/live_inference.py --video hola.mov
+    python python_scripts/live_inference.py --segment        # inferencia por tramos detectados
+"""
+import argparse
+import collections
+import os
+import time
+
+import cv2
+import numpy as np
+
+import features
+import keypoints as kp
+import recording
+import segmentation
+
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Se-alyze-Android', 'app', 'src', 'main', 'assets')
+MODEL_PATH = os.path.join(ASSETS_PATH, 'lsc_model.tflite')
+LABELS_PATH = os.path.join(ASSETS_PATH, 'labels.txt')
+SEQUENCE_LENGTH = recording.SEQUENCE_LENGTH
+FEATURE_SIZE = 2 * kp.HAND_SIZE  # 126 = LH + RH, como en Android
+INFERENCE_STRIDE = 4             # Inferir cada N frames (1 = todos, como en Android)
+MIN_VALID_FRAMES = 5             # Igual que TfliteDataSource.kt
+CONFIDENCE_THRESHOLD = 0.50      # Igual que TfliteDataSource.kt
+STATS_WINDOW = 300               # Muestras recientes para los percentiles
+
+
+def load_interpreter(model_path, num_threads=None):
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+class SequenceRing:
+    """
+    Ventana deslizante (L, F) sin copias: cada frame se escribe dos veces en un buffer
+    (2L, F), así la ventana ordenada siempre es una vista contigua buf[start:start+L].
+    """
+
+    def __init__(self, length, features):
+        self.length = length
+        self.buffer = np.zeros((2 * length, features), dtype=np.float32)
+        self.present = np.zeros(length, dtype=bool)  # ¿Hay alguna mano en el frame?
+        self.count = 0
+
+    def push(self, row, has_hands):
+        pos = self.count % self.length
+        self.buffer[pos] = row
+        self.buffer[pos + self.length] = row
+        self.present[pos] = has_hands
+        self.count += 1
+
+    def full(self):
+        return self.count >= self.length
+
+    def valid_frames(self):
+        return int(self.present.sum())
+
+    def window(self):
+        start = self.count % self.length
+        return self.buffer[start:start + self.length]
+
+
+class StageStats:
+    def __init__(self, window=STATS_WINDOW):
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=window))
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds * 1000.0)
+
+    def summary(self):
+        return {stage: (np.percentile(values, 50), np.percentile(values, 95))
+                for stage, values in self.samples.items() if values}
+
+
+def run_live(video=None, model_path=MODEL_PATH, labels_path=LABELS_PATH, stride=INFERENCE_STRIDE,
+             num_threads=None, show=True, segment=False):
+    with open(labels_path, 'r') as f:
+        labels = [line.strip() for line in f if line.strip()]
+
+    spec_path = os.path.join(os.path.dirname(model_path), 'feature_spec.json')
+    spec = features.load_spec(spec_path) if os.path.exists(spec_path) else None
+
+    interpreter = load_interpreter(model_path, num_threads)
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+
+    ring = SequenceRing(SEQUENCE_LENGTH, FEATURE_SIZE)
+    frame_row = np.zeros(kp.NUM_FEATURES, dtype=np.float32)
+    stats = StageStats()
+    if segment:
+        segmenter = segmentation.StreamSegmenter()
+        history = segmentation.FrameHistory(features=FEATURE_SIZE)
+
+    cap = cv2.VideoCapture(video if video else 0)
+    if not cap.isOpened():
+        print("ERROR: No se pudo abrir la fuente de video.")
+        return
+
+    hands_onset = None   # Instante en que aparecieron las manos (inicio de una seña)
+    label_emitted = False
+    current_label, current_score = "", 0.0
+    frame_index = 0
+
+    with recording.mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
+        while True:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret: break
+            if not video: frame = cv2.flip(frame, 1)
+            t1 = time.perf_counter()
+
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            results = holistic.process(image)
+            present = kp.extract_keypoints_into(results, frame_row)
+            has_hands = present[kp.MASK_LH] or present[kp.MASK_RH]
+            ring.push(frame_row[kp.POSE_SIZE:], has_hands)
+            t2 = time.perf_counter()
+            stats.add('captura', t1 - t0)
+            stats.add('landmarks', t2 - t1)
+
+            if has_hands and hands_onset is None:
+                hands_onset, label_emitted = t0, False
+            elif not has_hands and ring.valid_frames() == 0:
+                hands_onset = None
+
+            frame_index += 1
+            windows = []
+            if segment:
+                # Solo se clasifica cuando se cierra un tramo con seña
+                history.push(frame_row[kp.POSE_SIZE:], t0)
+                span = segmenter.push(frame_row[kp.POSE_SIZE:])
+                if span is not None:
+                    windows = [window for window, _ in history.span_windows(span, SEQUENCE_LENGTH)]
+            elif ring.full() and frame_index % stride == 0 and ring.valid_frames() >= MIN_VALID_FRAMES:
+                windows = [ring.window()]
+            if windows:
+                # Un span largo da varias ventanas: gana la predicción más segura
+                probabilities = None
+                for window in windows:
+                    window = window[np.newaxis]
+                    interpreter.set_tensor(input_index, window if spec is None else features.transform(window, spec))
+                    interpreter.invoke()
+                    output = interpreter.get_tensor(output_index)[0]
+                    if probabilities is None or output.max() > probabilities.max():
+                        probabilities = output.copy()
+                t3 = time.perf_counter()
+                stats.add('inferencia', t3 - t2)
+
+                best = int(np.argmax(probabilities))
+                current_score = float(probabilities[best])
+                new_label = labels[best] if current_score > CONFIDENCE_THRESHOLD else ""
+                if new_label and hands_onset is not None and not label_emitted:
+                    stats.add('seña->etiqueta', t3 - hands_onset)
+                    label_emitted = True
+                if new_label and new_label != current_label:
+                    print(f"🤟 {new_label} ({current_score:.2f})")
+                current_label = new_label
+
+            stats.add('total', time.perf_counter() - t0)
+
+            if show:
+                recording.draw_styled_landmarks(frame, results)
+                cv2.putText(frame, f"{current_label.upper()} {current_score:.2f}" if current_label else "...",
+                            (15, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 0), 3, cv2.LINE_AA)
+                y = 110
+                for stage, (p50, p95) in stats.summary().items():
+                    cv2.putText(frame, f"{stage}: p50 {p50:.1f} ms / p95 {p95:.1f} ms", (15, y),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2, cv2.LINE_AA)
+                    y += 30
+                cv2.imshow('Se-alyze Live', frame)
+                if cv2.waitKey(1) & 0xFF == 27: break
+
+    cap.release()
+    if show: cv2.destroyAllWindows()
+
+    print(f"\n== Latencias ({frame_index} frames, {'por tramos' if segment else f'stride {stride}'}) ==")
+    for stage, (p50, p95) in stats.summary().items():
+        print(f"  {stage:<16} p50 {p50:7.2f} ms   p95 {p95:7.2f} ms")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconocimiento en vivo con el modelo TFLite")
+    parser.add_argument('--video', help="Archivo de video en lugar de la cámara")
+    parser.add_argument('--model', default=MODEL_PATH)
+    parser.add_argument('--labels', default=LABELS_PATH)
+    parser.add_argument('--stride', type=int, default=INFERENCE_STRIDE)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--no-display', action='store_true')
+    parser.add_argument('--segment', action='store_true', help="Inferir solo sobre tramos detectados")
+    args = parser.parse_args()
+
+    run_live(args.video, args.model, args.labels, args.stride, args.threads, show=not args.no_display,
+             segment=args.segment)
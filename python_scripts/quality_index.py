@@ -0,0 +1,253 @@
+"""
+Índice de calidad del dataset: estadísticas por secuencia calculadas en una sola pasada
+vectorizada (por bloques) sobre todo el corpus.
+
+    length          frames reales (último frame con datos + 1)
+    hand_ratio      fracción de frames reales con alguna mano (lh_ratio / rh_ratio por mano)
+    pose_ratio      fracción de frames reales con pose
+    motion          desplazamiento medio (x, y) de los landmarks de las manos entre frames
+    nn_index/_sim   vecino más cercano (coseno) sobre un embedding de 64 dimensiones:
+                    features normalizadas (features.py) promediadas en EMBED_FRAMES tramos
+                    y proyectadas con una matriz aleatoria fija
+    earlier_sim     similitud máxima con cualquier secuencia anterior (criterio de duplicado)
+
+Los vecinos se buscan por fuerza bruta exacta: la matriz de similitud completa (O(n²))
+calculada por bloques de NEIGHBOR_BLOCK filas, así que la memoria queda acotada pero el
+tiempo crece con el cuadrado del número de secuencias.
+
+El índice se guarda en dataset_quality/quality_index.npz junto con la huella del dataset
+(SequenceSource.fingerprint) con la que se calculó. filter_indices() descarta las
+secuencias que no cumplen los umbrales (lo usa 2_train_local.py con QUALITY_FILTER) y
+report() lista las señas que conviene volver a grabar.
+
+Uso:
+    python python_scripts/quality_index.py build
+    python python_scripts/quality_index.py report --min-hand-ratio 0.6
+    python python_scripts/quality_index.py query --sign hola
+"""
+import argparse
+import os
+
+import numpy as np
+
+import dataset_store
+import features
+import keypoints as kp
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+INDEX_PATH = os.path.join(dataset_store.BASE_PATH, 'dataset_quality', 'quality_index.npz')
+SCAN_CHUNK = 2048
+EMBED_FRAMES = 8
+EMBED_DIM = 64
+NEIGHBOR_BLOCK = 1024      # Filas por bloque de la matriz de similitud (memoria acotada)
+DEFAULT_THRESHOLDS = {
+    'min_hand_ratio': 0.5,      # Al menos la mitad de los frames reales con manos
+    'min_length': 15,           # Igual que MIN_LENGTH del recolector
+    'min_motion': 0.0005,       # Manos prácticamente inmóviles (o landmarks congelados)
+    'max_similarity': 0.995,    # Casi idéntica a una secuencia anterior
+}
+MIN_GOOD_PER_SIGN = 20     # Por debajo, la seña aparece en el reporte para regrabar
+
+
+# ==========================================
+# ESTADÍSTICAS VECTORIZADAS
+# ==========================================
+def _projection(num_inputs, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((num_inputs, EMBED_DIM)) / np.sqrt(EMBED_DIM)).astype(np.float32)
+
+
+def sequence_stats(X):
+    """X: (n, L, 258). Devuelve {campo: (n,)} y embeddings (n, EMBED_DIM) normalizados."""
+    n, length, _ = X.shape
+    hands = X[:, :, kp.POSE_SIZE:].reshape(n, length, 2, kp.HAND_LANDMARKS, 3)
+    hand_present = np.any(hands != 0, axis=(-2, -1))                      # (n, L, 2)
+    pose_present = np.any(X[:, :, kp.POSE_SLICE] != 0, axis=-1)           # (n, L)
+    any_frame = hand_present.any(-1) | pose_present
+
+    lengths = np.where(any_frame.any(1), length - np.argmax(any_frame[:, ::-1], axis=1), 0)
+    valid = np.arange(length)[np.newaxis, :] < lengths[:, np.newaxis]
+    real = np.maximum(lengths, 1)
+
+    # Movimiento: solo entre frames consecutivos con la misma mano presente en ambos
+    both = hand_present[:, 1:] & hand_present[:, :-1]
+    step = np.linalg.norm(hands[:, 1:, :, :, :2] - hands[:, :-1, :, :, :2], axis=-1).mean(-1)
+    motion = (step * both).sum((1, 2)) / np.maximum(both.sum((1, 2)), 1)
+
+    stats = {
+        'length': lengths.astype(np.int32),
+        'hand_ratio': (hand_present.any(-1) & valid).sum(1) / real,
+        'lh_ratio': (hand_present[:, :, 0] & valid).sum(1) / real,
+        'rh_ratio': (hand_present[:, :, 1] & valid).sum(1) / real,
+        'pose_ratio': (pose_present & valid).sum(1) / real,
+        'motion': motion,
+    }
+
+    normalized = features.transform(X[:, :, kp.POSE_SIZE:], features.DEFAULT_SPEC)
+    pooled = np.stack([normalized[:, part].mean(1) for part in np.array_split(np.arange(length), EMBED_FRAMES)], 1)
+    flat = pooled.reshape(n, -1)
+    embedding = flat @ _projection(flat.shape[1])
+    embedding /= np.maximum(np.linalg.norm(embedding, axis=1, keepdims=True), 1e-8)
+    return stats, embedding.astype(np.float32)
+
+
+def nearest_neighbors(embeddings):
+    """
+    Vecino más cercano (coseno, excluyendo la propia secuencia) por fuerza bruta, por bloques
+    de filas. Devuelve también la similitud máxima de cada fila con cualquier fila anterior
+    (-1 en la primera): en un grupo de casi idénticas todas menos la primera la superan.
+    """
+    n = len(embeddings)
+    nn_index = np.full(n, -1, dtype=np.int64)
+    nn_similarity = np.full(n, -1.0, dtype=np.float32)
+    earlier_similarity = np.full(n, -1.0, dtype=np.float32)
+    if n < 2:
+        return nn_index, nn_similarity, earlier_similarity
+    for start in range(0, n, NEIGHBOR_BLOCK):
+        stop = min(start + NEIGHBOR_BLOCK, n)
+        similarity = embeddings[start:stop] @ embeddings.T
+        rows = np.arange(stop - start)
+        similarity[rows, rows + start] = -np.inf
+        nn_index[start:stop] = np.argmax(similarity, axis=1)
+        nn_similarity[start:stop] = similarity[rows, nn_index[start:stop]]
+        if stop > 1:
+            # Solo columnas anteriores a cada fila (la diagonal ya está en -inf)
+            earlier = similarity[:, :stop]
+            earlier[np.arange(stop)[np.newaxis, :] > (rows + start)[:, np.newaxis]] = -np.inf
+            earlier_similarity[start:stop] = np.maximum(earlier.max(axis=1), -1.0)
+    return nn_index, nn_similarity, earlier_similarity
+
+
+# ==========================================
+# ÍNDICE
+# ==========================================
+def build_index(source, index_path=INDEX_PATH):
+    n = len(source)
+    stats = {name: np.zeros(n, dtype=np.float32) for name in ('hand_ratio', 'lh_ratio', 'rh_ratio', 'pose_ratio', 'motion')}
+    stats['length'] = np.zeros(n, dtype=np.int32)
+    embeddings = np.zeros((n, EMBED_DIM), dtype=np.float32)
+    for start in range(0, n, SCAN_CHUNK):
+        idx = np.arange(start, min(start + SCAN_CHUNK, n))
+        chunk_stats, embeddings[idx] = sequence_stats(source.read(idx, slice(None)))
+        for name, values in chunk_stats.items():
+            stats[name][idx] = values
+
+    nn_index, nn_similarity, earlier_similarity = nearest_neighbors(embeddings)
+    index = {
+        'labels': np.asarray(source.labels, dtype=np.int32),
+        'actions': np.asarray(source.actions),
+        'count': np.array(n),
+        'fingerprint': np.array(source.fingerprint or ''),
+        **stats,
+        'nn_index': nn_index,
+        'nn_similarity': nn_similarity,
+        'earlier_similarity': earlier_similarity,
+        'embeddings': embeddings,
+    }
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    np.savez(index_path + '.tmp.npz', **index)
+    os.replace(index_path + '.tmp.npz', index_path)
+    print(f"✅ Índice de calidad de {n} secuencias en: {index_path}")
+    return index
+
+
+def load_index(index_path=INDEX_PATH):
+    with np.load(index_path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def load_or_build(source, index_path=INDEX_PATH):
+    """Índice al día para `source`: se recalcula si cambió la huella del contenido, no solo el conteo."""
+    if os.path.exists(index_path):
+        index = load_index(index_path)
+        # El warm start reordena las etiquetas pero conserva la huella: el índice sigue valiendo
+        # Los índices sin earlier_similarity son de antes del criterio de duplicado actual
+        if (source.fingerprint and str(index.get('fingerprint', '')) == source.fingerprint
+                and 'earlier_similarity' in index):
+            return index
+        print("⚠️ El índice de calidad está desactualizado, recalculando...")
+    return build_index(source, index_path)
+
+
+def flag_reasons(index, thresholds=DEFAULT_THRESHOLDS):
+    """{motivo: máscara (n,) bool} de las secuencias que no cumplen cada umbral."""
+    reasons = {
+        'pocas_manos': index['hand_ratio'] < thresholds['min_hand_ratio'],
+        'muy_corta': index['length'] < thresholds['min_length'],
+        'sin_movimiento': index['motion'] < thresholds['min_motion'],
+    }
+    # De cada grupo de casi idénticas se conserva solo la primera: las demás tienen alguna
+    # secuencia anterior por encima del umbral (aunque su vecino más cercano sea posterior)
+    reasons['duplicada'] = index['earlier_similarity'] >= thresholds['max_similarity']
+    return reasons
+
+
+def filter_indices(index, indices, thresholds=DEFAULT_THRESHOLDS):
+    """Subconjunto de `indices` que pasa todos los umbrales."""
+    flagged = np.logical_or.reduce(list(flag_reasons(index, thresholds).values()))
+    indices = np.asarray(indices)
+    return indices[~flagged[indices]]
+
+
+def report(index, thresholds=DEFAULT_THRESHOLDS, min_good=MIN_GOOD_PER_SIGN):
+    """Tabla por seña de secuencias descartadas y lista de señas a regrabar."""
+    reasons = flag_reasons(index, thresholds)
+    flagged = np.logical_or.reduce(list(reasons.values()))
+    labels, actions = index['labels'], index['actions']
+    num_classes = len(actions)
+    total = np.bincount(labels, minlength=num_classes)
+    bad = np.bincount(labels, weights=flagged, minlength=num_classes).astype(np.int64)
+    per_reason = {name: np.bincount(labels, weights=mask, minlength=num_classes).astype(np.int64)
+                  for name, mask in reasons.items()}
+
+    print(f"\n{'Seña':<20} {'Total':>6} {'Malas':>6} " + " ".join(f"{name:>14}" for name in reasons))
+    order = np.argsort(-(bad / np.maximum(total, 1)))
+    for c in order:
+        if not bad[c]: continue
+        print(f"{actions[c]:<20} {total[c]:>6} {bad[c]:>6} " + " ".join(f"{per_reason[name][c]:>14}" for name in reasons))
+    print(f"Total: {int(flagged.sum())} de {len(labels)} secuencias no pasan los umbrales")
+
+    rerecord = [str(actions[c]) for c in range(num_classes) if total[c] - bad[c] < min_good]
+    if rerecord:
+        print(f"🎥 Señas a regrabar (menos de {min_good} secuencias buenas): {', '.join(rerecord)}")
+    return rerecord
+
+
+def _thresholds_from_args(args):
+    return {
+        'min_hand_ratio': args.min_hand_ratio,
+        'min_length': args.min_length,
+        'min_motion': args.min_motion,
+        'max_similarity': args.max_similarity,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Índice de calidad del dataset")
+    parser.add_argument('command', choices=['build', 'report', 'query'])
+    parser.add_argument('--index-path', default=INDEX_PATH)
+    parser.add_argument('--sign', help="query: solo esta seña")
+    for name, value in DEFAULT_THRESHOLDS.items():
+        parser.add_argument('--' + name.replace('_', '-'), type=type(value), default=value)
+    args = parser.parse_args()
+
+    # Importado aquí: input_pipeline arrastra TensorFlow y el resto del módulo no lo necesita
+    import input_pipeline
+    source = input_pipeline.open_source()
+    index = build_index(source, args.index_path) if args.command == 'build' else load_or_build(source, args.index_path)
+    thresholds = _thresholds_from_args(args)
+
+    if args.command in ('build', 'report'):
+        report(index, thresholds)
+    else:
+        reasons = flag_reasons(index, thresholds)
+        actions = index['actions']
+        for i in range(len(index['labels'])):
+            sign = actions[index['labels'][i]]
+            failed = [name for name, mask in reasons.items() if mask[i]]
+            if not failed or (args.sign and sign != args.sign): continue
+            print(f"{i:>6} {sign:<20} manos {index['hand_ratio'][i]:.0%}  frames {index['length'][i]:>2}  "
+                  f"mov {index['motion'][i]:.4f}  vecino {index['nn_index'][i]} ({index['nn_similarity'][i]:.3f})  "
+                  f"-> {', '.join(failed)}")
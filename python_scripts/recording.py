@@ -0,0 +1,77 @@
+"""
+Constantes de grabación y utilidades de MediaPipe compartidas por el recolector
+(1_collect_data.py) y los scripts que trabajan con sus datos o videos: extract_landmarks.py,
+segmentation.py, live_inference.py y bench_keypoints.py.
+
+Importarlo no tiene efectos: a diferencia de 1_collect_data.py no lee target_words.txt ni
+imprime nada, así que se puede importar en cada worker de un pool de procesos.
+"""
+import json
+import os
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+SEQUENCE_LENGTH = 32  # AJUSTADO: 32 frames (aprox 1.05 seg a 30 FPS)
+MIN_LENGTH = 15       # Mínimo de frames para que una secuencia sea válida
+TARGET_FPS = 30.0
+SEQUENCE_DURATION = SEQUENCE_LENGTH / TARGET_FPS  # Segundos reales de cada secuencia
+
+# ==========================================
+# MEDIAPIPE
+# ==========================================
+mp_holistic = mp.solutions.holistic
+mp_drawing = mp.solutions.drawing_utils
+
+
+def mediapipe_detection(image, model):
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    image.flags.writeable = False
+    results = model.process(image)
+    image.flags.writeable = True
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    return image, results
+
+
+def draw_styled_landmarks(image, results):
+    # Cara (Mesh Contours) - Para que el usuario vea el mentón
+    if results.face_landmarks:
+        mp_drawing.draw_landmarks(
+            image,
+            results.face_landmarks,
+            mp_holistic.FACEMESH_CONTOURS,
+            mp_drawing.DrawingSpec(color=(80,110,10), thickness=1, circle_radius=1),
+            mp_drawing.DrawingSpec(color=(80,256,121), thickness=1, circle_radius=1)
+        )
+
+    # Manos
+    mp_drawing.draw_landmarks(image, results.left_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
+    mp_drawing.draw_landmarks(image, results.right_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
+    # Pose
+    mp_drawing.draw_landmarks(image, results.pose_landmarks, mp_holistic.POSE_CONNECTIONS)
+
+
+def extract_keypoints(results):
+    # POSE contiene 33 puntos, incluyendo nariz (0), ojos y boca (9,10).
+    # Usamos esto como referencia del "mentón".
+    pose = np.array([[res.x, res.y, res.z, res.visibility] for res in results.pose_landmarks.landmark]).flatten() if results.pose_landmarks else np.zeros(33*4)
+    lh = np.array([[res.x, res.y, res.z] for res in results.left_hand_landmarks.landmark]).flatten() if results.left_hand_landmarks else np.zeros(21*3)
+    rh = np.array([[res.x, res.y, res.z] for res in results.right_hand_landmarks.landmark]).flatten() if results.right_hand_landmarks else np.zeros(21*3)
+    return np.concatenate([pose, lh, rh])
+
+
+# ==========================================
+# MANIFIESTO DE VIDEO
+# ==========================================
+def video_manifest_path(video_path):
+    """Manifiesto de secuencias de un video limpio: una línea {"sequence", "frames", "saved"}."""
+    return os.path.splitext(video_path)[0] + '.jsonl'
+
+
+def append_video_manifest(manifest, sequence, frames, saved):
+    manifest.write(json.dumps({'sequence': sequence, 'frames': int(frames), 'saved': bool(saved)}) + '\n')
+    manifest.flush()
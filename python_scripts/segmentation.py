@@ -0,0 +1,306 @@
+"""
+Segmentación de señas sobre un flujo continuo de keypoints (cámara o video).
+
+En lugar de ventanas fijas tras una cuenta regresiva, StreamSegmenter recibe un frame a
+la vez y propone tramos (spans) donde hay una seña: manos presentes y energía de
+movimiento (desplazamiento medio de los landmarks entre frames, suavizado con una media
+exponencial) por encima de un umbral. Cada frame cuesta O(1): solo compara con el frame
+anterior y actualiza contadores, sin recorrer ventanas.
+
+    IDLE --(ONSET_FRAMES con manos y energía >= START_ENERGY)--> ACTIVE
+    ACTIVE --(HANGOVER_FRAMES sin manos o con energía < STOP_ENERGY)--> span emitido
+    ACTIVE --(MAX_SPAN_FRAMES)--> span emitido y se abre otro (firma continua)
+
+FrameHistory guarda los últimos frames en un anillo preasignado; span_windows() convierte
+un span en ventanas (SEQUENCE_LENGTH, F) de entrenamiento/inferencia remuestreando por
+tiempo, igual que capture_pipeline. Cada ventana dura lo mismo que una grabación de
+record_sign (SEQUENCE_DURATION): un span más corto se completa con ceros, y uno más largo
+se recorre con ventanas deslizantes en lugar de comprimirlo (el modelo solo vio
+compresiones de hasta MAX_COMPRESSION con el time warp de la aumentación).
+
+Uso:
+    python python_scripts/segmentation.py scan --video sesion.mov
+    python python_scripts/segmentation.py harvest --sign hola --video sesion.mov
+    python python_scripts/segmentation.py harvest --sign hola     # cámara, ESC para terminar
+"""
+import argparse
+import collections
+import os
+import time
+
+import cv2
+import numpy as np
+
+import capture_pipeline
+import dataset_store
+import keypoints as kp
+import recording
+
+
+# ==========================================
+# CONFIGURACIÓN (umbrales por frame, calibrados a ~30 FPS)
+# ==========================================
+START_ENERGY = 0.004      # Desplazamiento medio (coordenadas de imagen) para empezar un span
+STOP_ENERGY = 0.002       # Histéresis: por debajo de esto el span se considera en pausa
+ENERGY_SMOOTHING = 0.3    # Peso del frame actual en la media exponencial
+ONSET_FRAMES = 3          # Frames activos seguidos para abrir un span
+HANGOVER_FRAMES = 8       # Frames inactivos seguidos para cerrarlo
+PREROLL_FRAMES = 4        # Frames previos al inicio detectado que se incluyen
+POSTROLL_FRAMES = 4       # Frames tras el último activo que se incluyen (<= HANGOVER_FRAMES)
+MIN_SPAN_FRAMES = 15      # Igual que MIN_LENGTH del recolector
+MAX_SPAN_FRAMES = 64
+HISTORY_FRAMES = 256      # Frames guardados en FrameHistory (>= MAX_SPAN_FRAMES + PREROLL_FRAMES)
+MIN_DURATION = recording.SEQUENCE_DURATION  # Duración de cada ventana: la misma que record_sign
+MAX_COMPRESSION = 1.2     # Igual que TIME_WARP_RANGE[1] de input_pipeline: hasta aquí se comprime en una ventana
+WINDOW_STRIDE = 0.5       # Avance entre ventanas de un span largo (fracción de MIN_DURATION)
+HARVEST_STRIDE = 1.0      # Al guardar muestras, ventanas sin solape (evita casi duplicados)
+
+Span = collections.namedtuple('Span', ['start', 'end', 'mean_energy', 'presence_ratio'])
+Span.__doc__ = "Tramo [start, end) en índices absolutos de frame del flujo."
+
+
+class StreamSegmenter:
+    def __init__(self, start_energy=START_ENERGY, stop_energy=STOP_ENERGY, smoothing=ENERGY_SMOOTHING,
+                 onset_frames=ONSET_FRAMES, hangover_frames=HANGOVER_FRAMES, preroll=PREROLL_FRAMES,
+                 postroll=POSTROLL_FRAMES, min_frames=MIN_SPAN_FRAMES, max_frames=MAX_SPAN_FRAMES):
+        self.start_energy = start_energy
+        self.stop_energy = stop_energy
+        self.smoothing = smoothing
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+        self.preroll = preroll
+        self.postroll = min(postroll, hangover_frames)
+        self.min_frames = min_frames
+        self.max_frames = max_frames
+
+        self._previous = np.zeros((2, kp.HAND_LANDMARKS, 3), dtype=np.float32)
+        self._previous_present = np.zeros(2, dtype=bool)
+        self.energy = 0.0
+        self.frame = -1
+        self.active = False
+        self._onset = 0
+        self._quiet = 0
+        self._start = 0
+        self._energy_sum = 0.0
+        self._present_count = 0
+        self._counted = 0
+
+    def _motion(self, hands, present):
+        # Desplazamiento medio (x, y) de las manos presentes en este frame y el anterior
+        both = present & self._previous_present
+        if not both.any():
+            return 0.0
+        step = np.linalg.norm(hands[both, :, :2] - self._previous[both, :, :2], axis=-1)
+        return float(step.mean(axis=-1).max())
+
+    def push(self, hands_row):
+        """hands_row: (126,) LH | RH de un frame. Devuelve un Span cuando se cierra uno, si no None."""
+        self.frame += 1
+        hands = np.asarray(hands_row, dtype=np.float32).reshape(2, kp.HAND_LANDMARKS, 3)
+        present = np.any(hands != 0, axis=(1, 2))
+        self.energy += self.smoothing * (self._motion(hands, present) - self.energy)
+        self._previous[:] = hands
+        self._previous_present[:] = present
+        any_hand = bool(present.any())
+
+        if not self.active:
+            self._onset = self._onset + 1 if any_hand and self.energy >= self.start_energy else 0
+            if self._onset >= self.onset_frames:
+                self._open(max(0, self.frame - self.onset_frames + 1 - self.preroll))
+            return None
+
+        self._energy_sum += self.energy
+        self._present_count += any_hand
+        self._counted += 1
+        self._quiet = self._quiet + 1 if not any_hand or self.energy < self.stop_energy else 0
+        if self._quiet >= self.hangover_frames:
+            self.active = False
+            self._onset = 0
+            return self._close(self.frame + 1 - self._quiet + self.postroll)
+        if self.frame + 1 - self._start >= self.max_frames:
+            span = self._close(self.frame + 1)
+            self._open(self.frame + 1)
+            return span
+        return None
+
+    def flush(self):
+        """Cierra el span abierto al terminar el flujo."""
+        if not self.active:
+            return None
+        self.active = False
+        return self._close(self.frame + 1 - self._quiet + min(self._quiet, self.postroll))
+
+    def _open(self, start):
+        self.active = True
+        self._start = start
+        self._quiet = 0
+        self._energy_sum = 0.0
+        self._present_count = 0
+        self._counted = 0
+
+    def _close(self, end):
+        length = end - self._start
+        if length < self.min_frames:
+            return None
+        counted = max(self._counted, 1)
+        return Span(self._start, end, self._energy_sum / counted, self._present_count / counted)
+
+
+class FrameHistory:
+    """Últimos `capacity` frames (keypoints + timestamp) en un anillo preasignado."""
+
+    def __init__(self, capacity=HISTORY_FRAMES, features=kp.NUM_FEATURES):
+        self.capacity = capacity
+        self.rows = np.zeros((capacity, features), dtype=np.float32)
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def push(self, row, timestamp):
+        pos = self.count % self.capacity
+        self.rows[pos] = row
+        self.times[pos] = timestamp
+        self.count += 1
+
+    def _window(self, idx, times, start, duration, frame_dt, sequence_length):
+        """Ventana de `duration` segundos desde `start` sobre los frames idx / times."""
+        pick = capture_pipeline.resample_to_grid(times, start, duration, sequence_length)
+        window = self.rows[idx[pick]]
+        grid = start + np.arange(sequence_length) * (duration / sequence_length)
+        beyond = grid > times[-1] + frame_dt / 2
+        window[beyond] = 0.0
+        timestamps = (times[pick] - start).astype(np.float32)
+        timestamps[beyond] = np.nan
+        return window, timestamps
+
+    def span_windows(self, span, sequence_length=dataset_store.SEQUENCE_LENGTH, window_duration=MIN_DURATION,
+                     stride=WINDOW_STRIDE, max_compression=MAX_COMPRESSION):
+        """
+        Lista de (keypoints (L, F) float32, timestamps (L,) float32) del span, remuestreado por tiempo.
+        - Más corto que window_duration: una ventana con ceros al final, como el padding de record_sign.
+        - Hasta max_compression veces más largo: una ventana comprimida.
+        - Más largo: ventanas de window_duration cada stride * window_duration; la última
+          termina donde termina el span.
+        """
+        start = max(span.start, self.count - self.capacity)
+        end = min(span.end, self.count)
+        if end - start < 2:
+            return []
+        idx = np.arange(start, end) % self.capacity
+        times = self.times[idx]
+        frame_dt = float(np.median(np.diff(times)))
+        span_duration = times[-1] - times[0] + frame_dt
+
+        if span_duration <= window_duration * max_compression:
+            duration = max(span_duration, window_duration)
+            return [self._window(idx, times, times[0], duration, frame_dt, sequence_length)]
+
+        last_start = times[0] + span_duration - window_duration
+        starts = list(np.arange(times[0], last_start, stride * window_duration))
+        if not starts or last_start - starts[-1] > frame_dt / 2:
+            starts.append(last_start)
+        windows = []
+        for window_start in starts:
+            inside = (times >= window_start - frame_dt / 2) & (times < window_start + window_duration)
+            windows.append(self._window(idx[inside], times[inside], window_start, window_duration, frame_dt,
+                                        sequence_length))
+        return windows
+
+
+# ==========================================
+# FLUJO DESDE VIDEO / CÁMARA
+# ==========================================
+def stream_spans(video=None, show=False, stride=WINDOW_STRIDE):
+    """
+    Procesa un video (o la cámara si video es None) y va entregando
+    (span, [(keypoints (L, 258), timestamps), ...]) a medida que se cierran los spans.
+    """
+    cap = cv2.VideoCapture(video if video else 0)
+    if not cap.isOpened():
+        raise IOError(f"No se pudo abrir la fuente de video: {video or 'cámara'}")
+
+    segmenter = StreamSegmenter()
+    history = FrameHistory()
+    frame_row = np.zeros(kp.NUM_FEATURES, dtype=np.float32)
+    fps = cap.get(cv2.CAP_PROP_FPS) or recording.TARGET_FPS
+    t0 = time.perf_counter()
+
+    with recording.mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
+        while True:
+            ret, frame = cap.read()
+            if not ret: break
+            if not video: frame = cv2.flip(frame, 1)
+            # Video: tiempo del contenedor; cámara: reloj de pared
+            timestamp = history.count / fps if video else time.perf_counter() - t0
+
+            image, results = recording.mediapipe_detection(frame, holistic)
+            kp.extract_keypoints_into(results, frame_row)
+            history.push(frame_row, timestamp)
+            span = segmenter.push(frame_row[kp.POSE_SIZE:])
+            if span is not None:
+                windows = history.span_windows(span, stride=stride)
+                if windows:
+                    yield span, windows
+
+            if show:
+                recording.draw_styled_landmarks(image, results)
+                color = (0, 0, 255) if segmenter.active else (200, 200, 200)
+                cv2.putText(image, f"energia {segmenter.energy:.4f}", (15, 40),
+                            cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2, cv2.LINE_AA)
+                cv2.imshow('Se-alyze Segmentation', image)
+                if cv2.waitKey(1) & 0xFF == 27: break
+
+        span = segmenter.flush()
+        if span is not None:
+            windows = history.span_windows(span, stride=stride)
+            if windows:
+                yield span, windows
+
+    cap.release()
+    if show: cv2.destroyAllWindows()
+
+
+def _print_span(span, windows):
+    print(f"✂️  Span frames {span.start}-{span.end} ({span.end - span.start} frames, "
+          f"energía {span.mean_energy:.4f}, manos {span.presence_ratio:.0%}) -> {len(windows)} ventana(s)")
+
+
+def scan(video=None, show=False):
+    for span, windows in stream_spans(video, show):
+        _print_span(span, windows)
+
+
+def harvest(sign, video=None, store_path=dataset_store.PACKED_PATH, show=True):
+    """Guarda cada span de una sesión continua como una muestra de `sign` en el dataset empaquetado."""
+    source_name = os.path.basename(video) if video else f"camera-{time.strftime('%Y%m%d-%H%M%S')}"
+    saved = 0
+    for span, windows in stream_spans(video, show, stride=HARVEST_STRIDE):
+        _print_span(span, windows)
+        for n, (window, timestamps) in enumerate(windows):
+            suffix = f"/{n}" if len(windows) > 1 else ""
+            dataset_store.append_sequence(store_path, sign, window,
+                                          source=f"{source_name}#{span.start}-{span.end}{suffix}",
+                                          timestamps=timestamps)
+            saved += 1
+    print(f"✅ {saved} secuencias de '{sign}' guardadas en {store_path}")
+    return saved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Segmentación de señas en flujo continuo")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    scan_cmd = sub.add_parser('scan', help="Lista los spans detectados")
+    scan_cmd.add_argument('--video', help="Archivo de video en lugar de la cámara")
+    scan_cmd.add_argument('--show', action='store_true')
+
+    harvest_cmd = sub.add_parser('harvest', help="Guarda cada span como muestra de una seña")
+    harvest_cmd.add_argument('--sign', required=True)
+    harvest_cmd.add_argument('--video', help="Archivo de video en lugar de la cámara")
+    harvest_cmd.add_argument('--store-path', default=dataset_store.PACKED_PATH)
+    harvest_cmd.add_argument('--no-display', action='store_true')
+
+    args = parser.parse_args()
+    if args.command == 'scan':
+        scan(args.video, args.show)
+    else:
+        harvest(args.sign, args.video, args.store_path, show=not args.no_display)
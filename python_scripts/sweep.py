@@ -0,0 +1,231 @@
+"""
+Barrido de hiperparámetros en paralelo para el clasificador de señas.
+
+Cada configuración (codificador temporal LSTM / GRU / Conv1D, anchos de capa, longitud de
+secuencia, dropout) se entrena en su propio proceso con un número fijo de hilos de TF
+(y núcleos fijos en Linux). Todos los procesos leen el mismo dataset empaquetado por
+memmap de solo lectura: el corpus está una sola vez en memoria (caché de páginas del SO).
+
+Al terminar, cada modelo se convierte a TFLite (builtins) y se mide su latencia real en
+CPU. El leaderboard ordena por precisión de validación y marca el frente de Pareto
+precisión / latencia.
+
+Uso:
+    python python_scripts/sweep.py --workers 4 --threads 2 --max-configs 24
+"""
+import argparse
+import csv
+import importlib
+import itertools
+import json
+import multiprocessing as mp_proc
+import os
+import random
+import time
+
+import dataset_store
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+SWEEP_GRID = {
+    'encoder': ['lstm', 'gru', 'conv1d'],
+    'widths': [(32, 64), (64, 128, 64), (64, 64)],
+    'sequence_length': [16, 24, 32],   # Frames submuestreados de la ventana de 32
+    'dropout': [0.2, 0.3],
+}
+MAX_EPOCHS = 60
+PATIENCE = 10
+VAL_SPLIT = 0.15
+BATCH_SIZE = 32
+OUTPUT_DIR = 'sweep_results'
+
+# Estado propio de cada proceso worker
+_trainer = None
+
+
+def grid_configs(grid=SWEEP_GRID, max_configs=None, seed=0):
+    keys = list(grid)
+    configs = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    if max_configs and max_configs < len(configs):
+        configs = random.Random(seed).sample(configs, max_configs)
+    return configs
+
+
+# ==========================================
+# WORKER
+# ==========================================
+def claim_worker_index(counter):
+    """Índice 0..N-1 del worker actual, tomado de un contador compartido (ctx.Value) del pool."""
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    return index
+
+
+def _init_worker(threads, counter):
+    global _trainer
+    # Fijar hilos antes de que TensorFlow cree sus thread pools
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    if hasattr(os, 'sched_setaffinity'):
+        # Núcleos contiguos por worker
+        worker = claim_worker_index(counter)
+        cpus = os.cpu_count()
+        os.sched_setaffinity(0, {(worker * threads + i) % cpus for i in range(threads)})
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    _trainer = importlib.import_module('2_train_local')
+
+
+def build_sweep_model(config, num_classes, num_features=126):
+    import tensorflow as tf
+    from tensorflow.keras import layers
+
+    model = tf.keras.Sequential()
+    model.add(layers.Input(shape=(config['sequence_length'], num_features)))
+    widths = config['widths']
+    for i, width in enumerate(widths):
+        last = i == len(widths) - 1
+        if config['encoder'] == 'lstm':
+            model.add(layers.LSTM(width, return_sequences=not last))
+        elif config['encoder'] == 'gru':
+            model.add(layers.GRU(width, return_sequences=not last, reset_after=False))
+        else:
+            model.add(layers.Conv1D(width, 3, padding='same', activation='relu'))
+            if last: model.add(layers.GlobalAveragePooling1D())
+        model.add(layers.Dropout(config['dropout']))
+    model.add(layers.Dense(64, activation='relu'))
+    model.add(layers.Dropout(config['dropout']))
+    model.add(layers.Dense(num_classes, activation='softmax'))
+    model.compile(optimizer='Adam', loss='categorical_crossentropy', metrics=['categorical_accuracy'])
+    return model
+
+
+def run_config(job):
+    import numpy as np
+    import tensorflow as tf
+    import input_pipeline
+
+    config, store_path, train_idx, val_idx = job
+    start = time.perf_counter()
+    source = input_pipeline.open_packed_source(store_path)
+    # Submuestreo uniforme: misma duración de ventana, menos frames
+    frames = np.round(np.linspace(0, source.sequence_length - 1, config['sequence_length'])).astype(np.int64)
+
+    train_ds = input_pipeline.make_dataset(source, train_idx, BATCH_SIZE, training=True, frames=frames)
+    val_ds = input_pipeline.make_dataset(source, val_idx, BATCH_SIZE, training=False, frames=frames)
+
+    # Liberar el grafo de la configuración anterior de este mismo proceso
+    tf.keras.backend.clear_session()
+    tf.keras.utils.set_random_seed(0)
+    model = build_sweep_model(config, len(source.actions))
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor='val_categorical_accuracy', patience=PATIENCE,
+                                                      restore_best_weights=True)
+    history = model.fit(train_ds, validation_data=val_ds, epochs=MAX_EPOCHS, callbacks=[early_stopping], verbose=0)
+
+    tflite_model = _trainer.convert_builtins_only(model, sequence_length=config['sequence_length'])
+    x_val = source.read(val_idx)[:, frames]
+    metrics = _trainer.evaluate_tflite(tflite_model, x_val, source.labels[val_idx], num_threads=1)
+
+    return {
+        **config,
+        'widths': list(config['widths']),
+        'val_accuracy': float(max(history.history['val_categorical_accuracy'])),
+        'tflite_accuracy': metrics['accuracy'],
+        'latency_mean_ms': metrics['latency_mean_ms'],
+        'latency_p95_ms': metrics['latency_p95_ms'],
+        'params': int(model.count_params()),
+        'tflite_bytes': len(tflite_model),
+        'epochs': len(history.history['loss']),
+        'train_seconds': time.perf_counter() - start,
+    }
+
+
+# ==========================================
+# LEADERBOARD
+# ==========================================
+def mark_pareto(results):
+    # Frente de Pareto: ninguna otra configuración es a la vez más precisa y más rápida
+    for r in results:
+        r['pareto'] = not any(
+            o is not r and o['val_accuracy'] >= r['val_accuracy'] and o['latency_mean_ms'] <= r['latency_mean_ms']
+            and (o['val_accuracy'] > r['val_accuracy'] or o['latency_mean_ms'] < r['latency_mean_ms'])
+            for o in results)
+    return results
+
+
+def write_leaderboard(results, output_dir=OUTPUT_DIR):
+    os.makedirs(output_dir, exist_ok=True)
+    results = sorted(mark_pareto(results), key=lambda r: (-r['val_accuracy'], r['latency_mean_ms']))
+    with open(os.path.join(output_dir, 'leaderboard.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    columns = ['encoder', 'widths', 'sequence_length', 'dropout', 'val_accuracy', 'tflite_accuracy',
+               'latency_mean_ms', 'latency_p95_ms', 'params', 'tflite_bytes', 'epochs', 'pareto']
+    with open(os.path.join(output_dir, 'leaderboard.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(f"\n{'#':>3} {'Encoder':<7} {'Anchos':<14} {'L':>3} {'Drop':>5} {'Val':>7} {'Lat(ms)':>8} {'Params':>8}")
+    for n, r in enumerate(results, start=1):
+        star = '*' if r['pareto'] else ' '
+        print(f"{n:>3} {r['encoder']:<7} {str(tuple(r['widths'])):<14} {r['sequence_length']:>3} {r['dropout']:>5} "
+              f"{r['val_accuracy']:>7.1%} {r['latency_mean_ms']:>8.3f} {r['params']:>8}{star}")
+    print(f"(* = frente de Pareto precisión/latencia) Leaderboard en: {output_dir}/")
+
+
+def run_sweep(store_path=dataset_store.PACKED_PATH, workers=None, threads=1, max_configs=None, output_dir=OUTPUT_DIR):
+    import numpy as np
+    from sklearn.model_selection import train_test_split
+
+    if not dataset_store.store_exists(store_path):
+        raise FileNotFoundError(f"El barrido necesita el dataset empaquetado ({store_path}). "
+                                "Ejecuta 'python python_scripts/dataset_store.py convert'.")
+    workers = workers or max(1, os.cpu_count() // threads)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Mismo split para todas las configuraciones
+    _, labels, _ = dataset_store.open_store(store_path)
+    # Solo las señas con secuencias: una etiqueta sin filas no impide estratificar
+    counts = np.bincount(labels)
+    stratify = labels if counts[counts > 0].min() >= 2 else None
+    train_idx, val_idx = train_test_split(np.arange(len(labels)), test_size=VAL_SPLIT, random_state=0, stratify=stratify)
+
+    configs = grid_configs(max_configs=max_configs)
+    print(f"🔎 {len(configs)} configuraciones, {workers} procesos x {threads} hilos")
+    jobs = [(config, store_path, train_idx, val_idx) for config in configs]
+
+    results = []
+    # Parcial de esta corrida: se vacía al empezar para no mezclar configuraciones de barridos anteriores
+    partial_path = os.path.join(output_dir, 'partial.jsonl')
+    open(partial_path, 'w').close()
+    # spawn: cada worker arranca TensorFlow desde cero con sus propios hilos
+    ctx = mp_proc.get_context('spawn')
+    counter = ctx.Value('i', 0)
+    with ctx.Pool(processes=workers, initializer=_init_worker, initargs=(threads, counter)) as pool:
+        for n, result in enumerate(pool.imap_unordered(run_config, jobs), start=1):
+            results.append(result)
+            print(f"✅ [{n}/{len(jobs)}] {result['encoder']} {tuple(result['widths'])} L={result['sequence_length']} "
+                  f"drop={result['dropout']}: val {result['val_accuracy']:.1%}, {result['latency_mean_ms']:.3f} ms")
+            # Guardar parcial: un barrido largo interrumpido no pierde lo ya medido
+            with open(partial_path, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+
+    write_leaderboard(results, output_dir)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Barrido de hiperparámetros multi-proceso")
+    parser.add_argument('--store-path', default=dataset_store.PACKED_PATH)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', type=int, default=1, help="Hilos de TensorFlow por proceso")
+    parser.add_argument('--max-configs', type=int, default=None)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    args = parser.parse_args()
+
+    run_sweep(args.store_path, args.workers, args.threads, args.max_configs, args.output_dir)
@@ -0,0 +1,203 @@
+"""
+Instrumentación de bajo costo para el recolector (1_collect_data.py / capture_pipeline.py).
+
+Cada etapa (lectura de cámara, holistic.process, dibujo, VideoWriter.write, imshow,
+waitKey, sonido...) guarda su duración en un anillo numpy preasignado: registrar es una
+resta y una escritura, sin listas ni locks (cada etapa tiene un solo hilo escritor).
+También se guardan los timestamps de cámara para calcular FPS.
+
+- hud_lines() / draw_hud(): FPS y p50/p95 recientes por etapa, recalculados cada
+  HUD_REFRESH segundos, para dibujar sobre la ventana del recolector.
+- begin_sequence() / end_sequence(): FPS efectivos y frames perdidos por secuencia.
+- write_report(): p50/p95/p99 por etapa de toda la sesión + las secuencias, en JSON
+  junto al dataset (<dataset>/telemetry/session_<fecha>.json).
+
+NULL_TELEMETRY tiene la misma interfaz sin hacer nada: con TELEMETRY = False el
+recolector no llama a perf_counter ni escribe nada.
+"""
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+RING_CAPACITY = 1 << 16   # Muestras por etapa (~30 señas x 30 secuencias x 32 frames caben enteras)
+HUD_WINDOW = 60           # Muestras recientes para el HUD
+HUD_REFRESH = 0.5         # Segundos entre recálculos del HUD
+PERCENTILES = (50, 95, 99)
+
+
+class _Ring:
+    __slots__ = ('values', 'count')
+
+    def __init__(self, capacity):
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.count % len(self.values)] = value
+        self.count += 1
+
+    def last(self, n):
+        n = min(n, self.count, len(self.values))
+        idx = np.arange(self.count - n, self.count) % len(self.values)
+        return self.values[idx]
+
+    def since(self, start):
+        return self.last(self.count - start)
+
+
+class Telemetry:
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.stages = {}
+        self.frame_times = _Ring(capacity)
+        self.sequences = []
+        self._sequence = None
+        self._hud_cache = ([], 0.0)
+        self.started = time.time()
+
+    clock = staticmethod(time.perf_counter)
+
+    def record(self, stage, start):
+        """Guarda now - start (segundos) para `stage` y devuelve now, para encadenar etapas."""
+        now = time.perf_counter()
+        ring = self.stages.get(stage)
+        if ring is None:
+            ring = self.stages[stage] = _Ring(self.capacity)
+        ring.add(now - start)
+        return now
+
+    def frame(self, timestamp):
+        """Timestamp (perf_counter) de un frame entregado por la cámara."""
+        self.frame_times.add(timestamp)
+
+    # --- Secuencias ---
+    def begin_sequence(self, sign, sequence):
+        self._sequence = {
+            'sign': sign,
+            'sequence': sequence,
+            'frame_start': self.frame_times.count,
+            'stage_start': {stage: ring.count for stage, ring in list(self.stages.items())},
+        }
+
+    def end_sequence(self, frames_used, duration, dropped=0, saved=True):
+        if self._sequence is None:
+            return
+        current = self._sequence
+        times = self.frame_times.since(current['frame_start'])
+        grabbed = len(times)
+        stage_ms = {}
+        for stage, ring in list(self.stages.items()):
+            values = ring.since(current['stage_start'].get(stage, 0))
+            if len(values):
+                stage_ms[stage] = float(np.median(values) * 1000)
+        self.sequences.append({
+            'sign': current['sign'],
+            'sequence': current['sequence'],
+            'grabbed': grabbed,
+            'frames_used': int(frames_used),
+            'dropped': int(dropped),
+            'camera_fps': float((grabbed - 1) / (times[-1] - times[0])) if grabbed > 1 and times[-1] > times[0] else 0.0,
+            'effective_fps': float(frames_used / duration) if duration else 0.0,
+            'saved': bool(saved),
+            'stage_p50_ms': stage_ms,
+        })
+        self._sequence = None
+
+    # --- HUD ---
+    def fps(self, window=HUD_WINDOW):
+        times = self.frame_times.last(window)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def hud_lines(self):
+        lines, computed = self._hud_cache
+        now = time.perf_counter()
+        if now - computed < HUD_REFRESH:
+            return lines
+        lines = [f"FPS camara {self.fps():.1f}"]
+        for stage, ring in list(self.stages.items()):
+            values = ring.last(HUD_WINDOW)
+            if len(values):
+                p50, p95 = np.percentile(values, (50, 95)) * 1000
+                lines.append(f"{stage}: {p50:.1f} / {p95:.1f} ms")
+        self._hud_cache = (lines, now)
+        return lines
+
+    def draw_hud(self, image):
+        x = image.shape[1] - 330
+        for i, line in enumerate(self.hud_lines()):
+            cv2.putText(image, line, (x, 30 + 24 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 1, cv2.LINE_AA)
+
+    # --- Reporte ---
+    def summary(self):
+        stages = {}
+        for stage, ring in list(self.stages.items()):
+            values = ring.last(ring.count) * 1000
+            if not len(values):
+                continue
+            stages[stage] = {
+                'count': int(ring.count),
+                'mean_ms': float(values.mean()),
+                'max_ms': float(values.max()),
+                **{f'p{p}_ms': float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+            }
+        effective = [s['effective_fps'] for s in self.sequences]
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'duration_s': time.time() - self.started,
+            'frames': int(self.frame_times.count),
+            'ring_capacity': self.capacity,
+            'stages': stages,
+            'effective_fps': {
+                'mean': float(np.mean(effective)) if effective else 0.0,
+                'min': float(np.min(effective)) if effective else 0.0,
+            },
+            'sequences': self.sequences,
+        }
+
+    def write_report(self, dataset_path):
+        """Escribe el reporte de la sesión y devuelve su ruta (None si no se midió nada)."""
+        if not self.frame_times.count and not self.stages:
+            return None
+        report_dir = os.path.join(dataset_path, 'telemetry')
+        os.makedirs(report_dir, exist_ok=True)
+        path = os.path.join(report_dir, f"session_{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}.json")
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        return path
+
+
+class NullTelemetry:
+    """Misma interfaz que Telemetry, sin medir nada."""
+
+    @staticmethod
+    def clock():
+        return 0.0
+
+    def record(self, stage, start):
+        return 0.0
+
+    def frame(self, timestamp):
+        pass
+
+    def begin_sequence(self, sign, sequence):
+        pass
+
+    def end_sequence(self, frames_used, duration, dropped=0, saved=True):
+        pass
+
+    def draw_hud(self, image):
+        pass
+
+    def write_report(self, dataset_path):
+        return None
+
+
+NULL_TELEMETRY = NullTelemetry()